@@ -0,0 +1,282 @@
+"""
+Build benchmark: cover rendering, merging and end-to-end binders on a synthetic project.
+
+A deterministic project is generated once (N sections, M attached PDFs per
+section of P pages and about S KB each, long spec titles that push autofit
+to its smallest sizes). Each stage then runs in a fresh interpreter so its
+peak RSS is its own:
+  - binder_cover:   generate_binder_cover with every section listed
+  - section_covers: generate_section_cover for every section (no cache)
+  - cover_set:      generate_cover_set (all covers on one canvas)
+  - autofit:        draw_autofit_centered for every title
+  - merge:          BinderMerger over the attachments only, then write
+  - end_to_end:     build_binder
+  - compact:        build_binder with the compact stage
+Each stage reports wall time (best of --repeat), peak RSS and output size.
+
+Memory bound of the merge (what the merge/end_to_end RSS growth shows): NOT
+one copy of the inputs. PyPDF2's writer holds every object it copies,
+stream data included, until the binder is written, so memory grows with the
+output: one copy of every appended attachment (one per section that uses
+it), on top of the mapped input files. Only the write itself is bounded: it
+goes to a spooled file, and the app serves the download from that file. At
+the default parameters that is about 105-120 MB of RSS growth for 62 MB of
+appended attachments (8 MB of distinct files), roughly twice the appended
+bytes.
+
+    python benchmarks/bench_build.py --sections 60 --pdfs 2 --pages 8
+    python benchmarks/bench_build.py --save-baseline
+Exits 1 if any stage is slower, bigger or hungrier than the stored baseline
+by more than --tolerance (baseline: benchmarks/baseline_build.json).
+"""
+
+import argparse
+import gc
+import importlib
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline_build.json")
+STAGES = ("binder_cover", "section_covers", "cover_set", "autofit", "merge", "end_to_end", "compact")
+
+# Differences below these are noise, whatever the ratio
+MIN_TIME_DELTA_MS = 20.0
+MIN_RSS_DELTA_MB = 8.0
+
+WORDS = ("Non-Structural Metal Framing Gypsum Board Assemblies Acoustical Ceilings "
+         "Suspension Systems Fire-Resistive Joint Sealants Thermal Insulation Panels").split()
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+# ---------- synthetic project ----------
+def make_attachment(path, pages, kbytes, seed):
+    """PDF of `pages` pages and roughly `kbytes` KB (incompressible noise image per page)."""
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    rnd = random.Random(seed)
+    side = max(8, int((kbytes * 1024 / max(pages, 1)) ** 0.5))
+    c = canvas.Canvas(path, pagesize=(612, 792))
+    for p in range(pages):
+        noise = Image.frombytes("L", (side, side), rnd.randbytes(side * side))
+        c.drawImage(ImageReader(noise), 72, 300, 200, 200)
+        c.setFont("Helvetica", 11)
+        c.drawString(72, 720, f"Attachment {seed} page {p + 1}")
+        c.showPage()
+    c.save()
+
+
+def make_project(workdir, sections, pdfs, pages, kb, seed=1234):
+    """Write the attachments and return the project description (JSON-able)."""
+    rnd = random.Random(seed)
+    paths = []
+    for i in range(pdfs * min(sections, 8)):  # attachments repeat, like shared catalogs
+        path = os.path.join(workdir, f"att_{i}.pdf")
+        make_attachment(path, pages, kb, seed + i)
+        paths.append(path)
+    secs = []
+    for i in range(sections):
+        title = " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 14)))
+        secs.append({
+            "spec": f"09{2200 + i:04d} {title}",
+            "product": " ".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 6))),
+            "pdfs": [paths[(i * pdfs + k) % len(paths)] for k in range(pdfs)],
+        })
+    fields = dict(date_str="1/31/2026", to_name="Jordan Example", to_company="Example Builders",
+                  to_addr1="100 Main St", to_addr2="Portland, OR 97201",
+                  project="Synthetic Benchmark Project " * 3, submitter_name="Bench")
+    return {"binder_fields": fields, "sections": secs}
+
+
+# ---------- stages (run in a child process) ----------
+def run_stage(stage, project):
+    """Run one stage once. Returns output bytes."""
+    from binder import covers
+    from binder.build import build_binder, map_file
+    from binder.merge import BinderMerger
+
+    fields, sections = project["binder_fields"], project["sections"]
+
+    if stage == "binder_cover":
+        return len(covers.generate_binder_cover(sections=sections, **fields).getvalue())
+    if stage == "section_covers":
+        return sum(len(covers.generate_section_cover(s["spec"], s["product"]).getvalue()) for s in sections)
+    if stage == "cover_set":
+        buf, _, _ = covers.generate_cover_set(fields, sections)
+        return len(buf.getvalue())
+    if stage == "autofit":
+        from reportlab.pdfgen import canvas
+        buf = io.BytesIO()
+        c = canvas.Canvas(buf, pagesize=(covers.LETTER_W, covers.LETTER_H))
+        for s in sections:
+            covers.draw_autofit_centered(c, s["spec"], covers.LETTER_W / 2, covers.LETTER_H - 200,
+                                         160, covers.LETTER_W - 144, covers.FONT_BOLD)
+            c.showPage()
+        c.save()
+        return len(buf.getvalue())
+
+    # One map per file, as the build service and CLI keep them: mapping a shared
+    # catalog once per section would count its pages in RSS once per mapping
+    maps = {}
+
+    def load_pdf(path):
+        if path not in maps:
+            maps[path] = map_file(path)
+        return maps[path]
+
+    try:
+        if stage == "merge":
+            with BinderMerger() as merger:
+                for s in sections:
+                    for p in s["pdfs"]:
+                        merger.append(load_pdf(p))
+                out = merger.write_spooled()
+        else:
+            out = build_binder(fields, sections, load_pdf=load_pdf,
+                               compact={"max_dpi": 150} if stage == "compact" else None)
+        out.seek(0, os.SEEK_END)
+        size = out.tell()
+        out.close()
+        return size
+    finally:
+        for mm in maps.values():
+            try:
+                mm.close()
+            except BufferError:
+                pass  # a reader still holds a view; it goes with the reader
+
+
+def child(stage, project_path, repeat):
+    sys.path.insert(0, ROOT)
+    with open(project_path, encoding="utf-8") as fh:
+        project = json.load(fh)
+    # Once-per-process set-up is not part of any stage: loading the engine
+    # (reportlab, PyPDF2), registering the fonts and decoding the logo
+    importlib.import_module("binder.build")
+    resources = importlib.import_module("binder.resources")
+    resources.register_fonts()
+    resources.load_logo_imagereader()
+    rss_before = peak_rss_mb()
+    best = None
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        size = run_stage(stage, project)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+        gc.collect()  # PyPDF2 objects are cyclic: drop one run's before the next
+    rss = peak_rss_mb()
+    print(json.dumps({
+        "wall_ms": round(best * 1000, 1),
+        "peak_rss_mb": round(rss, 1),
+        "rss_growth_mb": round(rss - rss_before, 1),
+        "output_bytes": size,
+    }))
+
+
+def measure(stage, project_path, repeat):
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--stage", stage, "--project", project_path,
+         "--repeat", str(repeat)],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    if out.returncode:
+        raise RuntimeError(f"stage {stage} failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ---------- baseline ----------
+def compare(results, baseline, tolerance):
+    """List of regression messages (empty when everything is within tolerance)."""
+    problems = []
+    for stage, r in results.items():
+        b = baseline.get(stage)
+        if not b:
+            continue
+        if r["wall_ms"] > b["wall_ms"] * (1 + tolerance) and r["wall_ms"] - b["wall_ms"] > MIN_TIME_DELTA_MS:
+            problems.append(f"{stage}: {r['wall_ms']:.0f} ms vs baseline {b['wall_ms']:.0f} ms")
+        if (r["rss_growth_mb"] > b["rss_growth_mb"] * (1 + tolerance)
+                and r["rss_growth_mb"] - b["rss_growth_mb"] > MIN_RSS_DELTA_MB):
+            problems.append(f"{stage}: +{r['rss_growth_mb']:.0f} MB RSS vs baseline +{b['rss_growth_mb']:.0f} MB")
+        if r["output_bytes"] > b["output_bytes"] * (1 + tolerance):
+            problems.append(f"{stage}: {r['output_bytes']:,} bytes vs baseline {b['output_bytes']:,}")
+    return problems
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--sections", type=int, default=60)
+    ap.add_argument("--pdfs", type=int, default=2, help="attached PDFs per section")
+    ap.add_argument("--pages", type=int, default=8, help="pages per attached PDF")
+    ap.add_argument("--kb", type=int, default=400, help="approximate size of each attached PDF")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is kept")
+    ap.add_argument("--stages", default=",".join(STAGES), help="comma-separated subset of stages")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown/growth (0.25 = 25%%)")
+    ap.add_argument("--json", action="store_true", help="print one JSON object instead of text")
+    ap.add_argument("--stage", help=argparse.SUPPRESS)
+    ap.add_argument("--project", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.stage:
+        child(args.stage, args.project, args.repeat)
+        return 0
+
+    sys.path.insert(0, ROOT)
+    params = {"sections": args.sections, "pdfs": args.pdfs, "pages": args.pages, "kb": args.kb}
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="wiljo_bench_") as workdir:
+        project = make_project(workdir, **params)
+        project_path = os.path.join(workdir, "project.json")
+        with open(project_path, "w", encoding="utf-8") as fh:
+            json.dump(project, fh)
+        for stage in [s for s in args.stages.split(",") if s]:
+            if stage not in STAGES:
+                ap.error(f"unknown stage {stage!r}")
+            results[stage] = measure(stage, project_path, args.repeat)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            stored = json.load(fh)
+        if stored.get("params") == params:
+            baseline = stored.get("stages", {})
+    problems = compare(results, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump({"params": params, "stages": results}, fh, indent=2)
+            fh.write("\n")
+
+    if args.json:
+        print(json.dumps({"params": params, "stages": results, "regressions": problems}))
+    else:
+        print(f"{args.sections} sections x {args.pdfs} PDFs x {args.pages} pages (~{args.kb} KB each)")
+        print(f"{'stage':<15}{'wall ms':>10}{'peak MB':>10}{'+RSS MB':>10}{'output KB':>12}{'baseline ms':>13}")
+        for stage, r in results.items():
+            b = baseline.get(stage, {}).get("wall_ms")
+            print(f"{stage:<15}{r['wall_ms']:>10.1f}{r['peak_rss_mb']:>10.1f}{r['rss_growth_mb']:>10.1f}"
+                  f"{r['output_bytes'] / 1024:>12.0f}{'' if b is None else f'{b:.1f}':>13}")
+        if not baseline:
+            print("no baseline for these parameters" + (" (saved one)" if args.save_baseline else ""))
+        for p in problems:
+            print(f"REGRESSION  {p}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Startup / rerun latency benchmark for the Streamlit app.
+
+Runs submittal_builder.py headless through streamlit.testing's AppTest:
+  - cold: first script run in a fresh interpreter (imports, page setup)
+  - rerun: repeated reruns of the same session, like widget interactions
+and checks that reportlab/PyPDF2 are not imported until Generate.
+
+    python benchmarks/bench_startup.py --reruns 30 --target-ms 150
+Exits 1 if the median rerun is slower than --target-ms.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "submittal_builder.py")
+HEAVY_MODULES = ("reportlab", "PyPDF2")
+
+
+def cold_start():
+    """First run in a fresh interpreter. Returns (seconds, heavy modules imported)."""
+    code = (
+        "import sys, time, json\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"at = AppTest.from_file({APP!r}, default_timeout=120)\n"
+        "t0 = time.perf_counter(); at.run(); dt = time.perf_counter() - t0\n"
+        "assert not at.exception, at.exception\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'seconds': dt, 'heavy': heavy}))\n"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    )
+    res = json.loads(out.stdout.strip().splitlines()[-1])
+    return res["seconds"], res["heavy"]
+
+
+def reruns(n, sections):
+    """Median/p95 seconds of n reruns with `sections` dummy sections in session state."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    at.session_state.spec_data = [
+        {"spec": f"09{i:04d} Section {i}", "product": f"Product {i}", "pdfs": []}
+        for i in range(sections)
+    ]
+    at.run()
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - t0)
+        if at.exception:
+            raise RuntimeError(at.exception)
+    times.sort()
+    return statistics.median(times), times[min(len(times) - 1, int(len(times) * 0.95))]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--reruns", type=int, default=30)
+    ap.add_argument("--sections", type=int, default=20, help="sections in session state during reruns")
+    ap.add_argument("--target-ms", type=float, default=150.0, help="median rerun budget")
+    ap.add_argument("--json", action="store_true", help="print one JSON object instead of text")
+    args = ap.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    cold_s, heavy = cold_start()
+    med_s, p95_s = reruns(args.reruns, args.sections)
+    result = {
+        "cold_ms": round(cold_s * 1000, 1),
+        "rerun_median_ms": round(med_s * 1000, 1),
+        "rerun_p95_ms": round(p95_s * 1000, 1),
+        "heavy_imports_before_generate": heavy,
+        "target_ms": args.target_ms,
+        "sections": args.sections,
+    }
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"cold start:     {result['cold_ms']:8.1f} ms")
+        print(f"rerun median:   {result['rerun_median_ms']:8.1f} ms  (p95 {result['rerun_p95_ms']:.1f} ms, "
+              f"{args.sections} sections, target {args.target_ms:.0f} ms)")
+        print(f"PDF libs loaded before Generate: {', '.join(heavy) or 'none'}")
+    return 0 if result["rerun_median_ms"] <= args.target_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
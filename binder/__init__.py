@@ -0,0 +1 @@
+"""Binder-building engine for the Wiljo Submittal Builder."""
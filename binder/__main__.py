@@ -0,0 +1,3 @@
+from binder.cli import cli
+
+cli(prog_name="python -m binder")
@@ -0,0 +1,115 @@
+# binder/binder_cache.py — finished binders on disk, keyed by a hash of their inputs
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from binder.incremental import section_key
+from binder.resources import resource_path
+
+BINDER_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".wiljo_submittals", "binders")
+# Total size of cached binders; least recently used ones go first past this.
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Bump when build_binder's output changes for the same inputs, so old binders are not served.
+BINDER_FORMAT_VERSION = 3
+
+
+def binder_key(binder_fields, sections, ref_key, combine_covers=True, compact=None,
+               outline=False, toc=False, stamp=False) -> str:
+    """
+    Hash of everything a finished binder depends on: cover fields, section
+    order and every section_key (spec/product text, attachment content,
+    page selections, highlights, cover fonts and compact settings), the
+    outline/TOC/stamp options, plus the logo file and BINDER_FORMAT_VERSION.
+    """
+    try:
+        st_ = os.stat(resource_path("wiljo_logo.png"))
+        logo = [st_.st_size, int(st_.st_mtime)]
+    except OSError:
+        logo = None
+    payload = {
+        "version": BINDER_FORMAT_VERSION,
+        "cover": sorted((k, str(v or "").strip()) for k, v in binder_fields.items()),
+        "sections": [section_key(entry, ref_key, combine_covers, compact) for entry in sections],
+        "logo": logo,
+        "outline": bool(outline),
+        "toc": bool(toc),
+        "stamp": bool(stamp),
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+class BinderCache:
+    """
+    Finished binder PDFs under `root`, one file per binder_key plus a small
+    JSON sidecar (compact report, highlight counts, ...). A hit has the same
+    pages, covers and embedded resources a rebuild would produce; builds are
+    deterministic, but one cached from an incremental build with stamps or
+    compacting can lay out its objects differently, so its bytes may differ.
+    Total size is capped at max_bytes by least-recent use (file mtime).
+    """
+
+    def __init__(self, root=BINDER_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path(self, key) -> str:
+        return os.path.join(self.root, f"{key}.pdf")
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def get(self, key):
+        """(path, meta) of the cached binder for `key`, or None."""
+        path = self.path(key)
+        try:
+            with open(f"{path[:-4]}.json", encoding="utf-8") as fh:
+                meta = json.load(fh)
+            os.utime(path)  # eviction goes by last use
+        except (OSError, ValueError):
+            return None
+        return path, meta
+
+    def put(self, key, source_path, meta=None):
+        """Copy the binder at `source_path` into the cache; returns its cached path."""
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+        shutil.copyfile(source_path, tmp)
+        os.replace(tmp, path)
+        # The sidecar goes last: get() only trusts entries that have one
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(meta or {}, fh, default=str)
+        os.replace(tmp, f"{path[:-4]}.json")
+        self.evict()
+        return path
+
+    def remove(self, key):
+        for p in (self.path(key), f"{self.path(key)[:-4]}.json"):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    def evict(self):
+        """Drop least recently used binders until the cache is under max_bytes."""
+        with self._lock:
+            try:
+                entries = [e for e in os.scandir(self.root) if e.name.endswith(".pdf")]
+            except OSError:
+                return
+            stats = sorted((e.stat().st_mtime, e.stat().st_size, e.name[:-4]) for e in entries)
+            total = sum(size for _, size, _ in stats)
+            for _, size, key in stats:
+                if total <= self.max_bytes:
+                    break
+                self.remove(key)
+                total -= size
+
+
+# Shared by all sessions in this server process (and by CLI runs on this machine)
+binder_cache = BinderCache()
@@ -0,0 +1,313 @@
+# binder/blobs.py — content-addressed attachment store
+
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+import weakref
+from collections import Counter, OrderedDict
+
+# Per-session bytes kept in RAM before the least-recently-used blobs spill to disk.
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+# Cap for the shared spill directory; trimmed by LRU whenever a session ends.
+SPILL_DISK_LIMIT = 2 * 1024 * 1024 * 1024
+SPILL_DIR = os.path.join(tempfile.gettempdir(), "wiljo_blobs")
+
+# Spilled files are shared by every session in this process (same hash, same file).
+_spill_lock = threading.Lock()
+_spill_refs = Counter()
+
+
+def blob_id_for(data) -> str:
+    """Content hash used as the blob ID."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _spill_path(spill_dir, blob_id):
+    return os.path.join(spill_dir, f"{blob_id}.pdf")
+
+
+def trim_spill_dir(spill_dir=SPILL_DIR, limit=SPILL_DISK_LIMIT):
+    """
+    Delete unreferenced spill files, least recently used first,
+    until the directory is under `limit` bytes.
+    """
+    with _spill_lock:
+        try:
+            names = [n for n in os.listdir(spill_dir) if n.endswith(".pdf")]
+        except OSError:
+            return
+        files = []
+        total = 0
+        for n in names:
+            p = os.path.join(spill_dir, n)
+            try:
+                st_ = os.stat(p)
+            except OSError:
+                continue
+            files.append((st_.st_mtime, st_.st_size, n[:-4], p))
+            total += st_.st_size
+        for _, size, blob_id, p in sorted(files):
+            if total <= limit:
+                break
+            if _spill_refs.get(blob_id):
+                continue
+            try:
+                os.remove(p)
+                total -= size
+            except OSError:
+                pass
+
+
+def _release_spilled(blob_ids, spill_dir, limit, releases):
+    """Session-end hook: drop this session's references (spilled and borrowed files), then trim the spill dir."""
+    for release in list(releases.values()):
+        release()
+    releases.clear()
+    with _spill_lock:
+        for b in blob_ids:
+            _spill_refs[b] -= 1
+            if _spill_refs[b] <= 0:
+                del _spill_refs[b]
+        blob_ids.clear()
+    trim_spill_dir(spill_dir, limit)
+
+
+class BlobStore:
+    """
+    Per-session store of attachment bytes keyed by SHA-256.
+
+    Sections keep only {"name", "blob", "size"}; the same catalog attached to
+    several sections is stored once. When the in-memory total goes over
+    `memory_budget`, the least-recently-used blobs move to the shared spill
+    directory and are served from an mmap instead. Blobs added with
+    put_lazy (e.g. from a project bundle) are only read when first needed.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, spill_dir=SPILL_DIR,
+                 spill_limit=SPILL_DISK_LIMIT):
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self._lock = threading.RLock()
+        self._mem = OrderedDict()   # blob_id -> bytes (LRU order)
+        self._mem_bytes = 0
+        self._sizes = {}            # blob_id -> size, for every blob we hold
+        self._maps = {}             # blob_id -> mmap of a spilled blob
+        self._spilled = set()
+        self._files = {}            # blob_id -> path of a file owned by someone else (library)
+        self._lazy = {}             # blob_id -> callable returning its bytes, not read yet
+        self._releases = {}         # blob_id -> callable handing a _files entry back to its owner
+        self._finalizer = weakref.finalize(self, _release_spilled, self._spilled, spill_dir, spill_limit,
+                                           self._releases)
+
+    # ---- queries ----
+    def __contains__(self, blob_id):
+        return blob_id in self._sizes
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def is_loaded(self, blob_id) -> bool:
+        """True when the blob's bytes are at hand (False for a put_lazy blob not read yet)."""
+        return blob_id in self._sizes and blob_id not in self._lazy
+
+    def size(self, blob_id) -> int:
+        return self._sizes[blob_id]
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._mem_bytes
+
+    # ---- writes ----
+    def put(self, data) -> str:
+        """Store `data` (bytes-like) and return its blob ID. Duplicates are free."""
+        blob_id = blob_id_for(data)
+        with self._lock:
+            if blob_id in self._sizes and blob_id not in self._lazy:
+                self._touch(blob_id)
+                return blob_id
+            self._lazy.pop(blob_id, None)  # the bytes are here now; no need to load them
+            data = bytes(data) if not isinstance(data, bytes) else data
+            self._sizes[blob_id] = len(data)
+            self._mem[blob_id] = data
+            self._mem_bytes += len(data)
+            self._enforce_budget()
+        return blob_id
+
+    def put_file(self, blob_id, path, size, release=None) -> str:
+        """
+        Serve an existing file (e.g. from the product library) as `blob_id`
+        without copying it; it is read through an mmap like a spilled blob.
+        `release()` is called once the store stops serving the file (discard,
+        close or session end), e.g. to unpin it (see ProductLibrary.pin); at
+        once if `blob_id` is held already.
+        """
+        with self._lock:
+            if blob_id not in self._sizes:
+                self._sizes[blob_id] = size
+                self._files[blob_id] = path
+                if release is not None:
+                    self._releases[blob_id] = release
+                return blob_id
+        if release is not None:
+            release()
+        return blob_id
+
+    def put_lazy(self, blob_id, size, load) -> str:
+        """
+        Hold `blob_id` without its bytes: load() is called (once) the first
+        time the blob is read, and must return bytes hashing to `blob_id`.
+        """
+        with self._lock:
+            if blob_id not in self._sizes:
+                self._sizes[blob_id] = size
+                self._lazy[blob_id] = load
+        return blob_id
+
+    @property
+    def unloaded(self) -> int:
+        """Blobs added with put_lazy that have not been read yet."""
+        return len(self._lazy)
+
+    def get(self, blob_id):
+        """Return a read-only buffer (bytes or mmap) for `blob_id`."""
+        with self._lock:
+            if blob_id in self._lazy:
+                self._load(blob_id)
+            if blob_id in self._mem:
+                self._mem.move_to_end(blob_id)
+                return self._mem[blob_id]
+            if blob_id in self._spilled or blob_id in self._files:
+                return self._map(blob_id)
+        raise KeyError(blob_id)
+
+    def path(self, blob_id) -> str:
+        """
+        Path of the blob on disk, for readers in other processes. A blob held
+        only in memory is written to the spill directory (and stays in memory).
+        """
+        with self._lock:
+            if blob_id in self._lazy:
+                self._load(blob_id)
+            if blob_id in self._files:
+                return self._files[blob_id]
+            if blob_id in self._mem and blob_id not in self._spilled:
+                self._spill(blob_id, self._mem[blob_id])
+            elif blob_id not in self._spilled:
+                raise KeyError(blob_id)
+            path = _spill_path(self.spill_dir, blob_id)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return path
+
+    def discard(self, blob_id):
+        """Forget one blob (its spill file is left for the shared LRU trim)."""
+        with self._lock:
+            data = self._mem.pop(blob_id, None)
+            if data is not None:
+                self._mem_bytes -= len(data)
+            mm = self._maps.pop(blob_id, None)
+            if mm is not None:
+                try:
+                    mm.close()
+                except BufferError:
+                    pass  # still being read; the map goes away with its last view
+            if blob_id in self._spilled:
+                self._spilled.discard(blob_id)
+                with _spill_lock:
+                    _spill_refs[blob_id] -= 1
+                    if _spill_refs[blob_id] <= 0:
+                        del _spill_refs[blob_id]
+            self._files.pop(blob_id, None)
+            self._lazy.pop(blob_id, None)
+            self._sizes.pop(blob_id, None)
+            release = self._releases.pop(blob_id, None)
+        if release is not None:
+            release()
+
+    def gc(self, live_ids):
+        """Drop every blob that no section references any more."""
+        live = set(live_ids)
+        with self._lock:
+            for blob_id in [b for b in self._sizes if b not in live]:
+                self.discard(blob_id)
+
+    def close(self):
+        """Release everything now instead of waiting for the session to be collected."""
+        with self._lock:
+            for mm in self._maps.values():
+                try:
+                    mm.close()
+                except BufferError:
+                    pass
+            self._maps.clear()
+            self._mem.clear()
+            self._mem_bytes = 0
+            self._files.clear()
+            self._lazy.clear()
+            self._sizes.clear()
+        self._finalizer()
+
+    # ---- internals ----
+    def _load(self, blob_id):
+        data = self._lazy[blob_id]()
+        if blob_id_for(data) != blob_id:
+            raise ValueError(f"blob {blob_id[:12]}… loaded with different content")
+        del self._lazy[blob_id]
+        self._sizes[blob_id] = len(data)
+        self._mem[blob_id] = data
+        self._mem_bytes += len(data)
+        self._enforce_budget()
+
+    def _touch(self, blob_id):
+        if blob_id in self._mem:
+            self._mem.move_to_end(blob_id)
+        else:
+            try:
+                os.utime(_spill_path(self.spill_dir, blob_id))
+            except OSError:
+                pass
+
+    def _enforce_budget(self):
+        while self._mem_bytes > self.memory_budget and self._mem:
+            blob_id, data = self._mem.popitem(last=False)
+            try:
+                self._spill(blob_id, data)
+            except OSError:
+                # Disk unavailable: keep it in memory rather than lose it
+                self._mem[blob_id] = data
+                self._mem.move_to_end(blob_id, last=False)
+                return
+            self._mem_bytes -= len(data)
+
+    def _spill(self, blob_id, data):
+        if blob_id in self._spilled:
+            return  # already on disk (written earlier by path())
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = _spill_path(self.spill_dir, blob_id)
+        with _spill_lock:
+            if os.path.exists(path) and os.path.getsize(path) == len(data):
+                os.utime(path)
+            else:
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+                with open(tmp, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+            _spill_refs[blob_id] += 1
+        self._spilled.add(blob_id)
+
+    def _map(self, blob_id):
+        mm = self._maps.get(blob_id)
+        if mm is None or mm.closed:
+            path = self._files.get(blob_id) or _spill_path(self.spill_dir, blob_id)
+            with open(path, "rb") as fh:
+                mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[blob_id] = mm
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return mm
@@ -0,0 +1,452 @@
+# binder/build.py — assemble a full submittal binder (no Streamlit)
+
+import mmap
+import os
+import shutil
+import time
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import NameObject
+
+from binder.compact import compact as compact_writer
+from binder.covers import cached_cover_set, cached_section_cover, generate_binder_cover
+from binder.highlight import add_highlights
+from binder.incremental import BuildState, section_key
+from binder.merge import BinderMerger, open_pdf
+from binder.names import page_selection, recipient_fields
+from binder.profile import BuildProfile, buffer_size
+from binder.stamp import PageStamper, stamp_label, strip_stamp
+
+
+def map_file(path):
+    """Read-only mmap of a PDF on disk (caller closes it)."""
+    with open(path, "rb") as fh:
+        return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _CoverLengthChanged(Exception):
+    """The TOC, re-rendered with the real section sizes, no longer fits the cover's pages."""
+
+
+def build_binder(binder_fields, sections, load_pdf, combine_covers=True, out=None,
+                 state=None, ref_key=None, compact=None, report=None, progress=None,
+                 profile=None, highlight=None, outline=False, toc=False, page_count=None, stamp=False):
+    """
+    Merge the binder cover, each section cover and each section's attachments.
+
+    - binder_fields: dict with the names.BINDER_FIELDS keys.
+    - sections: list of {"spec", "product", "pdfs": [ref, ...]}, optionally
+      with "highlights": [search term, ...] (see `highlight`).
+    - load_pdf(ref): returns a bytes-like buffer (or file object) for one attachment.
+      A ref that is a dict may carry "pages", a selection like "1-3, 7"
+      (see names.page_selection); only those pages are copied.
+    - out: open binary file to write to; when None a rewound spooled file is returned.
+    - state / ref_key: pass a BuildState and a function giving each attachment
+      ref a stable identity to rebuild incrementally. Sections whose content
+      hash matches the previous build have their attachment pages copied from
+      it by page range; only new or changed sections' attachments are read.
+      Every cover comes from this build's render, so cover fonts and the logo
+      are embedded once however the binder was edited. With a state the
+      output is always spooled and is owned by the state (do not close it).
+    - compact: dict of compact.compact() options (e.g. {"max_dpi": 150}) to
+      dedupe, recompress and downsample the merged binder before writing.
+    - report: optional dict; when compacting it receives the per-section
+      before/after sizes from compact.compact(), and with `highlight` a
+      "highlights" list of {"section", "term", "matches"}.
+    - highlight: optional highlight(ref, terms, page_indexes) returning
+      ({attachment page index: {term: [rect, ...]}}, {term: count}) for the
+      given pages (None: the ref's own selection), e.g. from
+      textindex.make_highlighter. Pages of sections with "highlights" get a
+      highlight annotation over every match.
+    - progress: optional progress(done, total, pages, stage) callback, called
+      per cover stage, per attachment and per section. It may raise to abort
+      the build; nothing is written and the state is left as it was.
+    - profile: optional BuildProfile; receives time, pages, bytes and peak
+      memory for each stage (plan, covers, merge, highlight, compact, write)
+      and each attachment read.
+    - outline: add a bookmark per section (on its cover page) with one child
+      per attachment. The attachments' own bookmarks are left out.
+    - toc: print each section's binder page number in the binder cover's
+      section list, making it a table of contents.
+    - stamp: stamp every page with "Section X – Page n of m" (section pages)
+      and "Binder page k of N", as each part is merged (see stamp.PageStamper).
+    - page_count(ref): optional page count of a whole attachment, or None
+      (e.g. from the upload-time preflight index). Outline, TOC and stamp
+      page numbers are planned from these before anything is merged;
+      attachments without a known count are opened once up front and that
+      reader is the one merged, so nothing is parsed twice. Wrong counts are
+      corrected after merging; should the corrected TOC change the binder
+      cover's length, the build runs once more without page_count.
+    """
+    options = dict(combine_covers=combine_covers, out=out, state=state, ref_key=ref_key, compact=compact,
+                   report=report, progress=progress, profile=profile, highlight=highlight, outline=outline,
+                   toc=toc, stamp=stamp)
+    try:
+        return _build_binder(binder_fields, sections, load_pdf, page_count=page_count, **options)
+    except _CoverLengthChanged:
+        # A planned page count was wrong and the corrected TOC changed how many pages
+        # the binder cover takes, moving every page after it. Plan again from the
+        # attachments themselves: with exact sizes the first cover render holds.
+        return _build_binder(binder_fields, sections, load_pdf, page_count=None, **options)
+
+
+def _build_binder(binder_fields, sections, load_pdf, combine_covers, out, state, ref_key, compact, report,
+                  progress, profile, highlight, outline, toc, page_count, stamp):
+    total = len(sections)
+    report_progress = progress or (lambda *a, **k: None)
+    prof = profile if profile is not None else BuildProfile()
+    report_progress(0, total, 0, "covers")
+
+    keys = None
+    prev = None
+    with prof.stage("plan") as rec:
+        if state is not None:
+            keys = [section_key(entry, ref_key or repr, combine_covers, compact, outline) for entry in sections]
+            prev = state.reader()
+        stale = [i for i in range(len(sections))
+                 if prev is None or state.range_for(keys[i]) is None]
+        stale_set = set(stale)
+        readers = {}  # (section, attachment) -> (buffer, reader) opened early for a page count
+        counts = sizes = None
+        if outline or toc or stamp:
+            counts = _attachment_pages(sections, stale_set, load_pdf, page_count, readers)
+            sizes = [_section_pages(counts[i]) if i in stale_set else _range_len(state.range_for(keys[i]))
+                     for i in range(len(sections))]
+            for i, row in enumerate(counts):
+                # A reused section's size is known, so one missing count follows from the others
+                if i not in stale_set and row.count(None) == 1:
+                    row[row.index(None)] = sizes[i] - 1 - sum(n for n in row if n is not None)
+        rec["pages"] = len(prev.pages) if prev is not None else 0
+
+    ranges = {}
+    groups = []
+    to_highlight = []  # (label, terms, ref, selection or None, first output page or None if reused)
+    with BinderMerger() as merger:
+        with prof.stage("covers") as rec:
+            # Every section cover, reused sections' too: a cover page copied from the
+            # last build would bring that build's copy of the cover fonts and logo
+            covers, binder_pages, section_pages, rec["bytes_out"] = _render_covers(
+                binder_fields, sections, combine_covers, range(len(sections)), sizes if toc else None
+            )
+            merger.append(covers, pages=binder_pages)
+            rec["pages"] = merger.page_count
+        groups.append(("Binder cover", (0, merger.page_count)))
+        stamper = None
+        if stamp:
+            stamper = PageStamper(merger.writer, merger.page_count + sum(sizes))
+            _stamp_pages(stamper, 0, merger.page_count)
+
+        with prof.stage("merge") as rec:
+            bytes_in = 0
+            for i, entry in enumerate(sections):
+                label = entry.get("spec") or f"Section {i + 1}"
+                start = merger.page_count
+                attachment_starts = []
+                if combine_covers:
+                    merger.append(covers, pages=(section_pages[i], section_pages[i] + 1))
+                else:
+                    merger.append(cached_section_cover(entry["spec"], entry["product"]))
+                if i not in stale_set:
+                    t0 = time.perf_counter()
+                    # Built with the same outline setting (it is part of the key): with
+                    # outline its section bookmarks are rebuilt below, without it the
+                    # attachments' own bookmarks come along
+                    first, stop = state.range_for(keys[i])
+                    pages = merger.append(prev, pages=(first + 1, stop), import_outline=not outline)
+                    if counts is not None and None not in counts[i]:
+                        first = start + 1
+                        for ref, n in zip(entry.get("pdfs", []), counts[i]):
+                            attachment_starts.append((ref, first))
+                            first += n
+                    prof.add_file(label, "(reused from last build)", time.perf_counter() - t0, None, pages)
+                    # Highlights came along with the pages; only their counts are looked up
+                    for ref in entry.get("pdfs", []) if entry.get("highlights") else ():
+                        to_highlight.append((label, entry["highlights"], ref, None, None))
+                    if stamper is None:
+                        # The previous build may have been stamped
+                        for index in range(start + 1, merger.page_count):
+                            strip_stamp(merger.writer, merger.writer.pages[index])
+                else:
+                    for k, ref in enumerate(entry.get("pdfs", [])):
+                        t0 = time.perf_counter()
+                        buf, reader = readers.pop((i, k), (None, None))
+                        if reader is None:
+                            buf = load_pdf(ref)
+                            reader = open_pdf(buf)
+                        # Only the selected pages (and what they reference) are copied
+                        selection = page_selection(_ref_pages(ref), len(reader.pages))
+                        if entry.get("highlights"):
+                            to_highlight.append((label, entry["highlights"], ref,
+                                                 selection or list(range(len(reader.pages))), merger.page_count))
+                        attachment_starts.append((ref, merger.page_count))
+                        pages = merger.append(reader, pages=selection, import_outline=not outline)
+                        size = buffer_size(buf)
+                        bytes_in += size or 0
+                        prof.add_file(label, _ref_name(ref), time.perf_counter() - t0, size, pages)
+                        report_progress(i, total, merger.page_count, "sections")
+                if stamper is not None:
+                    _stamp_pages(stamper, start, merger.page_count, stamp_label(entry.get("spec")))
+                if outline and merger.page_count > start:
+                    product = (entry.get("product") or "").strip()
+                    parent = merger.writer.add_outline_item(f"{label} — {product}" if product else label, start)
+                    for ref, first in attachment_starts:
+                        if first < merger.page_count:
+                            merger.writer.add_outline_item(_ref_name(ref), first, parent=parent)
+                if keys is not None:
+                    ranges[keys[i]] = (start, merger.page_count)
+                groups.append((label, (start, merger.page_count)))
+                report_progress(i + 1, total, merger.page_count, "sections")
+            rec["pages"] = merger.page_count
+            rec["bytes_in"] = bytes_in
+            actual = [_range_len(r) for _, r in groups[1:]]
+            if toc and actual != sizes:
+                # A planned page count was off: render the TOC again from the real section sizes
+                covers, new_pages, _, _ = _render_covers(binder_fields, sections, combine_covers, (), actual)
+                cover_count = groups[0][1][1]
+                if _range_len(new_pages) != cover_count:
+                    if page_count is None:  # the sizes were exact; cannot happen
+                        raise RuntimeError("the binder cover's page count changed after merging")
+                    raise _CoverLengthChanged()
+                for index in range(cover_count):
+                    _swap_page_content(merger.writer, index, covers.pages[new_pages[0] + index])
+                if stamper is not None:
+                    _stamp_pages(stamper, 0, cover_count)
+            if stamper is not None and stamper.total != merger.page_count:
+                # A planned page count was off: "of N" is rewritten in place
+                stamper.total = merger.page_count
+                _stamp_pages(stamper, 0, groups[0][1][1])
+                for (_, (start, stop)), entry in zip(groups[1:], sections):
+                    _stamp_pages(stamper, start, stop, stamp_label(entry.get("spec")))
+
+        if highlight is not None and to_highlight:
+            report_progress(total, total, merger.page_count, "highlight")
+            with prof.stage("highlight") as rec:
+                found = _apply_highlights(merger.writer, to_highlight, highlight)
+                rec["pages"] = merger.page_count
+            if report is not None:
+                report["highlights"] = found
+
+        if compact is not None:
+            report_progress(total, total, merger.page_count, "compact")
+            with prof.stage("compact") as rec:
+                result = compact_writer(merger.writer, groups, **compact)
+                rec["pages"] = merger.page_count
+                rec["bytes_in"] = sum(r["before"] for r in result["sections"])
+                rec["bytes_out"] = sum(r["after"] for r in result["sections"])
+            if report is not None:
+                report.update(result)
+
+        report_progress(total, total, merger.page_count, "write")
+        with prof.stage("write") as rec:
+            rec["pages"] = merger.page_count
+            if state is not None or out is None:
+                output = merger.write_spooled()
+            else:
+                merger.write(out)
+                output = out
+            rec["bytes_out"] = buffer_size(output)
+        if state is not None:
+            state.replace(output, ranges, {"reused": len(sections) - len(stale), "rendered": len(stale)})
+        return output
+
+
+def build_for_recipients(binder_fields, recipients, sections, load_pdf, outs=None, state=None, ref_key=None,
+                         progress=None, profile=None, **options):
+    """
+    The same binder addressed to several recipients. Each recipient is a dict
+    of names.RECIPIENT_FIELDS replacing the "To:" block of binder_fields.
+    The first binder is built with build_binder (all `options` apply); every
+    other one is that binder with only its binder cover re-rendered (see
+    readdress_binder), so sections, attachments, highlights and compacting
+    are done once for all of them.
+
+    - outs: optional list of open binary files, one per recipient; when None
+      rewound spooled files are returned.
+    - state / ref_key: as for build_binder (a private BuildState is used when
+      none is given; the first output then belongs to it, not to `outs`).
+    Returns the list of outputs, in recipient order.
+    """
+    if not recipients:
+        raise ValueError("at least one recipient is required")
+    report_progress = progress or (lambda *a, **k: None)
+    own_state = state is None
+    state = BuildState() if own_state else state
+    ref_key = ref_key or repr
+    combine_covers = options.get("combine_covers", True)
+    first = build_binder(recipient_fields(binder_fields, recipients[0]), sections, load_pdf, state=state,
+                         ref_key=ref_key, progress=progress, profile=profile, **options)
+    if outs is not None and own_state:
+        first.seek(0)
+        shutil.copyfileobj(first, outs[0])
+        first = outs[0]
+    outputs = [first]
+
+    # Every section is in the first binder; its page ranges give the body's layout
+    keys = [section_key(entry, ref_key, combine_covers, options.get("compact"), options.get("outline", False))
+            for entry in sections]
+    ranges = [state.range_for(k) for k in keys]
+    body = state.reader()
+    for n, recipient in enumerate(recipients[1:], start=1):
+        report_progress(len(sections), len(sections), len(body.pages), "readdress")
+        outputs.append(readdress_binder(
+            body, recipient_fields(binder_fields, recipient), sections,
+            cover_pages=min((r[0] for r in ranges), default=len(body.pages)),  # a cover-only binder: all of it
+            section_sizes=[_range_len(r) for r in ranges],
+            combine_covers=combine_covers, toc=options.get("toc", False), stamp=options.get("stamp", False),
+            out=outs[n] if outs is not None else None, profile=profile,
+        ))
+    return outputs
+
+
+def readdress_binder(binder, binder_fields, sections, cover_pages, section_sizes, combine_covers=True,
+                     toc=False, stamp=False, out=None, profile=None):
+    """
+    Copy of a finished binder with a new binder cover rendered from
+    `binder_fields`; everything after its first `cover_pages` pages is copied
+    as it is (bookmarks included, highlights and compacting already applied).
+    `binder` is a buffer, file object or PdfReader; `section_sizes` gives
+    each section's page count, for the TOC numbers when toc=True and the
+    page stamps when stamp=True (the binder was built with stamp=True).
+    Writes to `out`, or returns a rewound spooled file when None.
+    """
+    prof = profile if profile is not None else BuildProfile()
+    with prof.stage("readdress") as rec:
+        reader = binder if isinstance(binder, PdfReader) else open_pdf(binder)
+        covers, binder_pages, _, rec["bytes_in"] = _render_covers(
+            binder_fields, sections, combine_covers, (), section_sizes if toc else None
+        )
+        with BinderMerger() as merger:
+            merger.append(covers, pages=binder_pages)
+            merger.append(reader, pages=(cover_pages, len(reader.pages)))
+            rec["pages"] = merger.page_count
+            if stamp:
+                new_cover_pages = binder_pages[1] - binder_pages[0]
+                stamper = PageStamper(merger.writer, merger.page_count)
+                _stamp_pages(stamper, 0, new_cover_pages)
+                if new_cover_pages != cover_pages:
+                    # Every binder page number moved
+                    start = new_cover_pages
+                    for entry, size in zip(sections, section_sizes):
+                        _stamp_pages(stamper, start, start + size, stamp_label(entry.get("spec")))
+                        start += size
+            if out is None:
+                out = merger.write_spooled()
+            else:
+                merger.write(out)
+        rec["bytes_out"] = buffer_size(out)
+    return out
+
+
+def _swap_page_content(writer, index, page):
+    """Give writer page `index` the content and resources of `page` (from another document), in place."""
+    target = writer.pages[index]
+    for key in ("/Contents", "/Resources"):
+        if key in page:
+            target[NameObject(key)] = page.raw_get(key).clone(writer)
+        elif key in target:
+            del target[key]
+
+
+def _stamp_pages(stamper, start, stop, label=None):
+    """Stamp writer pages start..stop-1: one section's (with its label) or the binder cover's."""
+    pages = stamper.writer.pages
+    for index in range(start, stop):
+        stamper.stamp(pages[index], index + 1, label, index - start + 1, stop - start)
+
+
+def _render_covers(binder_fields, sections, combine_covers, cover_indexes, sizes=None):
+    """
+    (covers reader, binder cover page range, section cover pages or None,
+    bytes rendered). With combine_covers the section covers for
+    `cover_indexes` come in the same document; otherwise only the binder
+    cover is rendered. `sizes` (pages per section) turns the section list
+    into a table of contents.
+    """
+    # TOC numbers depend on how many pages the binder cover itself takes;
+    # re-render (covers only, cheap) until the guess holds.
+    cover_count = 1
+    for _ in range(3):
+        numbers = _toc_numbers(sizes, cover_count) if sizes is not None else None
+        if combine_covers:
+            # One cover document; each cover page is taken from it by index
+            buf, binder_pages, section_pages = cached_cover_set(
+                binder_fields, sections, cover_indexes=cover_indexes, page_numbers=numbers
+            )
+            covers = open_pdf(buf.getbuffer())
+        else:
+            buf = generate_binder_cover(sections=sections, page_numbers=numbers, **binder_fields)
+            covers, section_pages = open_pdf(buf.getbuffer()), None
+            binder_pages = (0, len(covers.pages))
+        rendered = binder_pages[1] - binder_pages[0]
+        if numbers is None or rendered == cover_count:
+            break
+        cover_count = rendered
+    return covers, binder_pages, section_pages, buf.getbuffer().nbytes
+
+
+def _attachment_pages(sections, stale, load_pdf, page_count, readers):
+    """
+    Pages each attachment adds (after its page selection), per section; None
+    where unknown. Counts come from page_count(ref) when given; attachments of
+    sections being rendered are otherwise opened here, and their readers
+    kept in `readers` for the merge.
+    """
+    counts = []
+    for i, entry in enumerate(sections):
+        row = []
+        for k, ref in enumerate(entry.get("pdfs", [])):
+            n = page_count(ref) if page_count is not None else None
+            if n is None and i in stale:
+                buf = load_pdf(ref)
+                readers[(i, k)] = (buf, open_pdf(buf))
+                n = len(readers[(i, k)][1].pages)
+            if n is not None:
+                selection = page_selection(_ref_pages(ref), n)
+                n = n if selection is None else len(selection)
+            row.append(n)
+        counts.append(row)
+    return counts
+
+
+def _section_pages(row):
+    """Cover page plus attachment pages, or None if a count is unknown."""
+    return None if None in row else 1 + sum(row)
+
+
+def _range_len(page_range):
+    return page_range[1] - page_range[0]
+
+
+def _toc_numbers(sizes, cover_count):
+    """1-based binder page of each section's cover (None after an unknown size)."""
+    numbers, page = [], cover_count + 1
+    for size in sizes:
+        numbers.append(page)
+        page = None if page is None or size is None else page + size
+    return numbers
+
+
+def _apply_highlights(writer, to_highlight, highlight):
+    """Annotate the matches of each section's terms; returns [{"section", "term", "matches"}]."""
+    counts = {}
+    for label, terms, ref, selection, first_page in to_highlight:
+        matches, found = highlight(ref, terms, selection)
+        for term in terms:
+            counts[(label, term)] = counts.get((label, term), 0) + found.get(term, 0)
+        if first_page is None:
+            continue
+        for offset, index in enumerate(selection):
+            for term, rects in matches.get(index, {}).items():
+                add_highlights(writer, writer.pages[first_page + offset], rects, note=term)
+    return [{"section": label, "term": term, "matches": n} for (label, term), n in counts.items()]
+
+
+def _ref_name(ref):
+    if isinstance(ref, dict):
+        name = ref.get("name") or os.path.basename(str(ref.get("path", ""))) or str(ref.get("blob", ""))[:12]
+        return f"{name} (pages {ref['pages']})" if ref.get("pages") else name
+    return os.path.basename(str(ref))
+
+
+def _ref_pages(ref):
+    return ref.get("pages") if isinstance(ref, dict) else None
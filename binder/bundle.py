@@ -0,0 +1,181 @@
+# binder/bundle.py — a whole project saved as one file: manifest + deduplicated PDF blobs
+
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import weakref
+import zipfile
+
+from binder.names import RECIPIENT_FIELDS
+
+BUNDLE_FORMAT = "wiljo-project"
+BUNDLE_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+COVER_FIELDS = ("project", "submitter_name") + RECIPIENT_FIELDS
+# Fixed member timestamps: the same project always saves to the same bytes
+_ZIP_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+class BundleError(ValueError):
+    """Raised when a file is not a project bundle, or its manifest and blobs disagree."""
+
+
+def blob_member(blob_id):
+    return f"blobs/{blob_id}.pdf"
+
+
+def write_bundle(out, cover, date, sections, load_blob, recipients=(), infos=None):
+    """
+    Write a project bundle (a zip) to the file object `out`.
+
+    manifest.json has the cover fields, extra recipients and sections in the
+    batch manifest layout (see manifest.load_manifest), so an unzipped bundle
+    builds with `python -m binder build`. Each attachment is stored once, as
+    blobs/<sha256>.pdf, however many sections use it; `load_blob(blob_id)`
+    supplies its bytes. `infos` ({blob_id: preflight info}) and the page
+    counts from them are saved with the blobs, so a reopened project needs
+    no re-check.
+    """
+    infos = infos or {}
+    blobs = {}
+    manifest_sections = []
+    for entry in sections:
+        pdfs = []
+        for ref in entry.get("pdfs", []):
+            pdf = {"path": blob_member(ref["blob"]), "name": ref["name"]}
+            if ref.get("pages"):
+                pdf["pages"] = ref["pages"]
+            pdfs.append(pdf)
+            info = infos.get(ref["blob"])
+            blobs[ref["blob"]] = {"size": ref["size"], "pages": info["pages"] if info else None, "info": info}
+        manifest_sections.append({
+            "spec": entry.get("spec") or "",
+            "product": entry.get("product") or "",
+            "pdfs": pdfs,
+            "highlights": list(entry.get("highlights") or []),
+        })
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "cover": dict({k: cover.get(k) or "" for k in COVER_FIELDS}, date=date.isoformat()),
+        "recipients": [{k: r.get(k) or "" for k in RECIPIENT_FIELDS} for r in recipients],
+        "sections": manifest_sections,
+        "blobs": blobs,
+    }
+    with zipfile.ZipFile(out, "w") as zf:
+        info = zipfile.ZipInfo(MANIFEST_NAME, _ZIP_TIME)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        zf.writestr(info, json.dumps(manifest, indent=1, ensure_ascii=False))
+        for blob_id in blobs:
+            # Stored: PDFs are compressed already
+            info = zipfile.ZipInfo(blob_member(blob_id), _ZIP_TIME)
+            info.compress_type = zipfile.ZIP_STORED
+            with zf.open(info, "w", force_zip64=True) as fh:
+                fh.write(load_blob(blob_id))
+    return out
+
+
+def _counted_info(meta):
+    """A preflight info with just the size and page count saved for a blob, or None without a count."""
+    if not meta.get("pages"):
+        return None
+    return {"size": meta["size"], "pages": meta["pages"], "page_sizes": {}, "encrypted": False,
+            "error": None, "warnings": []}
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ProjectBundle:
+    """
+    A saved project opened for import. Only manifest.json is read up front;
+    load(blob_id) reads one attachment from the archive when it is needed.
+
+    cover       {"project", "submitter_name", "to_name", ...}
+    date        datetime.date
+    recipients  [{"to_name", "to_company", "to_addr1", "to_addr2"}, ...]
+    sections    [{"spec", "product", "pdfs": [{"name", "blob", "size"[, "pages"]}], "highlights"}]
+    infos       {blob_id: preflight info saved with the project (or one from its
+                page count), or None}
+    sizes       {blob_id: bytes}
+    """
+
+    def __init__(self, path, owned=False):
+        self.path = path
+        if owned:
+            # The archive lives as long as something can still load from it
+            weakref.finalize(self, _remove, path)
+        try:
+            with zipfile.ZipFile(path) as zf:
+                manifest = json.loads(zf.read(MANIFEST_NAME).decode("utf-8"))
+                members = {i.filename: i.file_size for i in zf.infolist()}
+        except (zipfile.BadZipFile, KeyError, UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise BundleError(f"not a project file ({e})") from None
+        if manifest.get("format") != BUNDLE_FORMAT:
+            raise BundleError("not a project file")
+        if manifest.get("version", 0) > BUNDLE_VERSION:
+            raise BundleError("saved by a newer version of the builder")
+
+        blobs = manifest.get("blobs") or {}
+        for blob_id, meta in blobs.items():
+            if members.get(blob_member(blob_id)) != meta.get("size"):
+                raise BundleError(f"attachment {blob_id[:12]}… is missing or truncated")
+        self.sizes = {b: meta["size"] for b, meta in blobs.items()}
+        self.infos = {b: meta.get("info") or _counted_info(meta) for b, meta in blobs.items()}
+
+        cover = manifest.get("cover") or {}
+        self.cover = {k: str(cover.get(k) or "") for k in COVER_FIELDS}
+        try:
+            self.date = datetime.date.fromisoformat(cover.get("date") or "")
+        except ValueError:
+            self.date = datetime.date.today()
+        self.recipients = [{k: str(r.get(k) or "") for k in RECIPIENT_FIELDS}
+                           for r in manifest.get("recipients") or []]
+
+        self.sections = []
+        by_member = {blob_member(b): b for b in blobs}
+        for i, sec in enumerate(manifest.get("sections") or []):
+            pdfs = []
+            for pdf in sec.get("pdfs") or []:
+                blob_id = by_member.get(pdf.get("path"))
+                if blob_id is None:
+                    raise BundleError(f"sections[{i}]: attachment {pdf.get('path')!r} is not in the file")
+                ref = {"name": pdf.get("name") or os.path.basename(pdf["path"]), "blob": blob_id,
+                       "size": self.sizes[blob_id]}
+                if pdf.get("pages"):
+                    ref["pages"] = str(pdf["pages"])
+                pdfs.append(ref)
+            self.sections.append({
+                "spec": str(sec.get("spec") or ""),
+                "product": str(sec.get("product") or ""),
+                "pdfs": pdfs,
+                "highlights": [str(t) for t in sec.get("highlights") or []],
+            })
+
+    def load(self, blob_id) -> bytes:
+        """One attachment's bytes, read from the archive."""
+        with zipfile.ZipFile(self.path) as zf:
+            return zf.read(blob_member(blob_id))
+
+
+def open_bundle(fileobj):
+    """
+    Open an uploaded project file. It is copied to a temporary file (removed
+    when the returned bundle is garbage collected) so its attachments can be
+    read later without holding the upload in memory.
+    """
+    fd, path = tempfile.mkstemp(prefix="project-", suffix=".zip")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fileobj.seek(0)
+            shutil.copyfileobj(fileobj, fh)
+        return ProjectBundle(path, owned=True)
+    except BaseException:
+        _remove(path)
+        raise
@@ -0,0 +1,245 @@
+# binder/cli.py — headless batch builds: python -m binder build MANIFEST...
+
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import click
+
+from binder.binder_cache import binder_cache, binder_key
+from binder.blobs import blob_id_for
+from binder.build import build_binder, build_for_recipients, map_file
+from binder.manifest import ManifestError, load_manifest
+from binder.merge import open_pdf
+from binder.names import RECIPIENT_FIELDS, recipient_filenames, sanitize_filename
+from binder.profile import BuildProfile, log_profile
+from binder.textindex import make_highlighter, text_index
+from binder.volumes import estimate_section_bytes, plan_volumes, volume_fields, volume_filename
+
+
+def _ref_path(ref):
+    return ref["path"] if isinstance(ref, dict) else ref
+
+
+def _page_count(path):
+    """Pages in a PDF file, or None if it cannot be read."""
+    try:
+        mm = map_file(path)
+    except OSError:
+        return None
+    reader = None
+    try:
+        reader = open_pdf(mm)
+        return len(reader.pages)
+    except Exception:
+        return None
+    finally:
+        if reader is not None:
+            reader.stream.close()  # release its view of the map
+        mm.close()
+
+
+def plan_manifest_volumes(manifest_path, max_bytes):
+    """
+    Section indexes of each volume of a manifest's binder, sized from the
+    attachment files (scaled by their page selections, as the app does).
+    """
+    manifest = load_manifest(manifest_path)
+    counts = {}
+
+    def pages_of(ref):
+        path = _ref_path(ref)
+        if path not in counts:
+            counts[path] = _page_count(path)
+        return counts[path]
+
+    sizes = [estimate_section_bytes(entry, lambda ref: os.path.getsize(_ref_path(ref)), pages_of)
+             for entry in manifest["sections"]]
+    return plan_volumes(sizes, max_bytes)
+
+
+def build_from_manifest(manifest_path, out_dir, combine_covers=True, compact=None, profile=False,
+                        volume=None, cache=True, outline=True, toc=False, stamp=False):
+    """
+    Build one binder from a manifest file. Returns (output_path, size_bytes, seconds).
+    When the manifest lists recipients, one binder per recipient (the cover's
+    first) is written, named after each; output_path is then the list of
+    paths and size_bytes their total.
+    With profile=True a JSON build profile line is logged to stderr.
+    outline / toc / stamp: section bookmarks, TOC page numbers and page
+    stamps (see build_binder).
+    volume=(number, total, section_indexes) builds just that volume of a split binder.
+    With cache=True a binder built before from the same inputs is copied
+    from the binder cache instead of being rebuilt.
+    """
+    t0 = time.perf_counter()
+    manifest = load_manifest(manifest_path)
+    binder_fields, sections = manifest["binder_fields"], manifest["sections"]
+    file_name = sanitize_filename(manifest["output"])
+    if volume is not None:
+        number, total, indexes = volume
+        binder_fields = volume_fields(binder_fields, number, total)
+        sections = [sections[i] for i in indexes]
+        file_name = volume_filename(file_name, number, total)
+    recipients = manifest["recipients"]
+    if recipients:
+        recipients = [{k: binder_fields[k] for k in RECIPIENT_FIELDS}] + recipients
+        out_paths = [os.path.join(out_dir, name) for name in recipient_filenames(file_name, recipients)]
+    else:
+        out_paths = [os.path.join(out_dir, file_name)]
+    out_path = out_paths[0]
+
+    maps = {}
+
+    def load_pdf(ref):
+        path = _ref_path(ref)
+        if path not in maps:
+            maps[path] = map_file(path)
+        return maps[path]
+
+    hashes = {}
+
+    def content_hash(ref):
+        path = _ref_path(ref)
+        if path not in hashes:
+            hashes[path] = blob_id_for(load_pdf(ref))
+        return hashes[path]
+
+    def pages_for(ref):
+        return text_index.pages(content_hash(ref), load_pdf(ref))
+
+    highlight = make_highlighter(pages_for) if any(s.get("highlights") for s in sections) else None
+    tmp_paths = [p + ".part" for p in out_paths]
+    tmp_path = tmp_paths[0]
+    build_profile = BuildProfile() if profile else None
+    key = None
+    try:
+        # The cache holds single binders; a fan-out build always runs (it costs about one)
+        if cache and not recipients:
+            key = binder_key(binder_fields, sections, content_hash, combine_covers, compact, outline, toc, stamp)
+            hit = binder_cache.get(key)
+            if hit is not None:
+                shutil.copyfile(hit[0], tmp_path)
+                os.replace(tmp_path, out_path)
+                return out_path, os.path.getsize(out_path), time.perf_counter() - t0
+        options = dict(
+            load_pdf=load_pdf,
+            combine_covers=combine_covers,
+            compact=compact,
+            profile=build_profile,
+            highlight=highlight,
+            outline=outline,
+            toc=toc,
+            stamp=stamp,
+        )
+        handles = [open(p, "wb") for p in tmp_paths]
+        try:
+            if recipients:
+                build_for_recipients(binder_fields, recipients, sections, outs=handles, **options)
+            else:
+                build_binder(binder_fields, sections, out=handles[0], **options)
+        finally:
+            for fh in handles:
+                fh.close()
+        for tmp, path in zip(tmp_paths, out_paths):
+            os.replace(tmp, path)
+        if key is not None:
+            binder_cache.put(key, out_path)
+    finally:
+        for mm in maps.values():
+            try:
+                mm.close()
+            except Exception:
+                pass
+        for tmp in tmp_paths:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+    size = sum(os.path.getsize(p) for p in out_paths)
+    if build_profile is not None:
+        log_profile(build_profile, manifest=os.path.abspath(manifest_path), output=out_path,
+                    sections=len(sections), output_bytes=size, recipients=len(recipients) or 1)
+    return (out_paths if recipients else out_path), size, time.perf_counter() - t0
+
+
+@click.group()
+def cli():
+    """Wiljo Submittal Builder — headless tools."""
+
+
+@cli.command()
+@click.argument("manifests", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("-o", "--out-dir", default=".", show_default=True,
+              type=click.Path(file_okay=False), help="Folder for the finished binders.")
+@click.option("-j", "--jobs", default=os.cpu_count() or 1, show_default=True,
+              help="Binders to build in parallel (processes).")
+@click.option("--separate-covers", is_flag=True,
+              help="Render each cover as its own PDF instead of one shared cover document.")
+@click.option("--compact", "compact_output", is_flag=True,
+              help="Dedupe shared fonts/images, recompress streams and downsample scans.")
+@click.option("--max-dpi", default=150, show_default=True,
+              help="With --compact, downsample images above this resolution.")
+@click.option("--profile", is_flag=True, help="Log one JSON build profile line per binder to stderr.")
+@click.option("--no-cache", is_flag=True, help="Rebuild even when an identical binder is in the binder cache.")
+@click.option("--no-outline", is_flag=True, help="Leave out the per-section bookmarks.")
+@click.option("--toc", is_flag=True, help="Print each section's page number in the binder cover's list.")
+@click.option("--stamp", is_flag=True,
+              help='Stamp every page with "Section X – Page n of m" and the binder page number.')
+@click.option("--max-volume-mb", type=float, default=None,
+              help="Split each binder at section boundaries into volumes of about this size "
+                   "(Name_Vol1of3.pdf, ...); volumes build in parallel.")
+def build(manifests, out_dir, jobs, separate_covers, compact_output, max_dpi, profile, no_cache, no_outline, toc,
+          stamp, max_volume_mb):
+    """Build one binder per JSON/TOML MANIFEST."""
+    os.makedirs(out_dir, exist_ok=True)
+    compact = {"max_dpi": max_dpi} if compact_output else None
+    failures = 0
+
+    def report(path, result):
+        nonlocal failures
+        try:
+            out_path, size, secs = result()
+            if isinstance(out_path, list):
+                out_path = ", ".join(out_path)
+            click.echo(f"OK    {path} -> {out_path} ({size / 1e6:.1f} MB, {secs:.1f}s)")
+        except ManifestError as e:
+            failures += 1
+            click.echo(f"FAIL  {path}: {e}", err=True)
+        except Exception as e:
+            failures += 1
+            click.echo(f"FAIL  {path}: {type(e).__name__}: {e}", err=True)
+
+    # One task per binder, or per volume when splitting
+    tasks = []
+    for path in manifests:
+        if max_volume_mb is None:
+            tasks.append((path, None))
+            continue
+        try:
+            volumes = plan_manifest_volumes(path, max_volume_mb * 1024 * 1024)
+        except (ManifestError, OSError) as e:
+            failures += 1
+            click.echo(f"FAIL  {path}: {e}", err=True)
+            continue
+        tasks += [(path, (n, len(volumes), indexes)) for n, indexes in enumerate(volumes, start=1)]
+
+    workers = max(1, min(jobs, len(tasks)))
+    if workers == 1:
+        for path, volume in tasks:
+            report(path, lambda: build_from_manifest(path, out_dir, not separate_covers, compact, profile, volume,
+                                                     not no_cache, not no_outline, toc, stamp))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(build_from_manifest, path, out_dir, not separate_covers, compact, profile,
+                                   volume, not no_cache, not no_outline, toc, stamp): path
+                       for path, volume in tasks}
+            for fut in as_completed(futures):
+                report(futures[fut], fut.result)
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,310 @@
+# binder/compact.py — optional "compact" stage run on the merged binder before it is written
+
+import hashlib
+import io
+import zlib
+
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    NumberObject,
+    StreamObject,
+)
+
+DEFAULT_MAX_DPI = 150
+DEFAULT_JPEG_QUALITY = 75
+
+# Dictionaries that are safe to share between documents once their contents match.
+_SHAREABLE_TYPES = {"/Font", "/FontDescriptor", "/Encoding", "/ExtGState", "/Pattern", "/Shading"}
+# Filters that only make a stream bigger; such streams are re-encoded with Flate.
+_WEAK_FILTERS = {"/ASCIIHexDecode", "/ASCII85Decode", "/AHx", "/A85"}
+_FLATE_FILTERS = {"/FlateDecode", "/Fl"}
+# Keys that point "up" the tree; following them would make every page reach every other.
+_PARENT_KEYS = {"/Parent", "/P"}
+
+
+class _Sink:
+    """Write target that only counts (and optionally hashes) bytes."""
+
+    def __init__(self, hashed=False):
+        self.size = 0
+        self._h = hashlib.sha1() if hashed else None
+
+    def write(self, b):
+        self.size += len(b)
+        if self._h is not None:
+            self._h.update(b)
+        return len(b)
+
+    def tell(self):
+        return self.size
+
+    def digest(self):
+        return self._h.digest()
+
+
+def _obj_size(obj):
+    sink = _Sink()
+    obj.write_to_stream(sink, None)
+    return sink.size
+
+
+def _walk_refs(obj):
+    """Yield every IndirectObject directly or indirectly inside `obj` (without resolving)."""
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, IndirectObject):
+            yield o
+        elif isinstance(o, DictionaryObject):
+            for k, v in o.items():
+                if k not in _PARENT_KEYS:
+                    stack.append(v)
+        elif isinstance(o, ArrayObject):
+            stack.extend(o)
+
+
+def _remap(obj, remap, writer):
+    """Point references to duplicate objects at their surviving copy, in place."""
+    if isinstance(obj, DictionaryObject):
+        for k, v in list(obj.items()):
+            if isinstance(v, IndirectObject) and v.idnum in remap:
+                obj[k] = IndirectObject(remap[v.idnum], 0, writer)
+            elif isinstance(v, (DictionaryObject, ArrayObject)):
+                _remap(v, remap, writer)
+    elif isinstance(obj, ArrayObject):
+        for i, v in enumerate(obj):
+            if isinstance(v, IndirectObject) and v.idnum in remap:
+                obj[i] = IndirectObject(remap[v.idnum], 0, writer)
+            elif isinstance(v, (DictionaryObject, ArrayObject)):
+                _remap(v, remap, writer)
+
+
+def _page_object_ids(writer, page_index):
+    """IDs of every object a page depends on (resources, contents, annotations)."""
+    page = writer.pages[page_index]
+    ids = set()
+    if page.indirect_reference is not None:
+        ids.add(page.indirect_reference.idnum)
+    stack = list(_walk_refs(page))
+    while stack:
+        ref = stack.pop()
+        if ref.idnum in ids or ref.pdf is not writer:
+            continue
+        ids.add(ref.idnum)
+        stack.extend(_walk_refs(writer._objects[ref.idnum - 1]))
+    return ids
+
+
+def _measure(writer, groups):
+    """
+    Bytes attributed to each (label, (start, stop)) page group. An object shared
+    by several groups is counted once, for the first group that uses it.
+    """
+    owner = {}
+    for gi, (_, (start, stop)) in enumerate(groups):
+        for p in range(start, stop):
+            for idnum in _page_object_ids(writer, p):
+                owner.setdefault(idnum, gi)
+    sizes = [0] * len(groups)
+    for idnum, gi in owner.items():
+        obj = writer._objects[idnum - 1]
+        if obj is not None:
+            sizes[gi] += _obj_size(obj)
+    return sizes
+
+
+def dedupe_objects(writer, passes=3):
+    """
+    Merge byte-identical streams and shareable dictionaries (fonts, font files,
+    graphics states...) that arrived from different attachments. Duplicates
+    become null objects so object numbers stay valid. Returns objects removed.
+    """
+    removed = 0
+    for _ in range(passes):
+        seen = {}
+        remap = {}
+        for i, obj in enumerate(writer._objects):
+            if isinstance(obj, StreamObject):
+                if obj.get("/Type") in ("/Page", "/Pages", "/Catalog"):
+                    continue
+            elif isinstance(obj, DictionaryObject):
+                if obj.get("/Type") not in _SHAREABLE_TYPES:
+                    continue
+            else:
+                continue
+            sink = _Sink(hashed=True)
+            obj.write_to_stream(sink, None)
+            key = (type(obj).__name__, sink.digest(), sink.size)
+            first = seen.setdefault(key, i + 1)
+            if first != i + 1:
+                remap[i + 1] = first
+        if not remap:
+            break
+        for obj in writer._objects:
+            if isinstance(obj, (DictionaryObject, ArrayObject)):
+                _remap(obj, remap, writer)
+        for idnum in remap:
+            writer._objects[idnum - 1] = NullObject()
+        removed += len(remap)
+    return removed
+
+
+def _filters(obj):
+    f = obj.get("/Filter")
+    if f is None:
+        return []
+    f = f.get_object()
+    return list(f) if isinstance(f, ArrayObject) else [f]
+
+
+def recompress_streams(writer, level=9):
+    """Flate-encode streams stored raw or with ASCII filters. Returns bytes saved."""
+    saved = 0
+    for i, obj in enumerate(writer._objects):
+        if not isinstance(obj, StreamObject):
+            continue
+        filters = _filters(obj)
+        if filters and not (set(filters) & _WEAK_FILTERS and set(filters) <= _WEAK_FILTERS | _FLATE_FILTERS):
+            continue
+        try:
+            raw = obj.get_data() if filters else obj._data
+            if isinstance(raw, str):
+                raw = raw.encode("latin-1")
+            packed = zlib.compress(raw, level)
+        except Exception:
+            continue
+        if len(packed) >= len(obj._data):
+            continue
+        new = EncodedStreamObject()
+        for k, v in obj.items():
+            if k not in ("/Filter", "/DecodeParms", "/Length"):
+                new[k] = v
+        new[NameObject("/Filter")] = NameObject("/FlateDecode")
+        new._data = packed
+        new.indirect_reference = obj.indirect_reference
+        saved += len(obj._data) - len(packed)
+        writer._objects[i] = new
+    return saved
+
+
+def _decode_image(obj):
+    """PIL image for plain 8-bit gray/RGB images, else None (left untouched)."""
+    from PIL import Image
+
+    if obj.get("/ImageMask") or "/Mask" in obj or "/Decode" in obj:
+        return None
+    filters = _filters(obj)
+    if filters == ["/DCTDecode"]:
+        img = Image.open(io.BytesIO(obj._data))
+        return img if img.mode in ("L", "RGB") else None
+    if not set(filters) <= _WEAK_FILTERS | _FLATE_FILTERS or obj.get("/BitsPerComponent") != 8:
+        return None
+    cs = obj.get("/ColorSpace")
+    cs = cs.get_object() if cs is not None else None
+    if isinstance(cs, ArrayObject) and cs and cs[0] == "/ICCBased":
+        n = cs[1].get_object().get("/N")
+        cs = {1: "/DeviceGray", 3: "/DeviceRGB"}.get(n)
+    mode = {"/DeviceGray": "L", "/DeviceRGB": "RGB"}.get(cs)
+    if mode is None:
+        return None
+    size = (int(obj["/Width"]), int(obj["/Height"]))
+    return Image.frombytes(mode, size, obj.get_data())
+
+
+def downsample_images(writer, max_dpi=DEFAULT_MAX_DPI, quality=DEFAULT_JPEG_QUALITY):
+    """
+    Re-encode images whose resolution on their page exceeds max_dpi as JPEG at
+    max_dpi. Resolution is pixel size over page size, which never overstates
+    it, so small logos are left alone. Returns the number of images changed.
+    """
+    from PIL import Image
+
+    resample = getattr(Image, "Resampling", Image).LANCZOS
+    dpi_by_image = {}
+    for page in writer.pages:
+        box = page.mediabox
+        page_w_in = max(float(box.width) / 72, 0.01)
+        page_h_in = max(float(box.height) / 72, 0.01)
+        # Images on the page and inside its form XObjects (scans are often wrapped in one)
+        stack = [page.get("/Resources")]
+        seen = set()
+        while stack:
+            resources = stack.pop()
+            resources = resources.get_object() if resources is not None else None
+            xobjects = resources.get("/XObject") if isinstance(resources, DictionaryObject) else None
+            if xobjects is None:
+                continue
+            for ref in xobjects.get_object().values():
+                if not isinstance(ref, IndirectObject) or ref.idnum in seen:
+                    continue
+                seen.add(ref.idnum)
+                obj = ref.get_object()
+                if not isinstance(obj, StreamObject):
+                    continue
+                if obj.get("/Subtype") == "/Form":
+                    stack.append(obj.get("/Resources"))
+                    continue
+                if obj.get("/Subtype") != "/Image":
+                    continue
+                dpi = max(float(obj.get("/Width", 0)) / page_w_in, float(obj.get("/Height", 0)) / page_h_in)
+                if dpi > dpi_by_image.get(ref.idnum, (0, None))[0]:
+                    dpi_by_image[ref.idnum] = (dpi, obj)
+
+    changed = 0
+    for idnum, (dpi, obj) in dpi_by_image.items():
+        if dpi <= max_dpi:
+            continue
+        try:
+            img = _decode_image(obj)
+        except Exception:
+            img = None
+        if img is None:
+            continue
+        scale = max_dpi / dpi
+        size = (max(1, int(img.width * scale)), max(1, int(img.height * scale)))
+        buf = io.BytesIO()
+        img.resize(size, resample).save(buf, format="JPEG", quality=quality, optimize=True)
+        data = buf.getvalue()
+        if len(data) >= len(obj._data):
+            continue
+        new = EncodedStreamObject()
+        for k, v in obj.items():
+            if k not in ("/Filter", "/DecodeParms", "/Length", "/ColorSpace", "/BitsPerComponent",
+                         "/Width", "/Height"):
+                new[k] = v
+        new[NameObject("/Filter")] = NameObject("/DCTDecode")
+        new[NameObject("/ColorSpace")] = NameObject("/DeviceGray" if img.mode == "L" else "/DeviceRGB")
+        new[NameObject("/BitsPerComponent")] = NumberObject(8)
+        new[NameObject("/Width")] = NumberObject(size[0])
+        new[NameObject("/Height")] = NumberObject(size[1])
+        new._data = data
+        new.indirect_reference = obj.indirect_reference
+        writer._objects[idnum - 1] = new
+        changed += 1
+    return changed
+
+
+def compact(writer, groups, max_dpi=DEFAULT_MAX_DPI, quality=DEFAULT_JPEG_QUALITY):
+    """
+    Deduplicate, recompress and downsample in place, then report sizes.
+    `groups` is a list of (label, (start, stop)) page ranges, one per binder part.
+    Returns {"sections": [{"label", "before", "after"}, ...], "deduped", "images"}.
+    """
+    before = _measure(writer, groups)
+    deduped = dedupe_objects(writer)
+    recompress_streams(writer)
+    images = downsample_images(writer, max_dpi=max_dpi, quality=quality) if max_dpi else 0
+    after = _measure(writer, groups)
+    return {
+        "sections": [
+            {"label": label, "before": b, "after": a}
+            for (label, _), b, a in zip(groups, before, after)
+        ],
+        "deduped": deduped,
+        "images": images,
+    }
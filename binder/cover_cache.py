@@ -0,0 +1,88 @@
+# binder/cover_cache.py — process-wide LRU cache of rendered cover PDFs
+
+import threading
+from collections import OrderedDict
+
+# Bump when the drawing code of a cached cover changes, so old renders are not reused.
+COVER_LAYOUT_VERSION = 2
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def _nbytes(value):
+    # Rendered bytes, or a (bytes, layout) pair
+    return len(value[0]) if isinstance(value, tuple) else len(value)
+
+
+class CoverCache:
+    """
+    Thread-safe LRU of rendered cover bytes (or (bytes, layout) pairs),
+    bounded by total bytes and entry count.
+
+    Lives at module level so every Streamlit session (and every rerun) in the
+    process shares it. Builds run in the build service's pool workers, which
+    are long-lived: each worker keeps its own cache, so a cover is rendered
+    once per worker rather than once per server.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    @property
+    def total_bytes(self):
+        return self._bytes
+
+    def get(self, key):
+        """Cached value for `key`, or None."""
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """Store `data`; anything larger than the whole cache is not kept."""
+        if _nbytes(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= _nbytes(old)
+            self._items[key] = data
+            self._bytes += _nbytes(data)
+            while self._items and (self._bytes > self.max_bytes or len(self._items) > self.max_entries):
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= _nbytes(evicted)
+
+    def get_or_render(self, key, render):
+        """Return the cached value for `key`, calling `render()` (-> bytes or (bytes, layout)) on a miss."""
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+
+# Shared by all sessions in this process: single section covers and whole cover sets
+section_covers = CoverCache()
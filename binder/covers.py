@@ -0,0 +1,437 @@
+# binder/covers.py — binder and section cover rendering (reportlab only, no Streamlit)
+
+import io
+import logging
+
+from reportlab.lib.pagesizes import LETTER
+from reportlab.pdfgen import canvas
+from reportlab.lib.units import inch
+
+from binder.cover_cache import COVER_LAYOUT_VERSION, section_covers
+from binder.layout import fit_text, text_width, wrap_lines
+from binder.resources import font_signature, load_logo_imagereader, register_fonts
+
+log = logging.getLogger(__name__)
+
+# ---------- Helpers ----------
+# Optional custom fonts; fall back to Times if not present (registered once per process)
+FONT_REG, FONT_BOLD = register_fonts()
+
+LETTER_W, LETTER_H = LETTER
+
+def draw_logo_fit_box(c, logo_filename, left_x, top_y, max_width_in=1.6, max_height_in=0.75):
+    """
+    Draw the logo scaled to fit inside a box (inches). Returns drawn height in inches.
+    """
+    ir = load_logo_imagereader(logo_filename)
+    if ir is None:
+        log.info("Logo not found (looking for '%s').", logo_filename)
+        return 0.0
+
+    try:
+        ow, oh = ir.getSize()
+    except Exception:
+        ow, oh = (400, 200)
+
+    if ow <= 0 or oh <= 0:
+        return 0.0
+
+    box_w = float(max_width_in) * inch
+    box_h = float(max_height_in) * inch
+    scale = min(box_w / ow, box_h / oh)
+    draw_w = ow * scale
+    draw_h = oh * scale
+
+    c.drawImage(
+        ir,
+        left_x,
+        top_y - draw_h,  # ReportLab y is bottom-left
+        width=draw_w,
+        height=draw_h,
+        preserveAspectRatio=True,
+        mask="auto",
+    )
+    return draw_h / inch
+
+def draw_wrapped_text(c, text, x, y, max_width, font=FONT_REG, size=12, leading=16, indent=0):
+    """Left-aligned wrapped text (continuation lines shifted right by `indent`)."""
+    c.setFont(font, size)
+    for i_line, line in enumerate(wrap_lines(text, font, size, max_width, indent=indent)):
+        c.drawString(x + (indent if i_line else 0), y, line)
+        y -= leading
+    return y
+
+# ---- centered wrap + auto-fit for section covers ----
+def wrap_centered_text(c, text, center_x, top_y, max_width, font, size, leading):
+    """
+    Wrap text to fit max_width, draw each line centered,
+    and return the y after drawing along with the list of lines.
+    """
+    s = (text or "").strip()
+    c.setFont(font, size)
+    lines = wrap_lines(s, font, size, max_width) or [""]
+    y = top_y
+    for line in lines:
+        c.drawCentredString(center_x, y, line)
+        y -= leading
+    return y, lines
+
+def draw_autofit_centered(
+    c, text, center_x, box_top_y, box_height, max_width,
+    font, max_size=48, min_size=14, target_lines=2, line_gap=6
+):
+    """
+    Auto-shrinks text to fit within (max_width x box_height), centered.
+    Picks the largest size in [min_size, max_size] that fits target_lines (or fewer)
+    and the vertical space (see layout.fit_text). Draws and returns the final y.
+    """
+    s = (text or "").strip()
+    if not s:
+        return box_top_y
+
+    size, lines = fit_text(
+        s, font, max_width, box_height,
+        max_size=max_size, min_size=min_size, max_lines=target_lines, line_gap=line_gap,
+    )
+    if size is not None:
+        leading = size + line_gap
+        y = box_top_y - (box_height - leading) / 2
+        c.setFont(font, size)
+        for line in lines:
+            c.drawCentredString(center_x, y, line)
+            y -= leading
+        return y
+
+    # Fallback at min_size
+    size = min_size
+    leading = size + line_gap
+    _, _ = wrap_centered_text(c, s, center_x, box_top_y - leading / 2, max_width, font, size, leading)
+    return box_top_y - leading
+
+# ---------- PDF Generators ----------
+FOOTER_TEXT = "Wiljo Interiors, Inc.   |   109 NE 38th Street, Oklahoma City, OK 73105"
+
+class CoverForms:
+    """
+    Static cover artwork defined once per document as form XObjects:
+    the company footer, and the binder header (logo between two rule lines).
+    Pass to the draw_* functions when rendering several covers on one canvas.
+    """
+
+    def __init__(self, c):
+        self.c = c
+        self._header_bottom = {}
+
+    def footer(self):
+        c = self.c
+        if not c.hasForm("wiljo_footer"):
+            c.beginForm("wiljo_footer")
+            _draw_footer_text(c)
+            c.endForm()
+        c.doForm("wiljo_footer")
+
+    def binder_header(self, x, y):
+        c = self.c
+        name = f"wiljo_header_{x:.2f}_{y:.2f}"
+        if name not in self._header_bottom:
+            c.beginForm(name)
+            self._header_bottom[name] = _draw_binder_header(c, x, y)
+            c.endForm()
+        c.doForm(name)
+        return self._header_bottom[name]
+
+def _draw_footer_text(c):
+    c.setFont(FONT_REG, 10)
+    c.drawCentredString(LETTER_W / 2, 0.5 * inch, FOOTER_TEXT)
+
+def _draw_binder_header(c, x, y):
+    """Rule line, logo, rule line. Returns the y of the bottom rule."""
+    page_w, _ = LETTER
+
+    # Top break line (slightly above logo)
+    c.setStrokeColorRGB(0, 0, 0)
+    c.setLineWidth(1)
+    top_line_y = y + 0.20 * inch
+    c.line(x, top_line_y, page_w - x, top_line_y)
+
+    # Logo
+    drawn_h_in = draw_logo_fit_box(
+        c,
+        "wiljo_logo.png",
+        left_x=x,
+        top_y=y,
+        max_width_in=1.6,
+        max_height_in=0.75,
+    )
+
+    # Bottom break line (below logo)
+    header_gap_in = 0.20
+    bottom_line_y = y - (drawn_h_in + header_gap_in) * inch
+    c.line(x, bottom_line_y, page_w - x, bottom_line_y)
+    return bottom_line_y
+
+def draw_footer(c, forms=None):
+    """Company footer centered at the bottom of the current page."""
+    if forms is not None:
+        forms.footer()
+    else:
+        _draw_footer_text(c)
+
+def draw_numbered_line(c, text, number, x, y, max_width, font=FONT_REG, size=12, leading=16, indent=0):
+    """
+    Wrapped text with `number` right-aligned on its last line after dot leaders
+    (a table-of-contents row). Returns the y below it.
+    """
+    num = str(number)
+    num_w = text_width(num, font, size)
+    lines = wrap_lines(text, font, size, max_width - num_w - 24, indent=indent) or [""]
+    c.setFont(font, size)
+    for i_line, line in enumerate(lines):
+        line_x = x + (indent if i_line else 0)
+        c.drawString(line_x, y, line)
+        if i_line == len(lines) - 1:
+            dots_from = line_x + text_width(line, font, size) + 6
+            dots_to = x + max_width - num_w - 6
+            dot_w = text_width(" .", font, size)
+            if dots_to > dots_from + dot_w:
+                c.drawRightString(dots_to, y, " ." * int((dots_to - dots_from) / dot_w))
+            c.drawRightString(x + max_width, y, num)
+        y -= leading
+    return y
+
+def draw_binder_cover(c, date_str, to_name, to_company, to_addr1, to_addr2, project,
+                      submitter_name, sections, forms=None, page_numbers=None):
+    """
+    Draw the letter-style binder cover onto canvas `c` (one or more pages,
+    each finished with showPage). `sections` supplies the bulleted spec list;
+    with `page_numbers` (binder page of each section, parallel to `sections`)
+    the list doubles as a table of contents.
+    """
+    margin = 0.9 * inch
+    x = margin
+    y = LETTER_H - margin
+
+    # Header: logo between two full-width lines
+    if forms is not None:
+        bottom_line_y = forms.binder_header(x, y)
+    else:
+        bottom_line_y = _draw_binder_header(c, x, y)
+
+    # Body start
+    body_gap_in = 0.25
+    body_top_y = bottom_line_y - (body_gap_in * inch)
+
+    # Date
+    c.setFont(FONT_REG, 12)
+    c.drawString(x, body_top_y, date_str)
+    text_y = body_top_y - 28
+
+    # Recipient block
+    c.setFont(FONT_REG, 12)
+    for line in [to_name, to_company, to_addr1, to_addr2]:
+        if line and line.strip():
+            c.drawString(x, text_y, line.strip())
+            text_y -= 18
+    text_y -= 10
+
+    # Re: Project
+    c.setFont(FONT_BOLD, 12)
+    c.drawString(x, text_y, f"Re: {project}")
+    text_y -= 28
+
+    # Approval sentence
+    text_y = draw_wrapped_text(
+        c,
+        "We are submitting the following materials for the architect’s review and approval:",
+        x,
+        text_y,
+        max_width=(LETTER_W - 2 * margin),
+        font=FONT_REG,
+        size=12,
+        leading=16,
+    )
+    text_y -= 10
+
+    # Bulleted Spec Sections
+    bullet = u"\u2022"
+    c.setFont(FONT_REG, 12)
+    max_width = LETTER_W - 2 * margin
+    for i, entry in enumerate(sections or []):
+        spec_label = (entry.get("spec") or "").strip()
+        if not spec_label:
+            continue
+        line = f"{bullet}  Spec Section {spec_label}"
+        if page_numbers is not None and page_numbers[i] is not None:
+            text_y = draw_numbered_line(c, line, page_numbers[i], x, text_y, max_width, indent=18)
+        else:
+            text_y = draw_wrapped_text(c, line, x, text_y, max_width, font=FONT_REG, size=12, leading=16,
+                                       indent=18)
+        text_y -= 2
+
+        # Overflow safety
+        if text_y < 120:
+            draw_footer(c, forms)
+            c.showPage()
+            c.setFont(FONT_REG, 12)
+            text_y = LETTER_H - margin
+
+    text_y -= 40
+
+    # Signature
+    c.setFont(FONT_REG, 12)
+    c.drawString(x, text_y, "Respectfully Submitted,")
+    text_y -= 36
+    c.drawString(x, text_y, submitter_name)
+
+    # Footer
+    draw_footer(c, forms)
+    c.showPage()
+
+def draw_section_cover(c, spec_section, product_name, forms=None):
+    """
+    Draw one section cover page onto canvas `c` (finished with showPage).
+    - Spec Section (bold, large) auto-wraps/auto-shrinks to fit 2 lines.
+    - Product Name (bold, medium) wraps below it (up to 3 lines).
+    - Footer centered at bottom.
+    """
+    page_w, page_h = LETTER
+
+    # Background
+    c.setFillColorRGB(1, 1, 1)
+    c.rect(0, 0, page_w, page_h, fill=1)
+    c.setFillColorRGB(0, 0, 0)
+
+    # Layout
+    margin_x = 0.85 * inch
+    center_x = page_w / 2
+    max_width = page_w - 2 * margin_x
+
+    # Spec Section title (above center)
+    title_box_top = page_h * 0.62
+    title_box_h   = 1.8 * inch
+    draw_autofit_centered(
+        c,
+        text=spec_section,
+        center_x=center_x,
+        box_top_y=title_box_top,
+        box_height=title_box_h,
+        max_width=max_width,
+        font=FONT_BOLD,
+        max_size=48,
+        min_size=18,
+        target_lines=2,
+        line_gap=6,
+    )
+
+    # Product name below
+    product_box_top = title_box_top - title_box_h - 0.25 * inch
+    product_box_h   = 1.2 * inch
+    draw_autofit_centered(
+        c,
+        text=product_name,
+        center_x=center_x,
+        box_top_y=product_box_top,
+        box_height=product_box_h,
+        max_width=max_width,
+        font=FONT_BOLD,
+        max_size=32,
+        min_size=14,
+        target_lines=3,
+        line_gap=4,
+    )
+
+    # Footer
+    draw_footer(c, forms)
+    c.showPage()
+
+def generate_binder_cover(date_str, to_name, to_company, to_addr1, to_addr2, project, submitter_name,
+                          sections=(), page_numbers=None):
+    """
+    Letter-style binder cover with logo between two full-width lines, then body.
+    `sections` (list of {"spec", ...}) supplies the bulleted spec list;
+    `page_numbers` turns it into a table of contents (see draw_binder_cover).
+    Returns a BytesIO containing the cover PDF.
+    """
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=LETTER, invariant=True)  # fixed dates and IDs: same input, same bytes
+    draw_binder_cover(
+        c, date_str, to_name, to_company, to_addr1, to_addr2, project, submitter_name,
+        sections=sections, page_numbers=page_numbers,
+    )
+    c.save()
+    buf.seek(0)
+    return buf
+
+def generate_section_cover(spec_section, product_name):
+    """Returns a BytesIO containing a one-page section cover PDF."""
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=LETTER, invariant=True)
+    draw_section_cover(c, spec_section, product_name)
+    c.save()
+    buf.seek(0)
+    return buf
+
+def generate_cover_set(binder_fields, sections, cover_indexes=None, page_numbers=None):
+    """
+    Render the binder cover and the section covers into ONE PDF, so fonts,
+    the logo and the footer/header forms are embedded once for the whole binder.
+    `cover_indexes` limits which sections get a cover page (default: all);
+    the binder cover always lists every section (with `page_numbers`, as a
+    table of contents; see draw_binder_cover).
+    Returns (BytesIO, binder_pages, section_pages) where binder_pages is a
+    (start, stop) page range and section_pages maps section index -> page index.
+    """
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=LETTER, invariant=True)
+    forms = CoverForms(c)
+
+    draw_binder_cover(c, sections=sections, forms=forms, page_numbers=page_numbers, **binder_fields)
+    binder_pages = (0, c.getPageNumber() - 1)
+
+    if cover_indexes is None:
+        cover_indexes = range(len(sections))
+    section_pages = {}
+    for i in cover_indexes:
+        entry = sections[i]
+        section_pages[i] = c.getPageNumber() - 1
+        draw_section_cover(c, (entry.get("spec") or "").strip(), (entry.get("product") or "").strip(), forms=forms)
+
+    c.save()
+    buf.seek(0)
+    return buf, binder_pages, section_pages
+
+def cached_section_cover(spec_section, product_name):
+    """
+    Section cover PDF bytes, served from the server-wide cover cache when the
+    same spec/product pair has already been rendered with the same fonts and layout.
+    """
+    spec_section = (spec_section or "").strip()
+    product_name = (product_name or "").strip()
+    key = ("section", COVER_LAYOUT_VERSION, font_signature(), spec_section, product_name)
+    return section_covers.get_or_render(
+        key, lambda: generate_section_cover(spec_section, product_name).getvalue()
+    )
+
+def cached_cover_set(binder_fields, sections, cover_indexes=None, page_numbers=None):
+    """
+    generate_cover_set, served from the cover cache when the same cover
+    fields, section titles, cover pages and TOC numbers were rendered before
+    with the same fonts and layout. The set is cached whole: covers stitched
+    from separately cached pages would each embed the fonts and logo again.
+    """
+    if cover_indexes is None:
+        cover_indexes = range(len(sections))
+    key = (
+        "set", COVER_LAYOUT_VERSION, font_signature(),
+        tuple(sorted((k, str(v or "")) for k, v in binder_fields.items())),
+        tuple((entry.get("spec") or "", entry.get("product") or "") for entry in sections),
+        tuple(cover_indexes),
+        tuple(page_numbers) if page_numbers is not None else None,
+    )
+
+    def render():
+        buf, binder_pages, section_pages = generate_cover_set(binder_fields, sections, cover_indexes, page_numbers)
+        return buf.getvalue(), (binder_pages, section_pages)
+
+    data, (binder_pages, section_pages) = section_covers.get_or_render(key, render)
+    return io.BytesIO(data), binder_pages, dict(section_pages)
@@ -0,0 +1,112 @@
+# binder/csi.py — CSI MasterFormat section numbers in spec labels, and sorting by them
+
+import re
+
+# MasterFormat 2016 division titles (divisions not listed are reserved)
+DIVISIONS = {
+    0: "Procurement and Contracting Requirements",
+    1: "General Requirements",
+    2: "Existing Conditions",
+    3: "Concrete",
+    4: "Masonry",
+    5: "Metals",
+    6: "Wood, Plastics, and Composites",
+    7: "Thermal and Moisture Protection",
+    8: "Openings",
+    9: "Finishes",
+    10: "Specialties",
+    11: "Equipment",
+    12: "Furnishings",
+    13: "Special Construction",
+    14: "Conveying Equipment",
+    21: "Fire Suppression",
+    22: "Plumbing",
+    23: "Heating, Ventilating, and Air Conditioning (HVAC)",
+    25: "Integrated Automation",
+    26: "Electrical",
+    27: "Communications",
+    28: "Electronic Safety and Security",
+    31: "Earthwork",
+    32: "Exterior Improvements",
+    33: "Utilities",
+    34: "Transportation",
+    35: "Waterway and Marine Construction",
+    40: "Process Interconnections",
+    41: "Material Processing and Handling Equipment",
+    42: "Process Heating, Cooling, and Drying Equipment",
+    43: "Process Gas and Liquid Handling, Purification, and Storage Equipment",
+    44: "Pollution and Waste Control Equipment",
+    45: "Industry-Specific Manufacturing Equipment",
+    46: "Water and Wastewater Equipment",
+    48: "Electrical Power Generation",
+}
+
+# "092216", "09 22 16", "09.22.16", "09-22-16", optionally with a ".13" level-4 suffix,
+# at the start of the label (after an optional "Section")
+_NUMBER_RE = re.compile(
+    r"^\s*(?:section\s+)?((\d{2})[ .\-]?(\d{2})[ .\-]?(\d{2})(?:\.(\d{2}))?)(?!\d)",
+    re.IGNORECASE,
+)
+
+
+def parse_section_number(spec):
+    """
+    (division, level 2, level 3, level 4) of the MasterFormat number a spec
+    label starts with — '092216.13 Non-Structural Metal Stud Framing' ->
+    (9, 22, 16, 13) — or None. Level 4 is 0 when not given.
+    """
+    m = _NUMBER_RE.match(spec or "")
+    if not m:
+        return None
+    return int(m.group(2)), int(m.group(3)), int(m.group(4)), int(m.group(5) or 0)
+
+
+def section_number_text(spec):
+    """The section number as written in the label ('09 22 16'), or None."""
+    m = _NUMBER_RE.match(spec or "")
+    return m.group(1) if m else None
+
+
+def division_title(spec):
+    """'Division 09 — Finishes' for a numbered spec label, or ''."""
+    number = parse_section_number(spec)
+    if number is None:
+        return ""
+    title = DIVISIONS.get(number[0])
+    return f"Division {number[0]:02d} — {title}" if title else f"Division {number[0]:02d}"
+
+
+def csi_sort_key(spec):
+    """
+    Sort key: numbered labels in MasterFormat order, then every unnumbered
+    one. Labels are not compared, so a stable sort keeps equal numbers and
+    unnumbered sections in the order they were entered.
+    """
+    number = parse_section_number(spec)
+    if number is None:
+        return (1, ())
+    return (0, number)
+
+
+def csi_order(sections):
+    """
+    Indexes of `sections` in MasterFormat order. Only the numbered sections
+    are reordered; the unnumbered ones follow them in their original order.
+    """
+    return sorted(range(len(sections)), key=lambda i: csi_sort_key(sections[i].get("spec")))
+
+
+def csi_insert_position(sections, spec):
+    """
+    Where a new section with this spec label goes: after the last section
+    that sorts at or before it, so a sorted list stays sorted (and an
+    unsorted one is disturbed as little as possible). Unnumbered labels go last.
+    """
+    if parse_section_number(spec) is None:
+        return len(sections)
+    key = csi_sort_key(spec)
+    position = 0
+    for i, entry in enumerate(sections):
+        if csi_sort_key(entry.get("spec")) <= key:
+            position = i + 1
+    return position
@@ -0,0 +1,66 @@
+# binder/highlight.py — highlight annotations over search-term matches
+
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    FloatObject,
+    NameObject,
+    NumberObject,
+    TextStringObject,
+)
+
+# Highlighter yellow, drawn with a multiply blend so the text stays readable
+HIGHLIGHT_COLOR = (1.0, 0.92, 0.23)
+# Points added around each match box
+PAD = 1.0
+
+
+def _floats(values):
+    return ArrayObject([FloatObject(f"{v:.2f}") for v in values])
+
+
+def add_highlights(writer, page, rects, color=HIGHLIGHT_COLOR, note=""):
+    """
+    Add one /Highlight annotation per (x0, y0, x1, y1) rect (page space) to
+    `page`, a page of `writer`. Each carries its own appearance stream, so
+    viewers that do not draw highlights themselves still show it. Returns
+    the number added.
+    """
+    if not rects:
+        return 0
+    gs = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/ExtGState"),
+        NameObject("/BM"): NameObject("/Multiply"),
+    }))
+    resources = DictionaryObject({
+        NameObject("/ExtGState"): DictionaryObject({NameObject("/GS0"): gs}),
+    })
+    annots = page.get("/Annots")
+    annots = ArrayObject(annots.get_object()) if annots is not None else ArrayObject()
+    r, g, b = color
+    for x0, y0, x1, y1 in rects:
+        x0, y0, x1, y1 = x0 - PAD, y0 - PAD, x1 + PAD, y1 + PAD
+        ap = DecodedStreamObject()
+        ap.set_data(f"/GS0 gs {r:.3f} {g:.3f} {b:.3f} rg {x0:.2f} {y0:.2f} {x1 - x0:.2f} {y1 - y0:.2f} re f"
+                    .encode("ascii"))
+        ap.update({
+            NameObject("/Type"): NameObject("/XObject"),
+            NameObject("/Subtype"): NameObject("/Form"),
+            NameObject("/BBox"): _floats((x0, y0, x1, y1)),
+            NameObject("/Resources"): resources,
+        })
+        annot = DictionaryObject({
+            NameObject("/Type"): NameObject("/Annot"),
+            NameObject("/Subtype"): NameObject("/Highlight"),
+            NameObject("/Rect"): _floats((x0, y0, x1, y1)),
+            NameObject("/QuadPoints"): _floats((x0, y1, x1, y1, x0, y0, x1, y0)),
+            NameObject("/C"): _floats(color),
+            NameObject("/F"): NumberObject(4),  # print
+            NameObject("/AP"): DictionaryObject({NameObject("/N"): writer._add_object(ap)}),
+        })
+        if note:
+            annot[NameObject("/Contents")] = TextStringObject(note)
+        annots.append(writer._add_object(annot))
+    page[NameObject("/Annots")] = annots
+    return len(rects)
@@ -0,0 +1,90 @@
+# binder/incremental.py — reuse unchanged sections from the previous build
+
+import hashlib
+import json
+import os
+import weakref
+
+from binder.cover_cache import COVER_LAYOUT_VERSION
+from binder.resources import font_signature
+from binder.merge import open_pdf
+
+
+def section_key(entry, ref_key, combine_covers=True, compact=None, outline=False) -> str:
+    """
+    Content hash of one section as it appears in the binder: cover text,
+    attachment identities (via ref_key) and page selections, highlight
+    terms, and the cover rendering, compact and outline settings (with
+    outline the attachments' own bookmarks are not in the section's pages).
+    """
+    payload = {
+        "spec": (entry.get("spec") or "").strip(),
+        "product": (entry.get("product") or "").strip(),
+        "pdfs": [[ref_key(ref), (ref.get("pages") or "") if isinstance(ref, dict) else ""]
+                 for ref in entry.get("pdfs", [])],
+        "highlights": list(entry.get("highlights") or []),
+        "render": [bool(combine_covers), COVER_LAYOUT_VERSION, repr(font_signature()),
+                   sorted((compact or {}).items()) if compact is not None else None, bool(outline)],
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _remove_files(paths):
+    for p in list(paths):
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+
+class BuildState:
+    """
+    The last binder built for a session plus the (start, stop) page range of
+    every section in it, keyed by section_key. build_binder copies unchanged
+    sections out of this output by page range instead of re-rendering covers
+    and re-reading attachments.
+
+    When the output is a file on disk (built by a pool worker), `path` names
+    it so the next worker can read it; the file is deleted when replaced.
+    """
+
+    def __init__(self):
+        self.output = None
+        self.ranges = {}
+        self.last_stats = {"reused": 0, "rendered": 0}
+        self._reader = None
+        self._paths = []
+        self._finalizer = weakref.finalize(self, _remove_files, self._paths)
+
+    @property
+    def path(self):
+        return self._paths[0] if self._paths else None
+
+    def range_for(self, key):
+        return self.ranges.get(key)
+
+    def reader(self):
+        """PdfReader over the previous output (opened on first use)."""
+        if self._reader is None and self.output is not None:
+            self._reader = open_pdf(self.output)
+        return self._reader
+
+    def replace(self, output, ranges, stats, path=None):
+        """Adopt a new build; the previous output is closed (and its file removed)."""
+        old = self.output
+        self.output = output
+        self.ranges = dict(ranges)
+        self.last_stats = dict(stats)
+        self._reader = None
+        if old is not None and old is not output:
+            try:
+                old.close()
+            except Exception:
+                pass
+        old_paths = [p for p in self._paths if p != path]
+        self._paths[:] = [path] if path else []
+        _remove_files(old_paths)
+
+    def close(self):
+        self.replace(None, {}, {"reused": 0, "rendered": 0})
@@ -0,0 +1,99 @@
+# binder/jobs.py — run a binder build in the background with progress and cancel
+
+import threading
+import time
+
+
+class BuildCancelled(Exception):
+    """Raised inside a build when its job has been cancelled."""
+
+
+class BuildJob:
+    """
+    Runs `target(progress=callback)` on a daemon thread.
+
+    The callback is called by build_binder as progress(done, total, pages, stage);
+    it records the numbers for the UI and raises BuildCancelled once cancel()
+    has been requested, which unwinds the build before anything is replaced.
+    The result (or error) stays on the job, so a session keeps serving it
+    across reruns until the next build replaces the job.
+    """
+
+    def __init__(self, target, name="binder-build"):
+        self._target = target
+        self._name = name
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.status = "pending"      # pending | running | done | failed | cancelled
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.progress = {"done": 0, "total": 0, "pages": 0, "stage": "queued"}
+
+    @classmethod
+    def completed(cls, result):
+        """A job that is already done with `result` (e.g. a binder served from the cache)."""
+        job = cls(target=None)
+        job.status = "done"
+        job.result = result
+        job.started = job.finished = time.time()
+        return job
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self.status = "running"
+            self.started = time.time()
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+        self._thread.start()
+        return self
+
+    @property
+    def running(self):
+        return self.status in ("pending", "running")
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def fraction(self):
+        """Rough completion in [0, 1] for a progress bar."""
+        p = self.progress
+        if self.status == "done":
+            return 1.0
+        if not p["total"]:
+            return 0.0
+        return min(p["done"] / p["total"], 1.0) * 0.95
+
+    def cancel(self):
+        """Ask the build to stop at its next progress report."""
+        self._cancel.set()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.running
+
+    def _report(self, done, total, pages, stage="sections"):
+        if self._cancel.is_set():
+            raise BuildCancelled()
+        self.progress = {"done": done, "total": total, "pages": pages, "stage": stage}
+
+    def _run(self):
+        try:
+            result = self._target(progress=self._report)
+        except BuildCancelled:
+            self.status = "cancelled"
+        except Exception as e:
+            self.error = e
+            self.status = "failed"
+        else:
+            self.result = result
+            self.status = "done"  # finished before the cancel was seen; keep it
+        finally:
+            self.finished = time.time()
@@ -0,0 +1,131 @@
+# binder/layout.py — measured-width text wrapping and font-size fitting
+
+import re
+import threading
+from functools import lru_cache
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# Widths are tabulated at this size and scaled linearly.
+_UNIT = 1000.0
+
+_WORD_RE = re.compile(r"(\S+)(\s*)")
+
+_tables_lock = threading.Lock()
+_glyph_tables = {}
+
+
+def glyph_widths(font):
+    """
+    Per-font table of glyph widths at 1000 pt, shared process-wide.
+    Filled once per (font, character); ASCII is measured up front.
+    """
+    table = _glyph_tables.get(font)
+    if table is None:
+        with _tables_lock:
+            table = _glyph_tables.get(font)
+            if table is None:
+                table = {chr(cp): stringWidth(chr(cp), font, _UNIT) for cp in range(32, 127)}
+                _glyph_tables[font] = table
+    return table
+
+
+@lru_cache(maxsize=8192)
+def _word_units(word, font):
+    table = glyph_widths(font)
+    total = 0.0
+    for ch in word:
+        w = table.get(ch)
+        if w is None:
+            w = table[ch] = stringWidth(ch, font, _UNIT)
+        total += w
+    return total
+
+
+def text_width(text, font, size):
+    """Width of `text` in points, from the cached glyph table."""
+    return _word_units(text, font) * size / _UNIT
+
+
+def wrap_lines(text, font, size, max_width, indent=0.0):
+    """
+    Greedy word wrap by measured width. Continuation lines get `max_width - indent`.
+    Spacing between words on a line is kept as written; breaks drop it.
+    A word wider than the line is split by character.
+    Returns a list of lines ([] for blank text).
+    """
+    chunks = _WORD_RE.findall((text or "").strip())
+    if not chunks:
+        return []
+    scale = size / _UNIT
+    lines = []
+    cur = ""        # current line, including the pending gap after its last word
+    cur_w = 0.0     # width of cur without that gap
+    gap_w = 0.0     # width of the pending gap
+    avail = max_width
+
+    for word, gap in chunks:
+        w = _word_units(word, font) * scale
+        if cur and cur_w + gap_w + w <= avail:
+            cur += word
+            cur_w += gap_w + w
+        else:
+            if cur:
+                lines.append(cur.rstrip())
+                avail = max_width - indent
+                cur, cur_w = "", 0.0
+            if w <= avail:
+                cur, cur_w = word, w
+            else:
+                # Over-long word: break it across lines by character
+                table = glyph_widths(font)
+                for ch in word:
+                    cw = table.get(ch)
+                    if cw is None:
+                        cw = _word_units(ch, font)
+                    cw *= scale
+                    if cur and cur_w + cw > avail:
+                        lines.append(cur)
+                        avail = max_width - indent
+                        cur, cur_w = "", 0.0
+                    cur += ch
+                    cur_w += cw
+        gap = gap.replace("\t", " ").replace("\n", " ").replace("\r", " ")
+        cur += gap
+        gap_w = _word_units(gap, font) * scale if gap else 0.0
+
+    if cur.strip():
+        lines.append(cur.rstrip())
+    return lines
+
+
+def _fits(text, font, size, max_width, box_height, max_lines, line_gap):
+    lines = wrap_lines(text, font, size, max_width)
+    ok = len(lines) <= max_lines and len(lines) * (size + line_gap) <= box_height
+    return ok, lines
+
+
+def fit_text(text, font, max_width, box_height, max_size=48, min_size=14, max_lines=2, line_gap=6):
+    """
+    Largest whole point size in [min_size, max_size] at which `text` wraps to at
+    most `max_lines` lines that fit `box_height`. Line count only grows as the
+    size grows, so the size is found by bisection (about log2 of the range probes).
+    Returns (size, lines), or (None, lines at min_size) when nothing fits.
+    """
+    lo, hi = int(min_size), int(max_size)
+    ok, lines = _fits(text, font, hi, max_width, box_height, max_lines, line_gap)
+    if ok:
+        return hi, lines
+    ok, best_lines = _fits(text, font, lo, max_width, box_height, max_lines, line_gap)
+    if not ok:
+        return None, best_lines
+    best = lo
+    # Invariant: lo fits, hi does not
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        ok, mid_lines = _fits(text, font, mid, max_width, box_height, max_lines, line_gap)
+        if ok:
+            lo, best, best_lines = mid, mid, mid_lines
+        else:
+            hi = mid
+    return best, best_lines
@@ -0,0 +1,287 @@
+# binder/library.py — persistent local library of product PDFs used in past binders
+
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from binder.blobs import blob_id_for
+from binder.csi import parse_section_number
+
+LIBRARY_DIR = os.path.join(os.path.expanduser("~"), ".wiljo_submittals", "library")
+# Total size of stored PDFs; least recently used ones go first past this.
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024 * 1024
+# Characters of first-page text kept for search
+FIRST_TEXT_CHARS = 2000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    blob_id    TEXT PRIMARY KEY,
+    name       TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    pages      INTEGER,
+    first_text TEXT,
+    added      REAL NOT NULL,
+    last_used  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    blob_id     TEXT NOT NULL,
+    spec_number TEXT NOT NULL,
+    spec        TEXT NOT NULL,
+    product     TEXT NOT NULL,
+    UNIQUE (blob_id, spec, product)
+);
+CREATE INDEX IF NOT EXISTS tags_spec_number ON tags(spec_number);
+CREATE INDEX IF NOT EXISTS items_last_used ON items(last_used);
+"""
+
+
+def spec_number(spec) -> str:
+    """
+    '09 22 16 Non-Structural Framing' -> '092216', '09.22.16.13 ...' ->
+    '092216.13' ('' when there is no number; see csi.parse_section_number).
+    """
+    number = parse_section_number(spec)
+    if number is None:
+        return ""
+    division, level2, level3, level4 = number
+    return f"{division:02d}{level2:02d}{level3:02d}" + (f".{level4:02d}" if level4 else "")
+
+
+def first_page_text(data, limit=FIRST_TEXT_CHARS) -> tuple:
+    """(page count, first-page text) of a PDF buffer; (None, "") if unreadable."""
+    from binder.merge import open_pdf
+
+    reader = None
+    try:
+        reader = open_pdf(data)
+        pages = len(reader.pages)
+        text = reader.pages[0].extract_text() if pages else ""
+        return pages, " ".join((text or "").split())[:limit]
+    except Exception:
+        return None, ""
+    finally:
+        if reader is not None:
+            try:
+                reader.stream.close()
+            except Exception:
+                pass
+
+
+class ProductLibrary:
+    """
+    Product PDFs kept across projects, stored once per content hash under
+    `root` and indexed (SQLite) by spec section number, spec and product
+    names they were attached under, file name and first-page text.
+
+    add() copies the file and extracts its first-page text in a background
+    thread; search() is a plain indexed query, fast enough to run on every
+    rerun. Stored bytes are capped at max_bytes by least-recent use;
+    entries pinned by a session (see pin) are never evicted.
+    """
+
+    def __init__(self, root=LIBRARY_DIR, max_bytes=DEFAULT_MAX_BYTES, workers=1):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._workers = workers
+        self._lock = threading.RLock()
+        self._db = None
+        self._pool = None
+        self._pending = {}
+        self._pins = Counter()  # blob_id -> sessions serving its file straight from the library
+
+    # ---- storage ----
+    def path(self, blob_id) -> str:
+        return os.path.join(self.root, f"{blob_id}.pdf")
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(self.root, exist_ok=True)
+            db = sqlite3.connect(os.path.join(self.root, "index.sqlite"), check_same_thread=False)
+            db.executescript(_SCHEMA)
+            # Tags saved by older versions missed numbers written as 09.22.16 or 09-22-16
+            for rowid, spec in db.execute("SELECT rowid, spec FROM tags WHERE spec_number = ''").fetchall():
+                if spec_number(spec):
+                    db.execute("UPDATE tags SET spec_number = ? WHERE rowid = ?", (spec_number(spec), rowid))
+            db.commit()
+            self._db = db
+        return self._db
+
+    def __contains__(self, blob_id):
+        with self._lock:
+            row = self._conn().execute("SELECT 1 FROM items WHERE blob_id = ?", (blob_id,)).fetchone()
+        return row is not None and os.path.exists(self.path(blob_id))
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn().execute("SELECT COALESCE(SUM(size), 0) FROM items").fetchone()[0]
+
+    # ---- writes ----
+    def add(self, data, name, spec="", product="", blob_id=None):
+        """
+        Remember `data` (a PDF buffer) under `name`, tagged with the section it
+        was attached to. Known files only gain the tag. The copy and text
+        extraction run in the background; returns the blob ID.
+        """
+        blob_id = blob_id or blob_id_for(data)
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            known = db.execute("SELECT 1 FROM items WHERE blob_id = ?", (blob_id,)).fetchone()
+            if known:
+                db.execute("UPDATE items SET last_used = ? WHERE blob_id = ?", (now, blob_id))
+            elif blob_id not in self._pending:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="library")
+                self._pending[blob_id] = self._pool.submit(self._store, blob_id, data, name, now)
+            self._tag(blob_id, spec, product)
+            db.commit()
+        return blob_id
+
+    def _tag(self, blob_id, spec, product):
+        spec, product = (spec or "").strip(), (product or "").strip()
+        if spec or product:
+            self._conn().execute(
+                "INSERT OR IGNORE INTO tags (blob_id, spec_number, spec, product) VALUES (?, ?, ?, ?)",
+                (blob_id, spec_number(spec), spec, product),
+            )
+
+    def _store(self, blob_id, data, name, now):
+        try:
+            path = self.path(blob_id)
+            if not os.path.exists(path):
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+                with open(tmp, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+            pages, text = first_page_text(data)
+            with self._lock:
+                db = self._conn()
+                db.execute(
+                    "INSERT OR REPLACE INTO items (blob_id, name, size, pages, first_text, added, last_used)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (blob_id, name, len(data), pages, text, now, now),
+                )
+                db.commit()
+            self.evict()
+        finally:
+            with self._lock:
+                self._pending.pop(blob_id, None)
+
+    def pin(self, blob_id):
+        """
+        Keep `blob_id`'s file from eviction until the returned release() is
+        called; BlobStore.put_file calls it when the session lets go of the file.
+        """
+        with self._lock:
+            self._pins[blob_id] += 1
+        released = []
+
+        def release():
+            with self._lock:
+                if released:
+                    return
+                released.append(True)
+                self._pins[blob_id] -= 1
+                if self._pins[blob_id] <= 0:
+                    del self._pins[blob_id]
+
+        return release
+
+    def touch(self, blob_ids):
+        """Mark entries as just used (they move to the back of the eviction order)."""
+        with self._lock:
+            db = self._conn()
+            db.executemany("UPDATE items SET last_used = ? WHERE blob_id = ?",
+                           [(time.time(), b) for b in blob_ids])
+            db.commit()
+
+    def remove(self, blob_id):
+        with self._lock:
+            db = self._conn()
+            db.execute("DELETE FROM items WHERE blob_id = ?", (blob_id,))
+            db.execute("DELETE FROM tags WHERE blob_id = ?", (blob_id,))
+            db.commit()
+        try:
+            os.remove(self.path(blob_id))
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop least-recently-used entries until the library is under max_bytes; pinned ones stay."""
+        with self._lock:
+            total = self.total_bytes
+            if total <= self.max_bytes:
+                return
+            rows = self._conn().execute("SELECT blob_id, size FROM items ORDER BY last_used").fetchall()
+            for blob_id, size in rows:
+                if total <= self.max_bytes:
+                    break
+                if self._pins.get(blob_id):
+                    continue  # a session serves this file; its builds read it by path
+                self.remove(blob_id)
+                total -= size
+
+    def wait(self, timeout=None):
+        """Block until background adds have finished (tests, shutdown)."""
+        with self._lock:
+            futures = list(self._pending.values())
+        for fut in futures:
+            try:
+                fut.result(timeout=timeout)
+            except Exception:
+                pass
+
+    # ---- queries ----
+    def search(self, query="", limit=100):
+        """
+        Entries matching every word of `query` in their spec number, spec or
+        product tags, file name or first-page text; most recently used first.
+        Returns [{"blob", "name", "size", "pages", "specs": [(spec, product), ...]}].
+        """
+        terms = [t for t in (query or "").split() if t]
+        where, args = [], []
+        for t in terms:
+            like = f"%{t}%"
+            # A typed section number matches however it was written on the section
+            digits = spec_number(t) or t.replace(" ", "").replace(".", "").replace("-", "")
+            where.append(
+                "(i.name LIKE ? OR i.first_text LIKE ? OR EXISTS (SELECT 1 FROM tags t WHERE t.blob_id = i.blob_id"
+                " AND (t.spec LIKE ? OR t.product LIKE ? OR t.spec_number LIKE ?)))"
+            )
+            args += [like, like, like, like, f"{digits}%"]
+        sql = "SELECT i.blob_id, i.name, i.size, i.pages FROM items i"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY i.last_used DESC LIMIT ?"
+        with self._lock:
+            db = self._conn()
+            rows = db.execute(sql, args + [limit]).fetchall()
+            tags = {}
+            for blob_id, *_ in rows:
+                tags[blob_id] = db.execute(
+                    "SELECT spec, product FROM tags WHERE blob_id = ? ORDER BY spec_number", (blob_id,)
+                ).fetchall()
+        return [
+            {"blob": b, "name": name, "size": size, "pages": pages, "specs": [tuple(t) for t in tags[b]]}
+            for b, name, size, pages in rows
+            if os.path.exists(self.path(b))
+        ]
+
+
+def describe_item(item) -> str:
+    """Label for the library picker."""
+    text = f"{item['name']} · {item['size'] / 1e6:.1f} MB"
+    if item.get("pages"):
+        text += f" · {item['pages']} p"
+    numbers = sorted({spec_number(s) for s, _ in item.get("specs", []) if spec_number(s)})
+    if numbers:
+        text += " · " + ", ".join(numbers[:3])
+    return text
+
+
+# Shared by all sessions in this server process
+product_library = ProductLibrary()
@@ -0,0 +1,133 @@
+# binder/manifest.py — JSON/TOML project manifests for headless builds
+
+import datetime
+import json
+import os
+
+from binder.names import BINDER_FIELDS, RECIPIENT_FIELDS, format_cover_date, suggested_filename
+from binder.textindex import parse_terms
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:  # pragma: no cover
+    tomllib = None
+
+
+class ManifestError(ValueError):
+    """Raised when a manifest is missing required fields or points at missing PDFs."""
+
+
+def load_manifest(path):
+    """
+    Read a manifest file and return a normalized dict:
+        {"output": str, "binder_fields": {...}, "recipients": [{...}, ...],
+         "sections": [{"spec", "product", "pdfs": [...], "highlights": [...]}]}
+    Each pdf is an absolute path, or {"path", "pages"} when only some pages are used.
+
+    Manifest layout (JSON or TOML):
+        output = "Project_2026-01-31.pdf"     # optional
+        [cover]
+        project = "..."        to_name = "..."        to_company = "..."
+        to_addr1 = "..."       to_addr2 = "..."       submitter_name = "..."
+        date = "2026-01-31"    # optional, defaults to today
+        [[recipients]]         # optional: also send to these (same binder, own cover)
+        to_name = "..."        to_company = "..."     to_addr1 = "..."       to_addr2 = "..."
+        [[sections]]
+        spec = "092216 Non-Structural Metal Framing"
+        product = "..."
+        pdfs = ["catalogs/studs.pdf"]   # relative to the manifest's folder
+        # or, for part of a catalog: pdfs = [{path = "catalogs/usg.pdf", pages = "12-14"}]
+        highlights = ["5/8\" Fire code", "Type X"]   # optional, highlighted on the sheets
+    """
+    path = os.path.abspath(path)
+    if path.lower().endswith(".toml"):
+        if tomllib is None:
+            raise ManifestError("TOML manifests need Python 3.11+")
+        try:
+            with open(path, "rb") as fh:
+                raw = tomllib.load(fh)
+        except tomllib.TOMLDecodeError as e:
+            raise ManifestError(f"not valid TOML: {e}") from None
+    else:
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                raw = json.load(fh)
+        except ValueError as e:  # bad JSON or bad UTF-8
+            raise ManifestError(f"not valid JSON: {e}") from None
+    return normalize_manifest(raw, base_dir=os.path.dirname(path))
+
+
+_KINDS = {dict: "a table/object", list: "a list"}
+
+
+def _expect(value, kind, where):
+    """`value` if it is a `kind` (dict or list), else a ManifestError naming the field."""
+    if not isinstance(value, kind):
+        raise ManifestError(f"{where}: expected {_KINDS[kind]}, got {type(value).__name__} {value!r:.60}")
+    return value
+
+
+def normalize_manifest(raw, base_dir="."):
+    """Validate a parsed manifest and resolve its PDF paths against base_dir."""
+    _expect(raw, dict, "manifest")
+    cover = dict(_expect(raw.get("cover") or {}, dict, "cover"))
+    # TOML/JSON may hand over numbers or dates; cover text is always a string
+    d = cover.pop("date", None)
+    cover = {k: str(v if v is not None else "").strip() for k, v in cover.items()}
+    for key in ("project", "to_name"):
+        if not cover.get(key):
+            raise ManifestError(f"cover.{key} is required")
+
+    if isinstance(d, datetime.datetime):
+        d = d.date()
+    elif d is not None and not isinstance(d, datetime.date):
+        try:
+            d = datetime.date.fromisoformat(str(d).strip())
+        except ValueError:
+            raise ManifestError(f"cover.date: expected YYYY-MM-DD, got {d!r}") from None
+    d = d or datetime.date.today()
+
+    binder_fields = {k: cover.get(k, "") for k in BINDER_FIELDS if k != "date_str"}
+    binder_fields["date_str"] = format_cover_date(d)
+
+    sections = []
+    for i, sec in enumerate(_expect(raw.get("sections") or [], list, "sections")):
+        _expect(sec, dict, f"sections[{i}]")
+        pdfs = []
+        for k, p in enumerate(_expect(sec.get("pdfs") or [], list, f"sections[{i}].pdfs")):
+            pages = None
+            if isinstance(p, dict):
+                p, pages = p.get("path") or "", (str(p.get("pages") or "").strip() or None)
+            if not isinstance(p, str):
+                raise ManifestError(f"sections[{i}].pdfs[{k}]: expected a path, got {type(p).__name__} {p!r:.60}")
+            full = p if os.path.isabs(p) else os.path.join(base_dir, p)
+            if not os.path.isfile(full):
+                raise ManifestError(f"sections[{i}]: PDF not found: {p}")
+            pdfs.append({"path": full, "pages": pages} if pages else full)
+        highlights = sec.get("highlights") or []
+        if isinstance(highlights, str):
+            highlights = highlights.splitlines()
+        _expect(highlights, list, f"sections[{i}].highlights")
+        sections.append({
+            "spec": str(sec.get("spec") if sec.get("spec") is not None else "").strip(),
+            "product": str(sec.get("product") if sec.get("product") is not None else "").strip(),
+            "pdfs": pdfs,
+            "highlights": parse_terms("\n".join(str(t) for t in highlights)),
+        })
+    if not sections:
+        raise ManifestError("at least one section is required")
+
+    recipients = []
+    for i, rec in enumerate(_expect(raw.get("recipients") or [], list, "recipients")):
+        _expect(rec, dict, f"recipients[{i}]")
+        rec = {k: str(rec.get(k) or "").strip() for k in RECIPIENT_FIELDS}
+        if not (rec["to_name"] or rec["to_company"]):
+            raise ManifestError(f"recipients[{i}]: to_name or to_company is required")
+        recipients.append(rec)
+
+    return {
+        "output": str(raw.get("output") or "") or suggested_filename(binder_fields["project"], d),
+        "binder_fields": binder_fields,
+        "recipients": recipients,
+        "sections": sections,
+    }
@@ -0,0 +1,158 @@
+# binder/merge.py — streaming PDF merge engine
+
+import io
+import mmap
+import tempfile
+
+from PyPDF2 import PdfReader, PdfWriter
+
+# Finished binders up to this size stay in memory; larger ones spill to disk.
+SPOOL_MAX_MEMORY = 16 * 1024 * 1024
+
+
+class BufferStream(io.RawIOBase):
+    """
+    Read-only, seekable file object over a bytes-like buffer
+    (bytes, memoryview, mmap). Reads slice the buffer; nothing is copied up front.
+    """
+
+    def __init__(self, data):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        start = min(self._pos, end)
+        self._pos = max(self._pos, end)
+        return self._view[start:end].tobytes()
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        try:
+            self._view.release()
+        except Exception:
+            pass
+        super().close()
+
+
+def open_pdf(source):
+    """
+    Return a PdfReader for `source` without copying it.
+    Accepts a PdfReader, a seekable binary file object, or any bytes-like buffer.
+    Encrypted files are opened with the empty password when that works.
+    """
+    if isinstance(source, PdfReader):
+        return source
+    # mmap has read()/seek() too, but closing a reader's stream must not close the map
+    if hasattr(source, "read") and hasattr(source, "seek") and not isinstance(source, mmap.mmap):
+        source.seek(0)
+        reader = PdfReader(source, strict=False)
+    else:
+        reader = PdfReader(BufferStream(source), strict=False)
+    if reader.is_encrypted:
+        # Owner-password-only PDFs open with an empty user password
+        try:
+            reader.decrypt("")
+        except Exception:
+            pass
+    return reader
+
+
+def spooled_output(max_memory=SPOOL_MAX_MEMORY):
+    """Binary spooled temp file for a finished binder (rolls to disk past max_memory)."""
+    return tempfile.SpooledTemporaryFile(max_size=max_memory, mode="w+b", suffix=".pdf")
+
+
+class BinderMerger:
+    """
+    Appends PDF parts in order and writes the result as one binder.
+
+    Unlike PdfMerger, parts are handed to the writer as PdfReaders over the
+    caller's buffers, so no temp files and no BytesIO copies are made.
+    """
+
+    def __init__(self):
+        self._writer = PdfWriter()
+        self._streams = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    @property
+    def writer(self):
+        """The underlying PdfWriter (for post-merge passes such as compacting)."""
+        return self._writer
+
+    @property
+    def page_count(self):
+        return len(self._writer.pages)
+
+    def append(self, source, pages=None, outline_item=None, import_outline=True):
+        """
+        Append `source` (buffer, file object or PdfReader).
+        `pages` is an optional (start, stop) tuple or list of page indexes;
+        import_outline=False leaves the source's bookmarks out.
+        Returns the number of pages added.
+        """
+        reader = open_pdf(source)
+        if isinstance(reader.stream, BufferStream):
+            self._streams.append(reader.stream)
+        before = self.page_count
+        self._writer.append(reader, outline_item=outline_item, pages=pages, import_outline=import_outline)
+        return self.page_count - before
+
+    def write(self, fileobj):
+        """Write the binder to an open binary file object."""
+        self._writer.write(fileobj)
+
+    def write_spooled(self, max_memory=SPOOL_MAX_MEMORY):
+        """Write the binder to a spooled temp file, rewound and ready to read."""
+        out = spooled_output(max_memory)
+        try:
+            self.write(out)
+        except Exception:
+            out.close()
+            raise
+        out.seek(0)
+        return out
+
+    def close(self):
+        """Drop the writer and release the input buffers."""
+        self._writer = PdfWriter()
+        for s in self._streams:
+            try:
+                s.close()
+            except Exception:
+                pass
+        self._streams = []
@@ -0,0 +1,135 @@
+# binder/names.py — cover field names, dates, output file names and page selections (no PDF libraries)
+
+import os
+import re
+from functools import lru_cache
+
+BINDER_FIELDS = ("date_str", "to_name", "to_company", "to_addr1", "to_addr2", "project", "submitter_name")
+# The cover's "To:" block; the only fields that differ between recipients of one submittal
+RECIPIENT_FIELDS = ("to_name", "to_company", "to_addr1", "to_addr2")
+
+
+@lru_cache(maxsize=4096)
+def section_label(spec, product, file_count):
+    """Section list label, e.g. 'Spec Section: 092216 Framing — Studs  (2 files)' (memoized)."""
+    return (f"Spec Section: {(spec or '').strip()} — {(product or '').strip()}  "
+            f"({file_count} file{'s' if file_count != 1 else ''})")
+
+
+def sanitize_filename(name: str, fallback: str = "Submittal_Binder.pdf") -> str:
+    """Remove illegal filename chars and ensure .pdf extension."""
+    name = (name or "").strip()
+    if not name:
+        return fallback
+    name = re.sub(r'[<>:"/\\|?*]+', "_", name)
+    if not name.lower().endswith(".pdf"):
+        name += ".pdf"
+    return name
+
+
+def format_cover_date(d) -> str:
+    """Cover date as M/D/YYYY (no zero padding, cross-platform)."""
+    try:
+        return d.strftime("%-m/%-d/%Y")  # POSIX
+    except Exception:
+        return d.strftime("%#m/%#d/%Y")  # Windows
+
+
+def suggested_filename(project, d) -> str:
+    """Default binder file name: <Project>_<YYYY-MM-DD>.pdf."""
+    name = ((project or "").strip() or "Submittal_Binder")
+    try:
+        try:
+            date_tag = d.strftime("%Y-%m-%d")
+        except Exception:
+            date_tag = d.strftime("%m-%d-%Y")
+        return f"{name}_{date_tag}.pdf"
+    except Exception:
+        return f"{name}.pdf"
+
+
+def recipient_fields(binder_fields, recipient):
+    """binder_fields with the "To:" block taken from `recipient` (missing keys blank)."""
+    fields = dict(binder_fields)
+    fields.update({k: (recipient.get(k) or "") for k in RECIPIENT_FIELDS})
+    return fields
+
+
+def parse_recipients(text):
+    """
+    Recipients typed one per line as "Name | Company | Address 1 | Address 2"
+    (trailing parts optional); blank lines are skipped.
+    """
+    recipients = []
+    for line in (text or "").splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if not any(parts):
+            continue
+        parts += [""] * (len(RECIPIENT_FIELDS) - len(parts))
+        recipients.append(dict(zip(RECIPIENT_FIELDS, parts)))
+    return recipients
+
+
+def format_recipients(recipients):
+    """The text parse_recipients reads back: one "Name | Company | Address 1 | Address 2" line each."""
+    lines = []
+    for recipient in recipients:
+        parts = [(recipient.get(k) or "").strip() for k in RECIPIENT_FIELDS]
+        while parts and not parts[-1]:
+            parts.pop()
+        lines.append(" | ".join(parts))
+    return "\n".join(lines)
+
+
+def recipient_filename(file_name, recipient):
+    """'Job_2026-01-31.pdf' -> 'Job_2026-01-31_Acme_Builders.pdf' (company, else name)."""
+    who = (recipient.get("to_company") or recipient.get("to_name") or "").strip()
+    if not who:
+        return file_name
+    stem, ext = os.path.splitext(file_name)
+    who = re.sub(r"\s+", "_", who)
+    return sanitize_filename(f"{stem}_{who}{ext or '.pdf'}")
+
+
+def recipient_filenames(file_name, recipients):
+    """recipient_filename for each recipient, numbered where two would clash."""
+    names = []
+    for n, recipient in enumerate(recipients, start=1):
+        name = recipient_filename(file_name, recipient)
+        if name in names:  # same company twice, or no name at all
+            name = recipient_filename(name, {"to_name": str(n)})
+        names.append(name)
+    return names
+
+
+def page_selection(spec, page_count):
+    """
+    0-based page indexes for a 1-based selection such as "1-3, 7, 10-" (open
+    ends run to the first/last page), in the order written, without repeats.
+    Blank or None means every page and returns None. Raises ValueError for
+    bad syntax or pages past `page_count`.
+    """
+    text = (spec or "").strip()
+    if not text:
+        return None
+    pages = []
+    seen = set()
+    for part in text.replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, dash, hi = part.partition("-")
+        try:
+            start = int(lo) if lo.strip() else 1
+            stop = (int(hi) if hi.strip() else page_count) if dash else start
+        except ValueError:
+            raise ValueError(f"not a page or range: {part!r}") from None
+        if start < 1 or stop < start:
+            raise ValueError(f"bad page range: {part!r}")
+        if stop > page_count:
+            raise ValueError(f"page {stop} is past the last page ({page_count})")
+        for n in range(start - 1, stop):
+            if n not in seen:
+                seen.add(n)
+                pages.append(n)
+    return pages or None
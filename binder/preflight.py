@@ -0,0 +1,143 @@
+# binder/preflight.py — upload-time PDF checks and a shared metadata index
+
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Attachments over this size are flagged (they still build).
+LARGE_FILE_BYTES = 100 * 1024 * 1024
+
+
+def inspect_pdf(data) -> dict:
+    """
+    Parse a PDF once and describe it:
+        {"size", "pages", "page_sizes": {"8.5 x 11 in": n, ...},
+         "encrypted", "error", "warnings": [...]}
+    `error` is set when the file cannot go into a binder.
+    """
+    from binder.merge import open_pdf  # PyPDF2 loads in the worker, not on the UI thread
+
+    info = {
+        "size": len(data),
+        "pages": None,
+        "page_sizes": {},
+        "encrypted": False,
+        "error": None,
+        "warnings": [],
+    }
+    reader = None
+    try:
+        reader = open_pdf(data)
+        info["encrypted"] = bool(reader.is_encrypted)
+        pages = reader.pages
+        info["pages"] = len(pages)
+        sizes = Counter()
+        for page in pages:
+            box = page.mediabox
+            w, h = float(box.width) / 72, float(box.height) / 72
+            if int(page.get("/Rotate", 0) or 0) % 180:
+                w, h = h, w
+            sizes[f"{w:.4g} x {h:.4g} in"] += 1
+        info["page_sizes"] = dict(sizes.most_common())
+        if info["pages"] == 0:
+            info["error"] = "PDF has no pages"
+    except Exception as e:
+        name = type(e).__name__
+        if "Decrypt" in name or "password" in str(e).lower():
+            info["error"] = "Encrypted — needs a password to open"
+        else:
+            info["error"] = f"Unreadable PDF ({name}: {e})"
+    finally:
+        if reader is not None:
+            try:
+                reader.stream.close()  # release our view of the caller's buffer
+            except Exception:
+                pass
+    if info["encrypted"] and not info["error"]:
+        info["warnings"].append("encrypted (opens without a password)")
+    if info["size"] > LARGE_FILE_BYTES:
+        info["warnings"].append(f"large file ({info['size'] / 1e6:.0f} MB)")
+    if len(info["page_sizes"]) > 1:
+        info["warnings"].append("mixed page sizes")
+    return info
+
+
+def describe(info) -> str:
+    """One-line summary for the section list."""
+    if info is None:
+        return "⏳ checking…"
+    if info["error"]:
+        return f"❌ {info['error']}"
+    pages = info["pages"]
+    text = f"{pages} page{'s' if pages != 1 else ''} · {info['size'] / 1e6:.1f} MB"
+    if info["warnings"]:
+        text += " · ⚠️ " + ", ".join(info["warnings"])
+    return text
+
+
+class MetadataIndex:
+    """
+    Process-wide index of inspect_pdf results keyed by content hash.
+    submit() parses in a background thread; the same file uploaded by
+    any session is parsed once.
+    """
+
+    def __init__(self, max_entries=8192, workers=2):
+        self.max_entries = max_entries
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._infos = OrderedDict()
+        self._pending = {}
+        self._pool = None
+
+    def get(self, blob_id):
+        """Metadata dict, or None while pending / unknown."""
+        with self._lock:
+            info = self._infos.get(blob_id)
+            if info is not None:
+                self._infos.move_to_end(blob_id)
+            return info
+
+    def seed(self, blob_id, info):
+        """Record an info found earlier (e.g. saved with a project) so the file need not be read again."""
+        with self._lock:
+            if blob_id not in self._infos and blob_id not in self._pending:
+                self._infos[blob_id] = info
+                while len(self._infos) > self.max_entries:
+                    self._infos.popitem(last=False)
+
+    def submit(self, blob_id, data):
+        """Start parsing `data` unless it is already indexed or in flight."""
+        with self._lock:
+            if blob_id in self._infos or blob_id in self._pending:
+                return
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="preflight")
+            self._pending[blob_id] = self._pool.submit(self._run, blob_id, data)
+
+    def wait(self, blob_ids, timeout=None):
+        """Block until every ID in `blob_ids` is indexed; returns {blob_id: info or None}."""
+        with self._lock:
+            futures = [self._pending.get(b) for b in blob_ids]
+        for fut in futures:
+            if fut is not None:
+                try:
+                    fut.result(timeout=timeout)
+                except Exception:
+                    pass
+        return {b: self.get(b) for b in blob_ids}
+
+    def _run(self, blob_id, data):
+        info = inspect_pdf(data)
+        with self._lock:
+            self._pending.pop(blob_id, None)
+            if getattr(data, "closed", False):
+                return None  # buffer went away mid-parse; parse again on the next submit
+            self._infos[blob_id] = info
+            while len(self._infos) > self.max_entries:
+                self._infos.popitem(last=False)
+        return info
+
+
+# Shared by all sessions in this server process
+metadata_index = MetadataIndex()
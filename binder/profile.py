@@ -0,0 +1,120 @@
+# binder/profile.py — per-stage timings, bytes, pages and memory for one build
+
+import json
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource  # not on Windows
+except ImportError:  # pragma: no cover
+    resource = None
+
+log = logging.getLogger(__name__)
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process so far (MB), or None if unknown.
+    A high-water mark over the process's whole life, earlier builds included.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def current_rss_mb():
+    """Resident memory of this process right now (MB), or None where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as fh:
+            resident = int(fh.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(resident * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+
+
+def buffer_size(buf):
+    """Byte length of a buffer or seekable file, or None."""
+    try:
+        return len(buf)
+    except TypeError:
+        pass
+    try:
+        pos = buf.tell()
+        buf.seek(0, 2)
+        size = buf.tell()
+        buf.seek(pos)
+        return size
+    except Exception:
+        return None
+
+
+class BuildProfile:
+    """
+    Records what a build spent where. build_binder fills it when passed one:
+      stages: [{"stage", "ms", "pages", "bytes_in", "bytes_out", "rss_mb", "rss_delta_mb"}]
+      files:  [{"section", "file", "ms", "bytes", "pages"}]   (one per attachment read)
+    rss_mb is resident memory when the stage ended and rss_delta_mb how much
+    it grew (or shrank) during the stage. The process-wide high-water mark
+    (which can predate this build) is only reported once, in as_dict().
+    as_dict() is plain JSON, so a profile made in a pool worker travels back as-is.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = []
+        self.files = []
+
+    @contextmanager
+    def stage(self, name):
+        """Time a stage; the body may set "pages", "bytes_in" and "bytes_out" on the yielded dict."""
+        rec = {"stage": name, "ms": 0.0, "pages": None, "bytes_in": None, "bytes_out": None}
+        rss0 = current_rss_mb()
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            rec["rss_mb"] = current_rss_mb()
+            rec["rss_delta_mb"] = round(rec["rss_mb"] - rss0, 1) if rss0 is not None else None
+            self.stages.append(rec)
+
+    def add_file(self, section, name, seconds, size, pages):
+        self.files.append({
+            "section": section,
+            "file": name,
+            "ms": round(seconds * 1000, 1),
+            "bytes": size,
+            "pages": pages,
+        })
+
+    def as_dict(self):
+        return {
+            "started": self.started,
+            "total_ms": round(sum(s["ms"] for s in self.stages), 1),
+            "process_peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            "files": self.files,
+        }
+
+
+def log_profile(profile, **context):
+    """
+    Emit one JSON line for a finished build on the "binder.profile" logger
+    (INFO, to stderr unless logging is configured elsewhere). `profile` is a
+    BuildProfile or its as_dict(); `context` adds fields such as sections.
+    """
+    data = profile.as_dict() if isinstance(profile, BuildProfile) else dict(profile)
+    record = {"event": "binder_build", **context, **{k: v for k, v in data.items() if k != "files"}}
+    record["files"] = len(data.get("files", []))
+    record["slowest_files"] = sorted(data.get("files", []), key=lambda f: -f["ms"])[:5]
+    if not log.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+    log.info(json.dumps(record, sort_keys=True, default=str))
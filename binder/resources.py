@@ -0,0 +1,69 @@
+# binder/resources.py — fonts and logo, loaded once per process
+
+import os
+import threading
+from functools import lru_cache
+
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+FONT_FILES = {
+    "WILJO-SERIF": "LiberationSerif-Regular.ttf",
+    "WILJO-SERIF-BOLD": "LiberationSerif-Bold.ttf",
+}
+
+_fonts_lock = threading.Lock()
+
+
+def resource_path(*parts):
+    """Repo-relative path (works on Streamlit Cloud and locally)."""
+    base = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base, *parts)
+
+
+@lru_cache(maxsize=None)
+def register_fonts():
+    """
+    Register the bundled LiberationSerif TTFs (parsed once per process).
+    Returns (regular, bold) font names; falls back to Times if the files are missing.
+    """
+    with _fonts_lock:
+        try:
+            for name, fn in FONT_FILES.items():
+                if name not in pdfmetrics.getRegisteredFontNames():
+                    pdfmetrics.registerFont(TTFont(name, resource_path("fonts", fn)))
+            return "WILJO-SERIF", "WILJO-SERIF-BOLD"
+        except Exception:
+            return "Times-Roman", "Times-Bold"
+
+
+@lru_cache(maxsize=None)
+def font_signature():
+    """Font names plus TTF size/mtime, so cached covers are re-rendered when fonts change."""
+    sig = list(register_fonts())
+    for fn in FONT_FILES.values():
+        try:
+            st_ = os.stat(resource_path("fonts", fn))
+            sig.append((fn, st_.st_size, int(st_.st_mtime)))
+        except OSError:
+            pass
+    return tuple(sig)
+
+
+@lru_cache(maxsize=8)
+def load_logo_imagereader(filename="wiljo_logo.png"):
+    """
+    Load a bundled logo as ImageReader (repo root), decoded once per process.
+    Returns None if the file is missing or unreadable.
+    """
+    for p in (resource_path(filename), filename):
+        if os.path.exists(p):
+            try:
+                ir = ImageReader(p)
+                ir.getSize()
+                ir.getRGBData()  # decode now so sessions share the pixels read-only
+                return ir
+            except Exception:
+                pass
+    return None
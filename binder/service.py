@@ -0,0 +1,322 @@
+# binder/service.py — one build worker pool per server, with admission control
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from binder.jobs import BuildCancelled, BuildJob
+
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+# Jobs waiting beyond the ones running; more are turned away with ServiceBusy.
+DEFAULT_MAX_QUEUE = 16
+# Estimated memory of all running builds together; jobs wait until theirs fits.
+DEFAULT_MEMORY_BUDGET = 1536 * 1024 * 1024
+# Peak memory of a build, measured roughly: PyPDF2 holds every attachment's
+# parsed objects plus the writer's copies, about 3x the input bytes.
+MEMORY_BASE = 64 * 1024 * 1024
+MEMORY_PER_INPUT_BYTE = 3
+OUTPUT_DIR = os.path.join(tempfile.gettempdir(), "wiljo_builds")
+
+
+class ServiceBusy(RuntimeError):
+    """Raised by submit() when the build queue is full."""
+
+
+def estimate_memory(input_bytes, previous_bytes=0):
+    """Rough peak memory (bytes) of one build over `input_bytes` of attachments."""
+    return MEMORY_BASE + MEMORY_PER_INPUT_BYTE * input_bytes + previous_bytes
+
+
+def _remove_outputs(result):
+    """Delete the output files of a worker result that was not adopted."""
+    for path in [result.get("path"), *(result.get("copies") or ())]:
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _worker_build(job_id, request, events, cancelled):
+    """
+    Runs in a pool process. Attachments and the previous output are read from
+    disk by path; the binder is written to a file in OUTPUT_DIR and its path
+    returned with the section ranges, stats, compact report, highlight counts
+    and build profile. Highlight terms are found through the shared text
+    index files; request["page_counts"] (blob id -> pages, from the upload
+    preflight) lets bookmarks and TOC numbers be planned without opening
+    the attachments first.
+
+    With request["recipients"] the binder is built for the first one and
+    readdressed to the rest (build.build_for_recipients); their files come
+    back as "copies", in recipient order.
+    """
+    from binder.build import build_binder, build_for_recipients, map_file
+    from binder.incremental import BuildState
+    from binder.profile import BuildProfile
+    from binder.textindex import make_highlighter, text_index
+
+    maps = {}
+
+    def load_pdf(ref):
+        mm = maps.get(ref["blob"])
+        if mm is None:
+            mm = maps[ref["blob"]] = map_file(request["blob_paths"][ref["blob"]])
+        return mm
+
+    def progress(done, total, pages, stage):
+        if job_id in cancelled:
+            raise BuildCancelled()
+        events.put((job_id, done, total, pages, stage))
+
+    state = BuildState()
+    previous = request.get("previous")
+    if previous:
+        try:
+            state.output = open(previous["path"], "rb")
+            state.ranges = dict(previous["ranges"])
+        except OSError:
+            pass  # removed after a failed hand-over: every section is built afresh
+    highlight = None
+    if any(entry.get("highlights") for entry in request["sections"]):
+        paths = request["blob_paths"]
+        highlight = make_highlighter(lambda ref: text_index.pages(ref["blob"], paths[ref["blob"]]))
+    page_counts = request.get("page_counts") or {}
+    report = {}
+    profile = BuildProfile()
+    kwargs = dict(
+        load_pdf=load_pdf,
+        state=state,
+        ref_key=lambda p: p["blob"],
+        report=report,
+        progress=progress,
+        profile=profile,
+        highlight=highlight,
+        page_count=lambda ref: page_counts.get(ref["blob"]),
+        **request["options"],
+    )
+    out_paths = []
+    try:
+        if request.get("recipients"):
+            outputs = build_for_recipients(request["binder_fields"], request["recipients"], request["sections"],
+                                           **kwargs)
+        else:
+            outputs = [build_binder(request["binder_fields"], request["sections"], **kwargs)]
+        with profile.stage("save") as rec:
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            rec["bytes_out"] = 0
+            for output in outputs:
+                fd, path = tempfile.mkstemp(prefix="binder-", suffix=".pdf", dir=OUTPUT_DIR)
+                out_paths.append(path)
+                with os.fdopen(fd, "wb") as fh:
+                    output.seek(0)
+                    shutil.copyfileobj(output, fh)
+                    rec["bytes_out"] += fh.tell()
+        highlights = report.pop("highlights", [])
+        return {"path": out_paths[0], "copies": out_paths[1:], "ranges": state.ranges, "stats": state.last_stats,
+                "compact": report, "highlights": highlights, "profile": profile.as_dict()}
+    finally:
+        state.close()
+        for mm in maps.values():
+            try:
+                mm.close()
+            except Exception:
+                pass
+
+
+class ServiceJob(BuildJob):
+    """
+    A BuildJob run by the BuildService. `request` is the picklable build
+    input; `on_result(worker_result)` runs back in the server process and its
+    return value becomes job.result.
+    """
+
+    def __init__(self, service, request, memory, on_result=None):
+        super().__init__(target=None)
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.memory = memory
+        self.on_result = on_result or (lambda r: r)
+        self.status = "queued"
+        self.queued_at = None
+        self._service = service
+        self._done = threading.Event()
+
+    @property
+    def running(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def position(self):
+        """1-based place in the wait queue; 0 once running or finished."""
+        return self._service.position(self)
+
+    def start(self):
+        self._service.submit(self)
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+        self._service.cancel(self)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+
+class BuildService:
+    """
+    Process pool shared by every session. Jobs queue FIFO (up to max_queue);
+    one starts when a worker is free and its memory estimate fits in what the
+    running builds leave of memory_budget. A job bigger than the whole budget
+    runs alone. Progress comes back from the workers over a manager queue.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_queue=DEFAULT_MAX_QUEUE,
+                 memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.memory_budget = memory_budget
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._running = {}
+        self._memory_in_use = 0
+        self._pool = None
+        self._ctx = None
+        self._manager = None
+        self._events = None
+        self._cancelled = None
+
+    # ---- queries ----
+    @property
+    def queued(self):
+        return len(self._queue)
+
+    @property
+    def active(self):
+        return len(self._running)
+
+    @property
+    def memory_in_use(self):
+        return self._memory_in_use
+
+    def position(self, job):
+        with self._cond:
+            try:
+                return self._queue.index(job) + 1
+            except ValueError:
+                return 0
+
+    # ---- jobs ----
+    def submit(self, job):
+        """Queue `job`; raises ServiceBusy when max_queue jobs are already waiting."""
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                raise ServiceBusy(f"{len(self._queue)} builds are already waiting; try again shortly")
+            self._ensure_started()
+            job.queued_at = time.time()
+            self._queue.append(job)
+            self._dispatch()
+
+    def cancel(self, job):
+        with self._cond:
+            if job in self._queue:
+                self._queue.remove(job)
+                job.status = "cancelled"
+                job.finished = time.time()
+                job._done.set()
+            elif job.id in self._running:
+                self._cancelled[job.id] = True
+
+    # ---- internals ----
+    def _ensure_started(self):
+        if self._pool is not None:
+            return
+        # spawn: the server process is multi-threaded, so forking it is unsafe
+        ctx = multiprocessing.get_context("spawn")
+        self._manager = ctx.Manager()
+        self._events = self._manager.Queue()
+        self._cancelled = self._manager.dict()
+        self._ctx = ctx
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+        threading.Thread(target=self._pump_progress, name="build-progress", daemon=True).start()
+
+    def _dispatch(self):
+        """Start queued jobs while workers and memory allow (lock held)."""
+        while self._queue and len(self._running) < self.workers:
+            job = self._queue[0]
+            if self._running and self._memory_in_use + job.memory > self.memory_budget:
+                break
+            self._queue.popleft()
+            try:
+                fut = self._submit_to_pool(job)
+            except Exception as e:
+                job.error = e
+                job.status = "failed"
+                job.finished = time.time()
+                job._done.set()
+                continue
+            self._running[job.id] = job
+            self._memory_in_use += job.memory
+            job.status = "running"
+            job.started = time.time()
+            job.progress = dict(job.progress, stage="covers")
+            fut.add_done_callback(lambda f, job=job: self._finish(job, f))
+
+    def _submit_to_pool(self, job):
+        """Hand `job` to the pool, once more on a fresh pool if the current one is broken (lock held)."""
+        try:
+            return self._pool.submit(_worker_build, job.id, job.request, self._events, self._cancelled)
+        except (BrokenProcessPool, RuntimeError):
+            # A worker died, or the pool was shut down, since the last job finished
+            self._reset_pool()
+            return self._pool.submit(_worker_build, job.id, job.request, self._events, self._cancelled)
+
+    def _reset_pool(self):
+        self._pool.shutdown(wait=False, cancel_futures=False)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._ctx)
+
+    def _finish(self, job, fut):
+        result = None
+        try:
+            result = fut.result()
+            job.result = job.on_result(result)
+            job.status = "done"
+        except BuildCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            if result is not None:
+                # on_result failed, so nothing took the worker's files over
+                _remove_outputs(result)
+            job.error = e
+            job.status = "failed"
+        job.finished = time.time()
+        with self._cond:
+            if isinstance(job.error, BrokenProcessPool) and getattr(self._pool, "_broken", False):
+                # A worker died (e.g. killed for memory); later jobs get a fresh pool
+                self._reset_pool()
+            self._running.pop(job.id, None)
+            self._memory_in_use -= job.memory
+            self._cancelled.pop(job.id, None)
+            self._dispatch()
+        job._done.set()
+
+    def _pump_progress(self):
+        while True:
+            try:
+                job_id, done, total, pages, stage = self._events.get()
+            except Exception:
+                return  # manager shut down
+            job = self._running.get(job_id)
+            if job is not None:
+                job.progress = {"done": done, "total": total, "pages": pages, "stage": stage}
+
+
+# Shared by all sessions in this server process
+build_service = BuildService()
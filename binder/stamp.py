@@ -0,0 +1,188 @@
+# binder/stamp.py — section and binder page numbers written straight into page content
+
+from PyPDF2.generic import (
+    ArrayObject,
+    DecodedStreamObject,
+    DictionaryObject,
+    IndirectObject,
+    NameObject,
+)
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from binder.csi import section_number_text
+
+STAMP_FONT = "Helvetica"  # a standard font: nothing to embed
+STAMP_SIZE = 8
+# Distance of the stamp baseline from the bottom edge, and of the text from the sides (points);
+# below the cover footer
+STAMP_Y = 18
+STAMP_X = 36
+# First line of every stamp stream, so a later build can find and replace it
+STAMP_MARKER = b"% binder stamp\n"
+_FONT_NAME = NameObject("/WiljoStamp")
+_SAVE = b"q\n"
+
+
+def stamp_label(spec):
+    """'092216 Non-Structural Metal Framing' -> 'Section 092216' (the whole label without a number)."""
+    spec = (spec or "").strip()
+    return f"Section {section_number_text(spec) or spec}".strip()
+
+
+def _pdf_string(text):
+    raw = text.encode("cp1252", "replace")  # WinAnsiEncoding
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def _fit(text, width):
+    """`text` cut (with an ellipsis) to at most `width` points."""
+    if stringWidth(text, STAMP_FONT, STAMP_SIZE) <= width:
+        return text
+    while text and stringWidth(text + "…", STAMP_FONT, STAMP_SIZE) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def _display_matrix(page):
+    """
+    (cm operands, width, height): maps the page as displayed (after /Rotate,
+    origin at the crop box's lower left) to page space, so stamps sit at the
+    bottom of what the reader sees.
+    """
+    box = page.cropbox
+    llx, lly = float(box.left), float(box.bottom)
+    w, h = float(box.width), float(box.height)
+    rotate = int(page.get("/Rotate", 0) or 0) % 360
+    if rotate == 90:
+        return (0, 1, -1, 0, llx + w, lly), h, w
+    if rotate == 180:
+        return (-1, 0, 0, -1, llx + w, lly + h), w, h
+    if rotate == 270:
+        return (0, -1, 1, 0, llx, lly + h), h, w
+    return (1, 0, 0, 1, llx, lly), w, h
+
+
+def _stamp_ref(page):
+    """Reference to the stamp stream of a page stamped before (e.g. reused from the last build), or None."""
+    contents = page.get("/Contents")
+    contents = contents.get_object() if contents is not None else None
+    if not isinstance(contents, ArrayObject) or len(contents) < 3:
+        return None
+    try:
+        if contents[0].get_object().get_data() == _SAVE and \
+                contents[-1].get_object().get_data().startswith(STAMP_MARKER):
+            return contents[-1]
+    except Exception:
+        pass
+    return None
+
+
+def _replace_object(writer, ref, obj):
+    # In place, so every reference to it stays valid and nothing is left orphaned in the file
+    writer._objects[ref.idnum - 1] = obj
+    obj.indirect_reference = ref
+
+
+def strip_stamp(writer, page):
+    """Remove a stamp added by PageStamper from `page` (a page of `writer`); returns True if there was one."""
+    ref = _stamp_ref(page)
+    if ref is None:
+        return False
+    contents = page["/Contents"]
+    page[NameObject("/Contents")] = ArrayObject(contents[1:-1])
+    # Its font entry too, or the next build would copy that font along with the page
+    fonts = page["/Resources"].get("/Font") if "/Resources" in page else None
+    if fonts is not None and _FONT_NAME in fonts.get_object():
+        del fonts.get_object()[_FONT_NAME]
+    # The stream object stays in the writer; leave it empty
+    empty = DecodedStreamObject()
+    empty.set_data(b"")
+    _replace_object(writer, ref, empty)
+    return True
+
+
+class PageStamper:
+    """
+    Stamps pages of a PdfWriter with "Section X – Page n of m" at the bottom
+    left and "Binder page k of N" at the bottom right. The static parts are
+    shared objects added to the writer once: the font resource and the "q"
+    that isolates each page's own graphics state. Each page then gets one
+    small content stream holding just its numbers; nothing is rendered or
+    merged per page.
+    """
+
+    def __init__(self, writer, total):
+        self.writer = writer
+        self.total = total
+        self._font = None
+        self._save = None
+        self._labels = {}
+
+    def _shared(self):
+        # Added on first use: a writer with nothing to stamp gets neither
+        if self._font is None:
+            self._font = self.writer._add_object(DictionaryObject({
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject(f"/{STAMP_FONT}"),
+                NameObject("/Encoding"): NameObject("/WinAnsiEncoding"),
+            }))
+            save = DecodedStreamObject()
+            save.set_data(_SAVE)
+            self._save = self.writer._add_object(save)
+
+    def _left(self, label, number, count, room):
+        key = (label, room)
+        prefix = self._labels.get(key)
+        if prefix is None:
+            # Room for the longest "– Page n of m" this label will carry
+            tail = stringWidth(f" – Page {count} of {count}", STAMP_FONT, STAMP_SIZE)
+            prefix = self._labels[key] = _fit(label, room - tail)
+        return f"{prefix} – Page {number} of {count}"
+
+    def stamp(self, page, binder_number, label=None, section_number=None, section_pages=None):
+        """
+        Stamp one page (a page of the writer). `label` (see stamp_label) with
+        section_number / section_pages adds the section stamp; without it only
+        the binder page number is printed. A page stamped before gets its
+        numbers replaced.
+        """
+        matrix, width, _ = _display_matrix(page)
+        right = f"Binder page {binder_number} of {self.total}"
+        right_w = stringWidth(right, STAMP_FONT, STAMP_SIZE)
+        ops = [STAMP_MARKER, b"Q q %s cm BT /WiljoStamp %d Tf 0 g\n" % (
+            b" ".join(b"%.2f" % v for v in matrix), STAMP_SIZE)]
+        if label:
+            left = self._left(label, section_number, section_pages, width / 2 - STAMP_X - 12)
+            ops.append(b"1 0 0 1 %.2f %.2f Tm %s Tj\n" % (STAMP_X, STAMP_Y, _pdf_string(left)))
+        ops.append(b"1 0 0 1 %.2f %.2f Tm %s Tj\n" % (width - STAMP_X - right_w, STAMP_Y, _pdf_string(right)))
+        ops.append(b"ET Q\n")
+        stream = DecodedStreamObject()
+        stream.set_data(b"".join(ops))
+
+        self._shared()
+        # Resources are often shared between pages; add to them in place
+        if "/Resources" not in page:
+            page[NameObject("/Resources")] = DictionaryObject()
+        resources = page["/Resources"]
+        if "/Font" not in resources:
+            resources[NameObject("/Font")] = DictionaryObject()
+        resources["/Font"][_FONT_NAME] = self._font
+
+        existing = _stamp_ref(page)
+        if existing is not None:
+            _replace_object(self.writer, existing, stream)
+            # A page from an earlier build shares this build's "q" too, not its own copy
+            page["/Contents"].get_object()[0] = self._save
+            return
+
+        contents = page.raw_get("/Contents") if "/Contents" in page else None
+        if contents is None:
+            parts = []
+        elif isinstance(contents.get_object(), ArrayObject):
+            parts = list(contents.get_object())
+        elif isinstance(contents, IndirectObject):
+            parts = [contents]
+        else:  # a direct stream; array entries must be references
+            parts = [self.writer._add_object(contents)]
+        page[NameObject("/Contents")] = ArrayObject([self._save] + parts + [self.writer._add_object(stream)])
@@ -0,0 +1,494 @@
+# binder/textindex.py — per-page word positions of attachments, cached by content hash
+
+import gzip
+import json
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+TEXT_INDEX_DIR = os.path.join(os.path.expanduser("~"), ".wiljo_submittals", "textindex")
+# Cached indexes past this total size go oldest-first
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Nested form XObjects followed when collecting words
+MAX_FORM_DEPTH = 4
+# A TJ gap wider than this (in text-space ems) separates words
+WORD_GAP_EM = 0.2
+# Glyph boxes: descender and ascender as a share of the font size
+DESCENT, ASCENT = 0.22, 0.82
+
+_IDENTITY = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+# Typographic quotes and dashes match their plain keyboard forms
+_FOLD = str.maketrans({"‘": "'", "’": "'", "′": "'", "“": '"', "”": '"', "″": '"',
+                       "–": "-", "—": "-", "‐": "-", " ": " "})
+
+
+def parse_terms(text):
+    """Search terms typed one per line -> list (blank lines and duplicates dropped)."""
+    terms = []
+    for line in (text or "").splitlines():
+        term = " ".join(line.split())
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+# ---------- extraction ----------
+def _mult(m, n):
+    return [
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    ]
+
+
+def _bbox(m, x0, y0, x1, y1):
+    """Axis-aligned box of the text-space rectangle (x0, y0)-(x1, y1) under matrix m."""
+    xs, ys = [], []
+    for x, y in ((x0, y0), (x1, y0), (x0, y1), (x1, y1)):
+        xs.append(m[0] * x + m[2] * y + m[4])
+        ys.append(m[1] * x + m[3] * y + m[5])
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+class _Font:
+    """Code -> (unicode text, glyph width in 1/1000 em) for one font resource."""
+
+    def __init__(self, name, holder):
+        # Private API, on purpose: word boxes need each glyph's code, text and
+        # width, and extract_text(visitor_text=...) only hands over whole
+        # decoded strings. requirements.txt pins PyPDF2 for this.
+        from PyPDF2._cmap import build_char_map
+
+        _, _, self.encoding, self.map, font = build_char_map(name, 200.0, holder)
+        self.two_byte = isinstance(self.encoding, str) and self.encoding.startswith("utf-16")
+        self._widths = {}
+        self._default = 500.0
+        self._metrics = None
+        scale = 1.0
+        if font.get("/Subtype") == "/Type3" and "/FontMatrix" in font:
+            scale = float(font["/FontMatrix"][0]) * 1000
+        if font.get("/Subtype") == "/Type0":
+            desc = font["/DescendantFonts"][0].get_object()
+            self._default = float(desc.get("/DW", 1000))
+            w = list(desc.get("/W", []))
+            i = 0
+            while i + 1 < len(w):
+                first = int(w[i])
+                nxt = w[i + 1].get_object() if hasattr(w[i + 1], "get_object") else w[i + 1]
+                if isinstance(nxt, list):
+                    for k, width in enumerate(nxt):
+                        self._widths[first + k] = float(width)
+                    i += 2
+                else:
+                    for code in range(first, int(nxt) + 1):
+                        self._widths[code] = float(w[i + 2])
+                    i += 3
+        elif "/Widths" in font:
+            first = int(font.get("/FirstChar", 0))
+            for k, width in enumerate(font["/Widths"]):
+                self._widths[first + k] = float(width) * scale
+        else:
+            # Standard 14 fonts may omit /Widths; reportlab knows their metrics
+            base = str(font.get("/BaseFont", "")).lstrip("/").split("+")[-1]
+            try:
+                from reportlab.pdfbase import pdfmetrics
+
+                self._metrics = pdfmetrics.getFont(base)
+            except Exception:
+                self._metrics = None
+
+    def glyphs(self, raw):
+        step = 2 if self.two_byte else 1
+        for i in range(0, len(raw) - step + 1, step):
+            chunk = raw[i:i + step]
+            code = chunk[0] if step == 1 else (chunk[0] << 8) | chunk[1]
+            if isinstance(self.encoding, str):
+                try:
+                    ch = chunk.decode(self.encoding, "surrogatepass")
+                except Exception:
+                    ch = chunk.decode("charmap")
+            else:
+                ch = self.encoding.get(code, chr(code))
+            ch = self.map.get(ch, ch)
+            if code in self._widths:
+                width = self._widths[code]
+            elif self._metrics is not None:
+                width = self._metrics.stringWidth(ch, 1000)
+            else:
+                width = self._default
+            yield code, ch, width
+
+
+class _PageWords:
+    """Walks one content stream (and the forms it draws) collecting positioned words."""
+
+    def __init__(self, pdf):
+        self.pdf = pdf
+        self.words = []
+        self._fonts = {}
+
+    def font(self, name, holder):
+        key = (id(holder), name)
+        if key not in self._fonts:
+            try:
+                self._fonts[key] = _Font(name, holder)
+            except Exception:
+                self._fonts[key] = None
+        return self._fonts[key]
+
+    def walk(self, content, holder, ctm, depth=0):
+        from PyPDF2.generic import ContentStream
+
+        if content is None:
+            return
+        if not isinstance(content, ContentStream):
+            content = ContentStream(content, self.pdf)
+        resources = holder.get("/Resources")
+        resources = resources.get_object() if resources is not None else {}
+        gs = {"ctm": list(ctm), "Tc": 0.0, "Tw": 0.0, "Th": 1.0, "TL": 0.0, "rise": 0.0,
+              "font": None, "size": 0.0}
+        stack = []
+        tm = list(_IDENTITY)
+        tlm = list(_IDENTITY)
+
+        for operands, op in content.operations:
+            if op == b"q":
+                stack.append(dict(gs))
+            elif op == b"Q":
+                if stack:
+                    gs = stack.pop()
+            elif op == b"cm":
+                gs["ctm"] = _mult([float(v) for v in operands], gs["ctm"])
+            elif op == b"BT":
+                tm, tlm = list(_IDENTITY), list(_IDENTITY)
+            elif op == b"Tf":
+                gs["font"] = self.font(operands[0], holder)
+                gs["size"] = float(operands[1])
+            elif op == b"Tc":
+                gs["Tc"] = float(operands[0])
+            elif op == b"Tw":
+                gs["Tw"] = float(operands[0])
+            elif op == b"Tz":
+                gs["Th"] = float(operands[0]) / 100
+            elif op == b"TL":
+                gs["TL"] = float(operands[0])
+            elif op == b"Ts":
+                gs["rise"] = float(operands[0])
+            elif op in (b"Td", b"TD"):
+                tx, ty = float(operands[0]), float(operands[1])
+                if op == b"TD":
+                    gs["TL"] = -ty
+                tlm = _mult([1.0, 0.0, 0.0, 1.0, tx, ty], tlm)
+                tm = list(tlm)
+            elif op == b"Tm":
+                tlm = [float(v) for v in operands]
+                tm = list(tlm)
+            elif op in (b"T*", b"'", b'"'):
+                if op == b'"':
+                    gs["Tw"], gs["Tc"] = float(operands[0]), float(operands[1])
+                tlm = _mult([1.0, 0.0, 0.0, 1.0, 0.0, -gs["TL"]], tlm)
+                tm = list(tlm)
+                if op != b"T*":
+                    tm = self.show(gs, tm, [operands[-1]])
+            elif op == b"Tj":
+                tm = self.show(gs, tm, [operands[0]])
+            elif op == b"TJ":
+                tm = self.show(gs, tm, operands[0])
+            elif op == b"Do" and depth < MAX_FORM_DEPTH:
+                xobjects = resources.get("/XObject") if resources else None
+                xobj = xobjects.get_object().get(operands[0]) if xobjects is not None else None
+                xobj = xobj.get_object() if xobj is not None else None
+                if xobj is not None and xobj.get("/Subtype") == "/Form":
+                    matrix = [float(v) for v in xobj.get("/Matrix", _IDENTITY)]
+                    form_holder = xobj if "/Resources" in xobj else holder
+                    self.walk(xobj, form_holder, _mult(matrix, gs["ctm"]), depth + 1)
+
+    def show(self, gs, tm, items):
+        """Advance the text matrix over a Tj/TJ operand list, recording words; returns the new tm."""
+        from PyPDF2.generic import TextStringObject
+
+        font, size = gs["font"], gs["size"]
+        if font is None or not size:
+            return tm
+        m = _mult(tm, gs["ctm"])   # text space of this show op -> user space
+        th = gs["Th"]
+        x = 0.0                    # advance along the baseline, in text space
+        word, start = [], 0.0
+        y0, y1 = gs["rise"] - DESCENT * size, gs["rise"] + ASCENT * size
+
+        def flush(end):
+            if word:
+                box = _bbox(m, start, y0, end, y1)
+                self.words.append(["".join(word)] + [round(v, 1) for v in box])
+                word.clear()
+
+        for item in items:
+            if isinstance(item, (bytes, str)):
+                raw = item.get_original_bytes() if isinstance(item, TextStringObject) else item
+                if isinstance(raw, str):
+                    raw = raw.encode("latin-1", "replace")
+                for code, ch, width in font.glyphs(raw):
+                    advance = (width / 1000 * size + gs["Tc"]) * th
+                    if code == 32 and not font.two_byte:
+                        advance += gs["Tw"] * th
+                    if ch.isspace() or not ch:
+                        flush(x)
+                    else:
+                        if not word:
+                            start = x
+                        word.append(ch)
+                    x += advance
+            else:
+                shift = -float(item) / 1000 * size * th
+                if -float(item) / 1000 > WORD_GAP_EM:
+                    flush(x)
+                x += shift
+        flush(x)
+        return _mult([1.0, 0.0, 0.0, 1.0, x, 0.0], tm)
+
+
+def page_words(page):
+    """Words on one page as [[text, x0, y0, x1, y1], ...] in page space, in content order."""
+    walker = _PageWords(page.pdf)
+    walker.walk(page.get_contents(), page, _IDENTITY)
+    return walker.words
+
+
+def extract_words(source):
+    """Word lists for every page of a PDF (buffer, file object or path); [] for unreadable pages."""
+    from binder.merge import open_pdf
+
+    mm = None
+    if isinstance(source, str):
+        from binder.build import map_file
+
+        source = mm = map_file(source)
+    reader = None
+    try:
+        reader = open_pdf(source)
+        pages = []
+        for page in reader.pages:
+            try:
+                pages.append(page_words(page))
+            except Exception:
+                pages.append([])
+        return pages
+    finally:
+        if reader is not None:
+            try:
+                reader.stream.close()
+            except Exception:
+                pass
+        if mm is not None:
+            mm.close()
+
+
+# ---------- search ----------
+def _lines(words):
+    """Group content-ordered words into lines: [(text, [(start, end, word), ...]), ...]."""
+    lines, text, spans, prev = [], "", [], None
+    for w in words:
+        _, x0, y0, x1, y1 = w
+        h = max(y1 - y0, 1.0)
+        if prev is not None:
+            _, px0, py0, px1, py1 = prev
+            same_line = abs((y0 + y1) - (py0 + py1)) / 2 < 0.5 * h and x0 > px1 - h
+            if not same_line:
+                lines.append((text, spans))
+                text, spans = "", []
+            elif x0 - px1 > 0.15 * h:
+                text += " "
+        spans.append((len(text), len(text) + len(w[0]), w))
+        text += w[0]
+        prev = w
+    if spans:
+        lines.append((text, spans))
+    return lines
+
+
+def _match_rect(spans, start, end):
+    """Union of the word boxes (partial words by character share) covering text[start:end]."""
+    rect = None
+    for s, e, (text, x0, y0, x1, y1) in spans:
+        if e <= start or s >= end:
+            continue
+        n = max(len(text), 1)
+        a = x0 + (x1 - x0) * (max(start, s) - s) / n
+        b = x0 + (x1 - x0) * (min(end, e) - s) / n
+        box = (a, y0, b, y1)
+        rect = box if rect is None else (min(rect[0], a), min(rect[1], y0), max(rect[2], b), max(rect[3], y1))
+    return rect
+
+
+def find_terms(pages, terms, page_indexes=None):
+    """
+    Where `terms` occur on `pages` (from extract_words). Case, quote style and
+    spacing are ignored; a term must sit on one line. Returns
+    ({page index: {term: [(x0, y0, x1, y1), ...]}}, {term: match count}).
+    """
+    wanted = [(t, " ".join(t.translate(_FOLD).lower().split())) for t in terms]
+    wanted = [(t, q) for t, q in wanted if q]
+    found, counts = {}, {t: 0 for t, _ in wanted}
+    indexes = range(len(pages)) if page_indexes is None else page_indexes
+    for i in indexes:
+        if i >= len(pages) or not pages[i]:
+            continue
+        for text, spans in _lines(pages[i]):
+            folded = text.translate(_FOLD).lower()
+            for term, q in wanted:
+                for m in re.finditer(re.escape(q), folded):
+                    rect = _match_rect(spans, m.start(), m.end())
+                    if rect is not None:
+                        found.setdefault(i, {}).setdefault(term, []).append(rect)
+                        counts[term] += 1
+    return found, counts
+
+
+def make_highlighter(pages_for):
+    """
+    build_binder's `highlight` callable over pages_for(ref), which returns
+    the ref's extract_words() lists (normally TextIndex.pages).
+    """
+    from binder.names import page_selection
+
+    def highlight(ref, terms, page_indexes):
+        pages = pages_for(ref)
+        if page_indexes is None:
+            spec = ref.get("pages") if isinstance(ref, dict) else None
+            page_indexes = page_selection(spec, len(pages))
+        return find_terms(pages, terms, page_indexes)
+
+    return highlight
+
+
+# ---------- cache ----------
+def _write_index(root, blob_id, pages):
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, f"{blob_id}.json.gz")
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.part"
+    with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as fh:
+        json.dump(pages, fh, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path
+
+
+def _extract_to_cache(root, blob_id, path):
+    """Pool task: index the PDF at `path` and store it under `root`. Returns the page count."""
+    pages = extract_words(path)
+    _write_index(root, blob_id, pages)
+    return len(pages)
+
+
+class TextIndex:
+    """
+    Word positions of every page of an attachment, keyed by content hash and
+    kept as gzipped JSON under `root`, so any session or build worker that
+    meets the same file reuses the index. submit() extracts in a process pool
+    (text layout is pure-Python, CPU-bound work); pages() reads the cache or
+    extracts in the calling process. A few recent indexes stay in memory.
+    """
+
+    def __init__(self, root=TEXT_INDEX_DIR, max_bytes=DEFAULT_MAX_BYTES, workers=2, max_entries=32):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._workers = workers
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pending = {}
+        self._cache = OrderedDict()
+
+    def _path(self, blob_id):
+        return os.path.join(self.root, f"{blob_id}.json.gz")
+
+    def __contains__(self, blob_id):
+        return blob_id in self._cache or os.path.exists(self._path(blob_id))
+
+    def submit(self, blob_id, path):
+        """Start indexing the PDF at `path` unless it is cached or in flight."""
+        with self._lock:
+            if blob_id in self._pending or blob_id in self:
+                return
+            if self._pool is None:
+                # spawn: the server process is multi-threaded, so forking it is unsafe
+                self._pool = ProcessPoolExecutor(max_workers=self._workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            fut = self._pool.submit(_extract_to_cache, self.root, blob_id, path)
+            self._pending[blob_id] = fut
+        fut.add_done_callback(lambda f, b=blob_id: self._done(b))
+
+    def _done(self, blob_id):
+        with self._lock:
+            self._pending.pop(blob_id, None)
+        self.evict()
+
+    def wait(self, blob_ids, timeout=None):
+        """Block until pending indexing of `blob_ids` has finished."""
+        with self._lock:
+            futures = [self._pending.get(b) for b in blob_ids]
+        for fut in futures:
+            if fut is not None:
+                try:
+                    fut.result(timeout=timeout)
+                except Exception:
+                    pass
+
+    def get(self, blob_id):
+        """Cached word lists per page, or None when not indexed yet."""
+        with self._lock:
+            pages = self._cache.get(blob_id)
+            if pages is not None:
+                self._cache.move_to_end(blob_id)
+                return pages
+        path = self._path(blob_id)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                pages = json.load(fh)
+            os.utime(path)  # eviction goes by last use
+        except (OSError, ValueError):
+            return None
+        self._remember(blob_id, pages)
+        return pages
+
+    def pages(self, blob_id, source):
+        """Word lists per page for `source` (path or buffer), extracting and caching on a miss."""
+        pages = self.get(blob_id)
+        if pages is None:
+            pages = extract_words(source)
+            _write_index(self.root, blob_id, pages)
+            self._remember(blob_id, pages)
+            self.evict()
+        return pages
+
+    def _remember(self, blob_id, pages):
+        with self._lock:
+            self._cache[blob_id] = pages
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def evict(self):
+        """Remove least recently used index files until the cache is under max_bytes."""
+        try:
+            entries = [e for e in os.scandir(self.root) if e.name.endswith(".json.gz")]
+        except OSError:
+            return
+        stats = sorted(((e.stat().st_mtime, e.stat().st_size, e.path) for e in entries))
+        total = sum(size for _, size, _ in stats)
+        for _, size, path in stats:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+# Shared by all sessions (and, through its files, the build workers) in this server
+text_index = TextIndex()
@@ -0,0 +1,171 @@
+# binder/volumes.py — split a binder into size-capped volumes at section boundaries
+
+import io
+import os
+import time
+import zipfile
+
+from binder.names import page_selection
+
+# Estimated bytes every volume carries besides its sections (binder cover, fonts, logo)
+VOLUME_OVERHEAD_BYTES = 160 * 1024
+# Estimated bytes of one section cover page
+SECTION_COVER_BYTES = 8 * 1024
+# Estimates are rough; plan to this fraction of the cap so real volumes land under it
+PLAN_HEADROOM = 0.9
+
+
+def estimate_section_bytes(entry, size_of, pages_of=None):
+    """
+    Rough size of one section in the binder: its cover plus each attachment's
+    bytes, scaled by the share of pages selected when pages_of(ref) is known.
+    """
+    total = SECTION_COVER_BYTES
+    for ref in entry.get("pdfs", []):
+        size = size_of(ref) or 0
+        pages = ref.get("pages") if isinstance(ref, dict) else None
+        count = pages_of(ref) if (pages and pages_of) else None
+        if pages and count:
+            try:
+                size = size * len(page_selection(pages, count)) / count
+            except ValueError:
+                pass
+        total += size
+    return int(total)
+
+
+def plan_volumes(section_bytes, max_bytes, overhead=VOLUME_OVERHEAD_BYTES):
+    """
+    Greedy split of sections, in order, into volumes whose estimated size
+    stays under max_bytes * PLAN_HEADROOM. A section bigger than that gets a
+    volume of its own. Returns a list of section-index lists.
+    """
+    budget = max(max_bytes * PLAN_HEADROOM - overhead, 1)
+    volumes, current, used = [], [], 0
+    for i, size in enumerate(section_bytes):
+        if current and used + size > budget:
+            volumes.append(current)
+            current, used = [], 0
+        current.append(i)
+        used += size
+    if current:
+        volumes.append(current)
+    return volumes
+
+
+def volume_fields(binder_fields, number, total):
+    """Cover fields for one volume: the project line says which volume it is."""
+    if total <= 1:
+        return dict(binder_fields)
+    fields = dict(binder_fields)
+    fields["project"] = f"{(fields.get('project') or '').strip()} — Volume {number} of {total}".strip(" —")
+    return fields
+
+
+def volume_filename(file_name, number, total):
+    """'Job_2026-01-31.pdf' -> 'Job_2026-01-31_Vol2of3.pdf' (unchanged for one volume)."""
+    if total <= 1:
+        return file_name
+    stem, ext = os.path.splitext(file_name)
+    return f"{stem}_Vol{number}of{total}{ext or '.pdf'}"
+
+
+def zip_volumes(volumes):
+    """Zip of [{"file_name", "data"}, ...] (stored: PDFs are already compressed)."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_STORED) as zf:
+        for v in volumes:
+            zf.writestr(v["file_name"], v["data"])
+    return buf.getvalue()
+
+
+class VolumeSetJob:
+    """
+    One BuildJob per volume, started together (the build service runs them in
+    parallel as workers and memory allow) and presented to the UI as a
+    single job. result is {"volumes": [each volume job's result, in order]}.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.started = None
+        self.queued_at = None
+
+    def start(self):
+        self.started = self.queued_at = time.time()
+        started = []
+        try:
+            for job in self.jobs:
+                started.append(job.start())
+        except Exception:
+            for job in started:
+                job.cancel()
+            raise
+        return self
+
+    @property
+    def status(self):
+        states = [j.status for j in self.jobs]
+        if any(s == "failed" for s in states) and not any(s in ("queued", "running") for s in states):
+            return "failed"
+        if all(s == "queued" for s in states):
+            return "queued"
+        if any(s in ("queued", "running", "pending") for s in states):
+            return "running"
+        if any(s == "cancelled" for s in states):
+            return "cancelled"
+        return "done"
+
+    @property
+    def running(self):
+        return self.status in ("queued", "running")
+
+    @property
+    def position(self):
+        positions = [getattr(j, "position", 0) for j in self.jobs if j.status == "queued"]
+        return min(positions) if positions else 0
+
+    @property
+    def error(self):
+        return next((j.error for j in self.jobs if j.error is not None), None)
+
+    @property
+    def elapsed(self):
+        finished = [j.finished for j in self.jobs]
+        end = max(finished) if all(finished) else time.time()
+        return end - (self.started or end)
+
+    @property
+    def progress(self):
+        ps = [j.progress for j in self.jobs]
+        running = sum(1 for j in self.jobs if j.status == "running")
+        return {
+            "done": sum(p["done"] for p in ps),
+            "total": sum(p["total"] for p in ps),
+            "pages": sum(p["pages"] for p in ps),
+            "stage": "sections" if any(p["total"] for p in ps) else "queued",
+            "volumes": len(self.jobs),
+            "running": running,
+        }
+
+    def fraction(self):
+        if self.status == "done":
+            return 1.0
+        return sum(j.fraction() for j in self.jobs) / max(len(self.jobs), 1)
+
+    def cancel(self):
+        for job in self.jobs:
+            job.cancel()
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        for job in self.jobs:
+            left = None if deadline is None else max(deadline - time.time(), 0)
+            job.wait(left)
+        return not self.running
+
+    @property
+    def result(self):
+        if self.status != "done":
+            return None
+        return {"volumes": [j.result for j in self.jobs]}
@@ -1,26 +1,35 @@
 # submittal_builder.py — Streamlit Cloud–ready
 
 import streamlit as st
-from PyPDF2 import PdfMerger
-from reportlab.lib.pagesizes import LETTER
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-from reportlab.lib.units import inch
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase.pdfmetrics import stringWidth
-import textwrap
-import tempfile
+import copy
+import datetime
 import io
 import os
-import re
-import datetime
+import threading
+from types import SimpleNamespace
+
+# Only light modules here: reportlab/PyPDF2 load on first Generate (see pdf_engine)
+from binder.blobs import BlobStore
+from binder.bundle import COVER_FIELDS, BundleError, open_bundle, write_bundle
+from binder.csi import csi_insert_position, csi_order, division_title
+from binder.names import (RECIPIENT_FIELDS, format_cover_date, format_recipients, page_selection, parse_recipients,
+                          recipient_filenames, sanitize_filename, section_label, suggested_filename)
+from binder.library import describe_item, product_library
+from binder.preflight import describe, metadata_index
+from binder.jobs import BuildJob
+from binder.profile import BuildProfile, log_profile
+from binder.textindex import parse_terms, text_index
+from binder.service import ServiceBusy, ServiceJob, build_service, estimate_memory
+from binder.volumes import (VolumeSetJob, estimate_section_bytes, plan_volumes, volume_fields,
+                            volume_filename, zip_volumes)
 
 # ---------- Page config ----------
 st.set_page_config(page_title="Wiljo Submittal Builder", layout="centered")
 
 # Background image from your GitHub repo (raw URL)
 BG_URL = "https://raw.githubusercontent.com/rosskid0911-sketch/WiljoSubmittalBuilder/main/assets/background.jpg"
+# Sections listed per page in step 3
+SECTIONS_PER_PAGE = 20
 
 st.markdown(f"""
 <style>
@@ -37,336 +46,322 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 
-# ---------- Helpers ----------
-def resource_path(*parts):
-    """Repo-relative path (works on Streamlit Cloud and locally)."""
-    base = os.path.dirname(__file__)
-    return os.path.join(base, *parts)
-
-# Optional custom fonts; fall back to Times if not present
-FONT_REG = "Times-Roman"
-FONT_BOLD = "Times-Bold"
-try:
-    pdfmetrics.registerFont(TTFont("WILJO-SERIF", resource_path("fonts", "LiberationSerif-Regular.ttf")))
-    pdfmetrics.registerFont(TTFont("WILJO-SERIF-BOLD", resource_path("fonts", "LiberationSerif-Bold.ttf")))
-    FONT_REG = "WILJO-SERIF"
-    FONT_BOLD = "WILJO-SERIF-BOLD"
-except Exception:
-    pass
-
-LETTER_W, LETTER_H = LETTER
-
-def load_logo_imagereader(filename="wiljo_logo.png"):
-    """Load a bundled logo as ImageReader (repo root)."""
-    p = resource_path(filename)
-    if os.path.exists(p):
-        try:
-            return ImageReader(p)
-        except Exception:
-            pass
-    if os.path.exists(filename):
+# ---------- PDF engine (loaded once per server) ----------
+@st.cache_resource(show_spinner="Loading PDF engine…")
+def pdf_engine():
+    """
+    reportlab/PyPDF2, the registered fonts and the decoded logo, imported and
+    loaded once per server process the first time anyone presses Generate.
+    """
+    from binder import binder_cache, build, covers, incremental
+    return SimpleNamespace(
+        build_binder=build.build_binder,
+        BuildState=incremental.BuildState,
+        binder_key=binder_cache.binder_key,
+        binder_cache=binder_cache.binder_cache,
+        logo=covers.load_logo_imagereader("wiljo_logo.png"),
+    )
+
+# ---------- Session attachments ----------
+def get_blob_store():
+    """This session's content-addressed attachment store (created on first use)."""
+    if "blob_store" not in st.session_state:
+        st.session_state.blob_store = BlobStore()
+        st.session_state.upload_blobs = {}
+    return st.session_state.blob_store
+
+def upload_key(f):
+    """Stable per-session key for an UploadedFile."""
+    return getattr(f, "file_id", None) or (f.name, getattr(f, "size", None))
+
+def upload_blob_id(f):
+    """
+    Blob ID for an uploaded file: stored (and hashed) once per session, and
+    handed to the shared metadata index for a background preflight parse.
+    """
+    store = get_blob_store()
+    seen = st.session_state.upload_blobs
+    key = upload_key(f)
+    blob_id = seen.get(key)
+    if blob_id is None or blob_id not in store:
+        blob_id = store.put(f.getvalue())
+        seen[key] = blob_id
+    metadata_index.submit(blob_id, store.get(blob_id))
+    return blob_id
+
+def ingest_uploads(files):
+    """Preflight every upload as soon as it arrives. Returns the live blob IDs."""
+    live = set()
+    for f in files or []:
         try:
-            return ImageReader(filename)
+            live.add(upload_blob_id(f))
         except Exception:
             pass
-    return None
+    return live
 
-def draw_logo_fit_box(c, logo_filename, left_x, top_y, max_width_in=1.6, max_height_in=0.75):
+def attach_uploads(files):
     """
-    Draw the logo scaled to fit inside a box (inches). Returns drawn height in inches.
+    Put uploaded files into the blob store and return section attachment refs
+    ({"name", "blob", "size"}). Each upload is hashed once per session.
     """
-    ir = load_logo_imagereader(logo_filename)
-    if ir is None:
+    store = get_blob_store()
+    refs = []
+    for f in files or []:
         try:
-            st.info(f"Logo not found (looking for '{logo_filename}').")
+            blob_id = upload_blob_id(f)
         except Exception:
-            pass
-        return 0.0
+            continue
+        refs.append({"name": f.name, "blob": blob_id, "size": store.size(blob_id)})
+    return refs
+
+def attach_library(items):
+    """Section attachment refs for product-library picks (read from the library's files, never copied)."""
+    store = get_blob_store()
+    refs = []
+    for item in items or []:
+        path = product_library.path(item["blob"])
+        # Pinned first: the library can't evict the file while this session serves it
+        release = product_library.pin(item["blob"])
+        if not os.path.exists(path):
+            release()
+            continue
+        store.put_file(item["blob"], path, item["size"], release=release)
+        refs.append({"name": item["name"], "blob": item["blob"], "size": item["size"]})
+    try:
+        product_library.touch([r["blob"] for r in refs])
+    except Exception:
+        pass
+    return refs
 
+def remember_in_library(refs, spec, product):
+    """Keep a section's attachments in the product library, tagged with the section."""
+    store = get_blob_store()
+    for ref in refs:
+        try:
+            product_library.add(store.get(ref["blob"]), ref["name"], spec, product, blob_id=ref["blob"])
+        except Exception:
+            pass  # the library is a convenience; never block adding a section
+
+def search_library(query):
     try:
-        ow, oh = ir.getSize()
+        return product_library.search(query)
     except Exception:
-        ow, oh = (400, 200)
-
-    if ow <= 0 or oh <= 0:
-        return 0.0
-
-    box_w = float(max_width_in) * inch
-    box_h = float(max_height_in) * inch
-    scale = min(box_w / ow, box_h / oh)
-    draw_w = ow * scale
-    draw_h = oh * scale
-
-    c.drawImage(
-        ir,
-        left_x,
-        top_y - draw_h,  # ReportLab y is bottom-left
-        width=draw_w,
-        height=draw_h,
-        preserveAspectRatio=True,
-        mask="auto",
-    )
-    return draw_h / inch
-
-def draw_wrapped_text(c, text, x, y, max_width, font=FONT_REG, size=12, leading=16):
-    """Left-aligned wrapped text."""
-    c.setFont(font, size)
-    chars = max(1, int(max_width / (size * 0.5)))
-    for line in textwrap.wrap(text or "", width=chars):
-        c.drawString(x, y, line)
-        y -= leading
-    return y
-
-# ---- centered wrap + auto-fit for section covers ----
-def wrap_centered_text(c, text, center_x, top_y, max_width, font, size, leading):
+        return []
+
+def collect_garbage_blobs(upload_ids=()):
+    """Drop blobs (and upload hash memos) no longer referenced by any section or upload."""
+    store = get_blob_store()
+    live = {p["blob"] for entry in st.session_state.spec_data for p in entry.get("pdfs", [])}
+    job = st.session_state.get("build_job")
+    if job is not None and job.running:
+        live |= job.blob_ids  # a background build still reads these
+    store.gc(live | set(upload_ids))
+    seen = st.session_state.upload_blobs
+    for key in [k for k, b in seen.items() if b not in store]:
+        del seen[key]
+    # Attachments that reached the session without an upload still get preflighted;
+    # a project's attachments not read yet wait for the build (see preflight_problems)
+    for blob_id in live:
+        if metadata_index.get(blob_id) is None and store.is_loaded(blob_id):
+            metadata_index.submit(blob_id, store.get(blob_id))
+
+def preflight_problems(sections, timeout=120):
     """
-    Wrap text to fit max_width (approx), draw each line centered,
-    and return the y after drawing along with the list of lines.
+    Wait for any pending preflight parses, then list attachments that cannot
+    be merged as (section label, file name, reason).
     """
-    s = (text or "").strip()
-    c.setFont(font, size)
-    chars = max(1, int(max_width / (size * 0.5)))
-    lines = textwrap.wrap(s, width=chars) if s else [""]
-    y = top_y
-    for line in lines:
-        c.drawCentredString(center_x, y, line)
-        y -= leading
-    return y, lines
-
-def draw_autofit_centered(
-    c, text, center_x, box_top_y, box_height, max_width,
-    font, max_size=48, min_size=14, target_lines=2, line_gap=6
-):
+    ids = {p["blob"] for entry in sections for p in entry.get("pdfs", [])}
+    store = get_blob_store()
+    for blob_id in ids:
+        if metadata_index.get(blob_id) is None and blob_id in store:
+            metadata_index.submit(blob_id, store.get(blob_id))  # e.g. saved in a project before it was checked
+    infos = metadata_index.wait(ids, timeout=timeout)
+    problems = []
+    for n, entry in enumerate(sections, start=1):
+        for p in entry.get("pdfs", []):
+            info = infos.get(p["blob"])
+            if info is None:
+                problems.append((f"{n}. {entry.get('spec') or ''}", p["name"], "could not be checked in time"))
+            elif info["error"]:
+                problems.append((f"{n}. {entry.get('spec') or ''}", p["name"], info["error"]))
+            elif p.get("pages"):
+                try:
+                    page_selection(p["pages"], info["pages"])
+                except ValueError as e:
+                    problems.append((f"{n}. {entry.get('spec') or ''}", p["name"], f"pages {p['pages']}: {e}"))
+    return problems
+
+def index_for_highlights(sections, load=False):
     """
-    Auto-shrinks text to fit within (max_width x box_height), centered.
-    Tries from max_size down to min_size until it fits target_lines (or fewer),
-    horizontal width, and vertical space. Draws and returns the final y.
+    Start text indexing of attachments in sections that have highlight terms.
+    A project's attachments not read yet are left alone unless `load` is set
+    (the build reads them anyway).
     """
-    s = (text or "").strip()
-    if not s:
-        return box_top_y
-
-    for size in range(int(max_size), int(min_size) - 1, -1):
-        leading = size + line_gap
-        chars = max(1, int(max_width / (size * 0.5)))
-        lines = textwrap.wrap(s, width=chars) or [""]
-        needed_h = len(lines) * leading
-        too_wide = any(stringWidth(line, font, size) > max_width for line in lines)
-
-        if (len(lines) <= target_lines) and (needed_h <= box_height) and not too_wide:
-            y = box_top_y - (box_height - leading) / 2
-            c.setFont(font, size)
-            for line in lines:
-                c.drawCentredString(center_x, y, line)
-                y -= leading
-            return y
-
-    # Fallback at min_size
-    size = min_size
-    leading = size + line_gap
-    _, _ = wrap_centered_text(c, s, center_x, box_top_y - leading / 2, max_width, font, size, leading)
-    return box_top_y - leading
-
-# ---------- PDF Generators ----------
-def generate_binder_cover(date_str, to_name, to_company, to_addr1, to_addr2, project, submitter_name):
+    store = get_blob_store()
+    ids = {p["blob"] for entry in sections if entry.get("highlights") for p in entry.get("pdfs", [])}
+    for blob_id in ids:
+        if blob_id in store and blob_id not in text_index and (load or store.is_loaded(blob_id)):
+            text_index.submit(blob_id, store.path(blob_id))
+    return ids
+
+def with_pages(refs, pages):
+    """Copies of attachment refs limited to a page selection ("" = whole file)."""
+    pages = (pages or "").strip()
+    page_selection(pages, 10 ** 9)  # syntax check; page counts are checked before the build
+    return [dict(r, pages=pages) if pages else {k: v for k, v in r.items() if k != "pages"} for r in refs]
+
+def attachment_label(p):
+    return f"{p['name']} (pages {p['pages']})" if p.get("pages") else p["name"]
+
+def get_build_state():
+    """Last binder built in this session, reused section by section on the next Generate."""
+    if "build_state" not in st.session_state:
+        st.session_state.build_state = pdf_engine().BuildState()
+    return st.session_state.build_state
+
+def show_section(index):
+    """Open section `index` in the step 3 list (None closes it), turning to the page that holds it."""
+    st.session_state.open_section = index
+    if index is not None:
+        st.session_state.section_page_next = index // SECTIONS_PER_PAGE
+
+def reorder_sections(order):
+    """Put the sections in `order` (a list of their current indexes) in one go; the open section stays open."""
+    data = st.session_state.spec_data
+    open_i = st.session_state.get("open_section")
+    st.session_state.spec_data = [data[k] for k in order]
+    # Edit mode is keyed by position
+    for key in [k for k in st.session_state if str(k).startswith("editing_")]:
+        del st.session_state[key]
+    show_section(order.index(open_i) if open_i is not None and open_i in order else None)
+
+def insert_section(entry):
+    """Add a section at its CSI MasterFormat position (unnumbered sections go last)."""
+    data = st.session_state.spec_data
+    position = csi_insert_position(data, entry.get("spec"))
+    data.append(entry)
+    order = list(range(len(data) - 1))
+    order.insert(position, len(data) - 1)
+    reorder_sections(order)
+
+def open_project(upload):
     """
-    Letter-style binder cover with logo between two full-width lines, then body.
-    Returns a temporary file path to the PDF page.
+    Replace the cover and sections with a saved project (see binder.bundle).
+    Only its manifest is read now; each attachment is read from the file the
+    first time a build (or anything else) needs its bytes.
     """
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    c = canvas.Canvas(tmp.name, pagesize=LETTER)
-    margin = 0.9 * inch
-    x = margin
-    y = LETTER_H - margin
-    page_w, _ = LETTER
-
-    # Top break line (slightly above logo)
-    c.setStrokeColorRGB(0, 0, 0)
-    c.setLineWidth(1)
-    top_line_y = y + 0.20 * inch
-    c.line(x, top_line_y, page_w - x, top_line_y)
-
-    # Logo
-    drawn_h_in = draw_logo_fit_box(
-        c,
-        "wiljo_logo.png",
-        left_x=x,
-        top_y=y,
-        max_width_in=1.6,
-        max_height_in=0.75,
-    )
+    bundle = open_bundle(upload)
+    store = get_blob_store()
+    for blob_id, size in bundle.sizes.items():
+        store.put_lazy(blob_id, size, lambda blob_id=blob_id: bundle.load(blob_id))
+        if bundle.infos.get(blob_id):
+            metadata_index.seed(blob_id, bundle.infos[blob_id])
+    # Cover widgets are created further down this run, so their values can still be set
+    for k in COVER_FIELDS:
+        st.session_state[f"cover_{k}"] = bundle.cover[k]
+    st.session_state.cover_date = bundle.date
+    st.session_state.cover_recipients = format_recipients(bundle.recipients)
+    st.session_state.spec_data = bundle.sections
+    for key in [k for k in st.session_state if str(k).startswith("editing_")]:
+        del st.session_state[key]
+    st.session_state.confirm_clear = False
+    show_section(None)
+    return bundle
 
-    # Bottom break line (below logo)
-    header_gap_in = 0.20
-    bottom_line_y = y - (drawn_h_in + header_gap_in) * inch
-    c.line(x, bottom_line_y, page_w - x, bottom_line_y)
-
-    # Body start
-    body_gap_in = 0.25
-    body_top_y = bottom_line_y - (body_gap_in * inch)
-
-    # Date
-    c.setFont(FONT_REG, 12)
-    c.drawString(x, body_top_y, date_str)
-    text_y = body_top_y - 28
-
-    # Recipient block
-    c.setFont(FONT_REG, 12)
-    for line in [to_name, to_company, to_addr1, to_addr2]:
-        if line and line.strip():
-            c.drawString(x, text_y, line.strip())
-            text_y -= 18
-    text_y -= 10
-
-    # Re: Project
-    c.setFont(FONT_BOLD, 12)
-    c.drawString(x, text_y, f"Re: {project}")
-    text_y -= 28
-
-    # Approval sentence
-    text_y = draw_wrapped_text(
-        c,
-        "We are submitting the following materials for the architect’s review and approval:",
-        x,
-        text_y,
-        max_width=(LETTER_W - 2 * margin),
-        font=FONT_REG,
-        size=12,
-        leading=16,
-    )
-    text_y -= 10
-
-    # Bulleted Spec Sections
-    bullet = u"\u2022"
-    c.setFont(FONT_REG, 12)
-    max_width = LETTER_W - 2 * margin
-    sections = st.session_state.get("spec_data") or []
-    for entry in sections:
-        spec_label = (entry.get("spec") or "").strip()
-        if not spec_label:
-            continue
-        line = f"{bullet}  Spec Section {spec_label}"
-        for i_line, l in enumerate(textwrap.wrap(line, width=int(max_width / (12 * 0.5)))):
-            c.drawString(x + (0 if i_line == 0 else 18), text_y, l)
-            text_y -= 16
-        text_y -= 2
-
-        # Overflow safety
-        if text_y < 120:
-            footer_text = "Wiljo Interiors, Inc.   |   109 NE 38th Street, Oklahoma City, OK 73105"
-            c.setFont(FONT_REG, 10)
-            c.drawCentredString(LETTER_W / 2, 0.5 * inch, footer_text)
-            c.showPage()
-            c.setFont(FONT_REG, 12)
-            text_y = LETTER_H - margin
-
-    text_y -= 40
-
-    # Signature
-    c.setFont(FONT_REG, 12)
-    c.drawString(x, text_y, "Respectfully Submitted,")
-    text_y -= 36
-    c.drawString(x, text_y, submitter_name)
-
-    # Footer
-    footer_text = "Wiljo Interiors, Inc.   |   109 NE 38th Street, Oklahoma City, OK 73105"
-    c.setFont(FONT_REG, 10)
-    c.drawCentredString(LETTER_W / 2, 0.5 * inch, footer_text)
-
-    c.showPage()
-    c.save()
-    return tmp.name
-
-def generate_section_cover(spec_section, product_name):
+def project_file():
     """
-    Returns a BytesIO containing a one-page section cover PDF.
-    - Spec Section (bold, large) auto-wraps/auto-shrinks to fit 2 lines.
-    - Product Name (bold, medium) wraps below it (up to 3 lines).
-    - Footer centered at bottom.
+    Callable for the Save project download: the bundle is written only when
+    the button is clicked, from a snapshot of the cover and sections as shown.
     """
-    buf = io.BytesIO()
-    c = canvas.Canvas(buf, pagesize=LETTER)
-    page_w, page_h = LETTER
-
-    # Background
-    c.setFillColorRGB(1, 1, 1)
-    c.rect(0, 0, page_w, page_h, fill=1)
-    c.setFillColorRGB(0, 0, 0)
-
-    # Layout
-    margin_x = 0.85 * inch
-    center_x = page_w / 2
-    max_width = page_w - 2 * margin_x
-
-    # Spec Section title (above center)
-    title_box_top = page_h * 0.62
-    title_box_h   = 1.8 * inch
-    draw_autofit_centered(
-        c,
-        text=spec_section,
-        center_x=center_x,
-        box_top_y=title_box_top,
-        box_height=title_box_h,
-        max_width=max_width,
-        font=FONT_BOLD,
-        max_size=48,
-        min_size=18,
-        target_lines=2,
-        line_gap=6,
-    )
+    store = get_blob_store()
+    sections = copy.deepcopy(st.session_state.get("spec_data") or [])
+    cover = {k: st.session_state.get(f"cover_{k}") or "" for k in COVER_FIELDS}
+    date = st.session_state.get("cover_date") or datetime.date.today()
+    recipients = parse_recipients(st.session_state.get("cover_recipients"))
+    infos = {p["blob"]: metadata_index.get(p["blob"]) for entry in sections for p in entry.get("pdfs", [])}
 
-    # Product name below
-    product_box_top = title_box_top - title_box_h - 0.25 * inch
-    product_box_h   = 1.2 * inch
-    draw_autofit_centered(
-        c,
-        text=product_name,
-        center_x=center_x,
-        box_top_y=product_box_top,
-        box_height=product_box_h,
-        max_width=max_width,
-        font=FONT_BOLD,
-        max_size=32,
-        min_size=14,
-        target_lines=3,
-        line_gap=4,
-    )
+    def write():
+        return write_bundle(io.BytesIO(), cover, date, sections, store.get, recipients, infos).getvalue()
 
-    # Footer
-    footer_text = "Wiljo Interiors, Inc.   |   109 NE 38th Street, Oklahoma City, OK 73105"
-    c.setFont(FONT_REG, 10)
-    c.drawCentredString(page_w / 2, 0.5 * inch, footer_text)
-
-    c.showPage()
-    c.save()
-    buf.seek(0)
-    return buf
-
-def sanitize_filename(name: str, fallback: str = "Submittal_Binder.pdf") -> str:
-    """Remove illegal filename chars and ensure .pdf extension."""
-    name = (name or "").strip()
-    if not name:
-        return fallback
-    name = re.sub(r'[<>:"/\\|?*]+', "_", name)
-    if not name.lower().endswith(".pdf"):
-        name += ".pdf"
-    return name
+    return write
+
+def file_download(path):
+    """
+    Callable for a binder's download button: the file is read when the button
+    is clicked, not held in session memory on every rerun. It is opened now,
+    so the download still works once the build state or the binder cache has
+    removed it.
+    """
+    fh = open(path, "rb")
+    lock = threading.Lock()
+
+    def read():
+        with lock:  # downloads run on server threads
+            fh.seek(0)
+            return fh.read()
+
+    return read
 
 # ---------- UI ----------
 st.title("Wiljo Submittal Builder")
 
+# ---- Saved projects: cover + sections + attachments in one file ----
+with st.expander("📂 Save or open a project"):
+    st.caption("A project file holds the cover, the sections and every attached PDF (each stored once), "
+               "so a resubmittal starts from the last one instead of from scratch.")
+    c_open, c_save = st.columns(2)
+    with c_open:
+        project_upload = st.file_uploader(
+            "Open a saved project",
+            type=["zip"],
+            key=f"project_upload_{st.session_state.get('project_upload_version', 0)}",
+            help="Replaces the cover and sections on this page.",
+        )
+        if project_upload is not None and st.button("📂 Open project"):
+            try:
+                opened = open_project(project_upload)
+            except BundleError as e:
+                st.error(f"Can't open {project_upload.name}: {e}")
+            else:
+                # A fresh uploader, so the file is not held in memory any longer
+                st.session_state.project_upload_version = st.session_state.get("project_upload_version", 0) + 1
+                st.session_state.project_opened = (f"Opened {project_upload.name}: {len(opened.sections)} "
+                                                   f"section(s), {len(opened.sizes)} PDF(s).")
+                st.rerun()
+        if "project_opened" in st.session_state:
+            st.success(st.session_state.pop("project_opened"))
+    with c_save:
+        save_name = suggested_filename(st.session_state.get("cover_project"), st.session_state.get("cover_date"))
+        st.download_button(
+            "💾 Save project",
+            data=project_file(),
+            file_name=os.path.splitext(save_name)[0] + "_project.zip",
+            mime="application/zip",
+            disabled=not st.session_state.get("spec_data"),
+            on_click="ignore",
+        )
+
 # ---- Step 1: Binder Cover Information ----
 st.header("1) Binder Cover Information")
 col1, col2 = st.columns(2)
+# Keyed so a saved project can be opened into them
+if "cover_date" not in st.session_state:
+    st.session_state.cover_date = datetime.date.today()
 with col1:
-    project = st.text_input("Project (for Re: line)", value="", placeholder="e.g., Project Name")
-    submitter_name = st.text_input("Submitted By (PM Name)", value="", placeholder="e.g., PM Name")
-    date_value = st.date_input("Date", value=datetime.date.today(), format="MM/DD/YYYY")
+    project = st.text_input("Project (for Re: line)", placeholder="e.g., Project Name", key="cover_project")
+    submitter_name = st.text_input("Submitted By (PM Name)", placeholder="e.g., PM Name", key="cover_submitter_name")
+    date_value = st.date_input("Date", format="MM/DD/YYYY", key="cover_date")
 with col2:
-    to_name = st.text_input("To: Name", value="", placeholder="e.g., CM/GC Contact")
-    to_company = st.text_input("To: Company", value="", placeholder="e.g., CM/GC")
-    to_addr1 = st.text_input("To: CM/GC Street", value="", placeholder="e.g., Street")
-    to_addr2 = st.text_input("To: CITY/STATE/ZIP", value="", placeholder="e.g., City, State, Zip")
+    to_name = st.text_input("To: Name", placeholder="e.g., CM/GC Contact", key="cover_to_name")
+    to_company = st.text_input("To: Company", placeholder="e.g., CM/GC", key="cover_to_company")
+    to_addr1 = st.text_input("To: CM/GC Street", placeholder="e.g., Street", key="cover_to_addr1")
+    to_addr2 = st.text_input("To: CITY/STATE/ZIP", placeholder="e.g., City, State, Zip", key="cover_to_addr2")
+    more_recipients = st.text_area(
+        "Also send to (optional) — one per line: Name | Company | Street | City/State/Zip",
+        placeholder="e.g., Jane Doe | Architect LLP | 1 Main St | City, ST 00000",
+        help="Each recipient gets the same binder with their own cover; it is only built once.",
+        key="cover_recipients",
+    )
 
 # ---- Step 2: Upload PDFs ----
 st.header("2) Upload Product PDFs")
@@ -375,6 +370,12 @@ uploaded_pdfs = st.file_uploader(
     type=["pdf"],
     accept_multiple_files=True
 )
+# Parsed once in the background; results show in the section list below
+upload_ids = ingest_uploads(uploaded_pdfs)
+for f in uploaded_pdfs or []:
+    info = metadata_index.get(st.session_state.upload_blobs.get(upload_key(f)))
+    if info is not None and (info["error"] or info["warnings"]):
+        st.caption(f"{f.name}: {describe(info)}")
 
 # ---- Step 3: Add Spec Sections & Products ----
 st.header("3) Add Spec Sections & Products")
@@ -383,6 +384,13 @@ if "spec_data" not in st.session_state:
 if "confirm_clear" not in st.session_state:
     st.session_state.confirm_clear = False
 
+# Product PDFs used before (any project) can be picked without uploading again
+library_query = st.text_input(
+    "Search the product library (spec number, product, file name or first-page text)",
+    placeholder="e.g., 092216 or ClarkDietrich",
+)
+library_items = search_library(library_query)
+
 with st.form("spec_form", clear_on_submit=True):
     spec = st.text_input("Spec Section (e.g., 054000 Cold Formed Metal Framing)")
     product = st.text_input("Product Name (for the section cover page)")
@@ -391,14 +399,38 @@ with st.form("spec_form", clear_on_submit=True):
         uploaded_pdfs,
         format_func=lambda f: getattr(f, "name", "PDF")
     )
+    library_picks = st.multiselect(
+        "…or pick from the product library",
+        library_items,
+        format_func=describe_item,
+    )
+    pages_text = st.text_input(
+        "Pages to include (optional, e.g. 1-3, 7 — applies to the PDFs picked above; blank = whole file)"
+    )
+    highlights_text = st.text_area(
+        "Highlight on the product sheets (optional, one item per line, e.g. 5/8\" Fire code)",
+        height=80,
+    )
     add_section = st.form_submit_button("Add Section")
     if add_section:
-        pdf_payloads = [{"name": f.name, "data": f.getvalue()} for f in pdf_files]
-        st.session_state.spec_data.append({
-            "spec": (spec or "").strip(),
-            "product": (product or "").strip(),
-            "pdfs": pdf_payloads
-        })
+        try:
+            pdf_payloads = attach_uploads(pdf_files) + attach_library(library_picks)
+            remember_in_library(pdf_payloads, spec, product)
+            pdf_payloads = with_pages(pdf_payloads, pages_text)
+        except ValueError as e:
+            st.error(f"Pages: {e}")
+        else:
+            new_entry = {
+                "spec": (spec or "").strip(),
+                "product": (product or "").strip(),
+                "pdfs": pdf_payloads,
+                "highlights": parse_terms(highlights_text),
+            }
+            insert_section(new_entry)
+            index_for_highlights([new_entry])
+
+# Release attachments that were removed, deleted or cleared on the last run
+collect_garbage_blobs(upload_ids)
 
 # Show current list and Clear All (with confirm)  — REPLACE YOUR EXISTING BLOCK WITH THIS
 if st.session_state.spec_data:
@@ -418,6 +450,7 @@ if st.session_state.spec_data:
             if st.button("✅ Yes, Clear"):
                 st.session_state.spec_data.clear()
                 st.session_state.confirm_clear = False
+                st.session_state.open_section = None
                 st.rerun()
     with clear_cols[2]:
         if st.session_state.confirm_clear:
@@ -425,15 +458,69 @@ if st.session_state.spec_data:
                 st.session_state.confirm_clear = False
                 st.rerun()
 
-    # Render each section with Up/Down/Edit/Delete and attachment editing
-    for i, entry in enumerate(st.session_state.spec_data):
-        exp = st.expander(
-            f"{i+1}. Spec Section: {(entry.get('spec') or '').strip()} — {(entry.get('product') or '').strip()}  "
-            f"({len(entry.get('pdfs', []))} file{'s' if len(entry.get('pdfs', [])) != 1 else ''})",
-            expanded=True
+    # Whole new orders in one rerun: MasterFormat sort, or positions typed in a table
+    order_cols = st.columns([1, 1])
+    with order_cols[0]:
+        if st.button("🔢 Sort by CSI number", help="MasterFormat order; sections without a number go last"):
+            reorder_sections(csi_order(st.session_state.spec_data))
+            st.rerun()
+    with order_cols[1]:
+        bulk_reorder = st.toggle("Reorder several at once")
+    if bulk_reorder:
+        with st.form("reorder_form"):
+            st.caption("Type new positions, then apply. Sections given the same position keep their current order.")
+            version = st.session_state.get("reorder_version", 0)
+            rows = st.data_editor(
+                [{"Position": i + 1, "Spec Section": e.get("spec") or "", "Product": e.get("product") or "",
+                  "Division": division_title(e.get("spec"))}
+                 for i, e in enumerate(st.session_state.spec_data)],
+                column_config={"Position": st.column_config.NumberColumn(min_value=1, step=1, required=True)},
+                disabled=["Spec Section", "Product", "Division"],
+                hide_index=True,
+                width="stretch",
+                key=f"reorder_editor_{version}",
+            )
+            if st.form_submit_button("Apply order"):
+                reorder_sections(sorted(range(len(rows)), key=lambda k: (rows[k]["Position"], k)))
+                # A fresh table next time; the old one's edits would apply to the new order
+                st.session_state.reorder_version = version + 1
+                st.rerun()
+
+    # One line per section, a page at a time; only the open section builds its
+    # controls (Up/Down/Edit/Delete, attachments, edit form), so reruns stay
+    # quick with 100+ sections.
+    sections = st.session_state.spec_data
+    open_i = st.session_state.get("open_section")
+    if open_i is not None and open_i >= len(sections):
+        open_i = st.session_state.open_section = None
+    page_count = (len(sections) + SECTIONS_PER_PAGE - 1) // SECTIONS_PER_PAGE
+    if "section_page_next" in st.session_state:
+        # Follow a section moved onto another page (set before the pager exists this run)
+        st.session_state.section_page = st.session_state.pop("section_page_next")
+    if st.session_state.get("section_page", 0) >= page_count:
+        st.session_state.section_page = page_count - 1
+    if page_count > 1:
+        page = st.selectbox(
+            "Showing sections",
+            range(page_count),
+            format_func=lambda p: f"{p * SECTIONS_PER_PAGE + 1}–{min((p + 1) * SECTIONS_PER_PAGE, len(sections))} "
+                                  f"of {len(sections)}",
+            key="section_page",
         )
+    else:
+        page = 0
+
+    for i in range(page * SECTIONS_PER_PAGE, min((page + 1) * SECTIONS_PER_PAGE, len(sections))):
+        entry = sections[i]
+        is_open = i == open_i
+        label = section_label(entry.get("spec"), entry.get("product"), len(entry.get("pdfs", [])))
+        if st.button(f"{'▾' if is_open else '▸'} {i+1}. {label}", key=f"row_{i}", width="stretch"):
+            show_section(None if is_open else i)
+            st.rerun()
+        if not is_open:
+            continue
 
-        with exp:
+        with st.container(border=True):
             # Top row controls
             c_up, c_down, c_edit, c_del = st.columns([1, 1, 1, 1])
             with c_up:
@@ -442,6 +529,7 @@ if st.session_state.spec_data:
                         st.session_state.spec_data[i],
                         st.session_state.spec_data[i-1],
                     )
+                    show_section(i - 1)
                     st.rerun()
             with c_down:
                 if st.button("⬇️ Down", key=f"down_{i}", disabled=(i == len(st.session_state.spec_data) - 1)):
@@ -449,6 +537,7 @@ if st.session_state.spec_data:
                         st.session_state.spec_data[i],
                         st.session_state.spec_data[i+1],
                     )
+                    show_section(i + 1)
                     st.rerun()
             with c_edit:
                 if st.button("✏️ Edit", key=f"edit_toggle_{i}"):
@@ -456,6 +545,7 @@ if st.session_state.spec_data:
             with c_del:
                 if st.button("🗑️ Delete", key=f"del_{i}"):
                     st.session_state.spec_data.pop(i)
+                    show_section(None)
                     st.rerun()
 
             # READ-ONLY view (when not editing)
@@ -463,9 +553,11 @@ if st.session_state.spec_data:
                 st.markdown("**Attached PDFs:**")
                 if entry.get("pdfs"):
                     for p in entry["pdfs"]:
-                        st.caption(f"- {p['name']}")
+                        st.caption(f"- {attachment_label(p)} — {describe(metadata_index.get(p['blob']))}")
                 else:
                     st.caption("_None_")
+                if entry.get("highlights"):
+                    st.caption("Highlights: " + " · ".join(entry["highlights"]))
                 st.divider()
                 continue
 
@@ -482,15 +574,27 @@ if st.session_state.spec_data:
                 key=f"edit_prod_{i}"
             )
 
-            st.markdown("**Currently attached PDFs (uncheck to remove):**")
+            st.markdown("**Currently attached PDFs (uncheck to remove; pages blank = whole file):**")
             keep_flags = []
             if entry.get("pdfs"):
                 for idx, p in enumerate(entry["pdfs"]):
-                    keep = st.checkbox(p["name"], value=True, key=f"keep_{i}_{idx}")
-                    keep_flags.append((idx, keep))
+                    c_keep, c_pages = st.columns([3, 2])
+                    with c_keep:
+                        keep = st.checkbox(p["name"], value=True, key=f"keep_{i}_{idx}")
+                    with c_pages:
+                        pages = st.text_input("Pages", value=p.get("pages") or "", key=f"pages_{i}_{idx}",
+                                              placeholder="e.g. 1-3, 7", label_visibility="collapsed")
+                    keep_flags.append((idx, keep, pages))
             else:
                 st.caption("_None attached yet_")
 
+            e_highlights = st.text_area(
+                "Highlight on the product sheets (one item per line)",
+                value="\n".join(entry.get("highlights") or []),
+                height=80,
+                key=f"edit_highlights_{i}"
+            )
+
             st.markdown("**Attach additional PDFs from current uploads (optional):**")
             add_files = st.multiselect(
                 "Pick from uploaded list above (Step 2)",
@@ -498,31 +602,38 @@ if st.session_state.spec_data:
                 format_func=lambda f: getattr(f, "name", "PDF"),
                 key=f"add_files_{i}"
             )
+            add_library = st.multiselect(
+                "…or from the product library (search above the section form)",
+                library_items,
+                format_func=describe_item,
+                key=f"add_library_{i}"
+            )
 
             c_save, c_cancel = st.columns([1, 1])
             with c_save:
                 if st.button("💾 Save", key=f"save_{i}"):
-                    # Update spec/product
-                    st.session_state.spec_data[i]["spec"] = (e_spec or "").strip()
-                    st.session_state.spec_data[i]["product"] = (e_prod or "").strip()
-
-                    # Keep only checked current PDFs
-                    kept = []
-                    for idx, keep in keep_flags:
-                        if keep:
-                            kept.append(entry["pdfs"][idx])
-
-                    # Add selected new PDFs from current upload list
-                    added = []
-                    for f in add_files:
-                        try:
-                            added.append({"name": f.name, "data": f.getvalue()})
-                        except Exception:
-                            pass
-
-                    st.session_state.spec_data[i]["pdfs"] = kept + added
-                    st.session_state[f"editing_{i}"] = False
-                    st.rerun()
+                    try:
+                        # Keep only checked current PDFs, with their page selections
+                        kept = []
+                        for idx, keep, pages in keep_flags:
+                            if keep:
+                                kept += with_pages([entry["pdfs"][idx]], pages)
+                    except ValueError as e:
+                        st.error(f"Pages: {e}")
+                    else:
+                        # Update spec/product
+                        st.session_state.spec_data[i]["spec"] = (e_spec or "").strip()
+                        st.session_state.spec_data[i]["product"] = (e_prod or "").strip()
+
+                        # Add selected new PDFs from current upload list
+                        added = attach_uploads(add_files) + attach_library(add_library)
+                        remember_in_library(added, e_spec, e_prod)
+
+                        st.session_state.spec_data[i]["pdfs"] = kept + added
+                        st.session_state.spec_data[i]["highlights"] = parse_terms(e_highlights)
+                        index_for_highlights([st.session_state.spec_data[i]])
+                        st.session_state[f"editing_{i}"] = False
+                        st.rerun()
 
             with c_cancel:
                 if st.button("↩️ Cancel", key=f"cancel_{i}"):
@@ -548,88 +659,377 @@ else:
 
 # Custom file name (suggest Project + date)
 default_filename = "Submittal_Binder.pdf"
-suggested_name = (project.strip() or "Submittal_Binder")
-try:
-    try:
-        date_tag = date_value.strftime("%Y-%m-%d")
-    except Exception:
-        date_tag = date_value.strftime("%m-%d-%Y")
-    suggested_name = f"{suggested_name}_{date_tag}.pdf"
-except Exception:
-    suggested_name = f"{suggested_name}.pdf"
+suggested_name = suggested_filename(project, date_value)
 
 custom_filename_input = st.text_input('File name (include ".pdf" or leave as suggested)', value=suggested_name)
+combine_covers = st.checkbox(
+    "Render all covers as one document (fonts and logo embedded once — smaller, faster)",
+    value=True,
+)
+compact_output = st.checkbox(
+    "Compact output (merge duplicate fonts/images, recompress, downsample scans) — for portal size limits",
+    value=False,
+)
+max_dpi = None
+if compact_output:
+    max_dpi = st.number_input("Downsample images above (DPI)", min_value=72, max_value=600, value=150, step=25)
+
+bookmark_sections = st.checkbox(
+    "Bookmark each section (spec — product, with one entry per attachment)",
+    value=True,
+)
+toc_numbers = st.checkbox(
+    "Page numbers in the cover's section list (table of contents)",
+    value=False,
+)
+stamp_pages = st.checkbox(
+    "Stamp every page (\"Section 092216 – Page 3 of 12\" and the binder page number)",
+    value=False,
+)
+
+split_volumes = st.checkbox(
+    "Split into volumes at section boundaries (for portal/email size caps)",
+    value=False,
+)
+max_volume_mb = None
+if split_volumes:
+    max_volume_mb = st.number_input("Max size per volume (MB)", min_value=1.0, max_value=500.0, value=25.0, step=5.0)
+
+build_job = st.session_state.get("build_job")
+if build_job is not None and build_job.running:
+    disabled = True
 
 if st.button("📎 Generate Submittal Binder", disabled=disabled):
     # Use the calendar-selected date (cover wants M/D/YYYY, cross-platform)
-    try:
-        date_str = date_value.strftime("%-m/%-d/%Y")  # POSIX
-    except Exception:
-        date_str = date_value.strftime("%#m/%#d/%Y")  # Windows
+    date_str = format_cover_date(date_value)
 
-    from io import BytesIO
-    output_buf = BytesIO()
-    temp_paths = []
-    binder_cover_path = None
+    problems = preflight_problems(st.session_state.spec_data)
+    if problems:
+        st.error(
+            "These attachments can't go into the binder — remove or replace them and try again:\n"
+            + "\n".join(f"- {sec} / {name}: {why}" for sec, name, why in problems)
+        )
+        st.stop()
+
+    # Text indexes for highlight terms are usually ready from when the terms were
+    # entered; the build worker indexes anything still missing itself.
+    text_index.wait(index_for_highlights(st.session_state.spec_data, load=True), timeout=60)
+
+    engine = pdf_engine()
+    if engine.logo is None:
+        st.info("Logo not found (looking for 'wiljo_logo.png').")
+
+    store = get_blob_store()
+    binder_fields = dict(
+        date_str=date_str,
+        to_name=to_name,
+        to_company=to_company,
+        to_addr1=to_addr1,
+        to_addr2=to_addr2,
+        project=project,
+        submitter_name=submitter_name,
+    )
+    # The build is queued on the server-wide worker pool against a snapshot
+    # of the sections, so widget changes (and the reruns they cause) don't
+    # stop it. Workers read attachments from the blob store's files; sections
+    # that did not change since the last build are copied from it by page range.
+    sections = copy.deepcopy(st.session_state.spec_data)
+    build_state = get_build_state()
+    blob_ids = {p["blob"] for entry in sections for p in entry.get("pdfs", [])}
+
+    def pages_of(ref):
+        info = metadata_index.get(ref["blob"])
+        return info["pages"] if info else None
+
+    request = dict(
+        binder_fields=binder_fields,
+        sections=sections,
+        previous={"path": build_state.path, "ranges": build_state.ranges} if build_state.path else None,
+        # Page counts from the upload preflight: bookmark and TOC pages are
+        # planned from these instead of opening every attachment first
+        page_counts={b: pages_of({"blob": b}) for b in blob_ids},
+        options=dict(
+            combine_covers=combine_covers,
+            compact={"max_dpi": int(max_dpi)} if compact_output else None,
+            outline=bookmark_sections,
+            toc=toc_numbers,
+            stamp=stamp_pages,
+        ),
+    )
+    memory = estimate_memory(
+        sum(store.size(b) for b in blob_ids),
+        os.path.getsize(build_state.path) if build_state.path else 0,
+    )
+    file_name = sanitize_filename(custom_filename_input, fallback=default_filename)
+    volumes = []
+    if split_volumes:
+        volumes = plan_volumes(
+            [estimate_section_bytes(entry, lambda ref: store.size(ref["blob"]), pages_of) for entry in sections],
+            max_volume_mb * 1024 * 1024,
+        )
 
+    # Extra recipients: the same build, readdressed in the worker (see build_for_recipients)
+    recipients = parse_recipients(more_recipients)
+    if recipients:
+        if len(volumes) > 1:
+            st.error("Splitting into volumes and sending to several recipients can't be combined yet — "
+                     "turn one of them off and try again.")
+            st.stop()
+        recipients.insert(0, {k: binder_fields[k] for k in RECIPIENT_FIELDS})
+        request["recipients"] = recipients
+
+    # Nothing changed since some earlier build (any session): serve that binder
+    cache_key = engine.binder_key(binder_fields, sections, lambda p: p["blob"], combine_covers,
+                                  request["options"]["compact"], bookmark_sections, toc_numbers, stamp_pages)
+    hit = engine.binder_cache.get(cache_key) if len(volumes) <= 1 and not recipients else None
+    if hit is None:
+        # Workers read attachments by path; blobs of an opened project are read in from it here
+        request["blob_paths"] = {b: store.path(b) for b in blob_ids}
+
+    def adopt_result(result):
+        # The output file stays with the build state for the next incremental
+        # rebuild; the download reads it through a handle of its own.
+        engine.binder_cache.put(cache_key, result["path"],
+                                {"compact": result["compact"], "highlights": result["highlights"]})
+        output_file = open(result["path"], "rb")
+        build_state.replace(output_file, result["ranges"], result["stats"], path=result["path"])
+        download = file_download(result["path"])
+        size = os.path.getsize(result["path"])
+        write = next(s for s in result["profile"]["stages"] if s["stage"] == "write")
+        log_profile(result["profile"], sections=len(sections), pages=write["pages"], output_bytes=size,
+                    queued_ms=round((build_job.started - build_job.queued_at) * 1000, 1),
+                    recipients=len(recipients) or 1)
+        adopted = {"download": download, "size": size, "stats": dict(result["stats"]),
+                   "compact": result["compact"], "highlights": result["highlights"], "profile": result["profile"]}
+        if recipients:
+            copies = [download()]
+            for path in result["copies"]:
+                with open(path, "rb") as fh:
+                    copies.append(fh.read())
+                os.remove(path)
+            adopted["recipients"] = [
+                {"file_name": name, "data": d, "to": r["to_company"] or r["to_name"] or f"recipient {n}"}
+                for n, (r, name, d) in enumerate(zip(recipients, recipient_filenames(file_name, recipients), copies),
+                                                 start=1)
+            ]
+        return adopted
+
+    def volume_job(number, indexes):
+        # Volumes build side by side on the pool, each from scratch; the
+        # session's incremental build state is left to whole-binder builds.
+        vol_sections = [sections[i] for i in indexes]
+        vol_blobs = {p["blob"] for entry in vol_sections for p in entry.get("pdfs", [])}
+        vol_name = volume_filename(file_name, number, len(volumes))
+
+        def adopt_volume(result):
+            with open(result["path"], "rb") as fh:
+                data = fh.read()
+            os.remove(result["path"])
+            log_profile(result["profile"], sections=len(vol_sections), output_bytes=len(data),
+                        volume=number, volumes=len(volumes))
+            return {"data": data, "file_name": vol_name, "sections": indexes, "stats": dict(result["stats"]),
+                    "compact": result["compact"], "highlights": result["highlights"], "profile": result["profile"]}
+
+        vol_request = dict(
+            request,
+            binder_fields=volume_fields(binder_fields, number, len(volumes)),
+            sections=vol_sections,
+            blob_paths={b: request["blob_paths"][b] for b in vol_blobs},
+            previous=None,
+        )
+        return ServiceJob(build_service, vol_request, estimate_memory(sum(store.size(b) for b in vol_blobs)),
+                          on_result=adopt_volume)
+
+    if hit is not None:
+        cached_path, meta = hit
+        profile = BuildProfile()
+        with profile.stage("cache") as rec:
+            download = file_download(cached_path)
+            rec["bytes_out"] = size = os.path.getsize(cached_path)
+        build_job = BuildJob.completed({"download": download, "size": size, "stats": {"reused": 0, "rendered": 0}, "cached": True,
+                                        "compact": meta.get("compact") or {},
+                                        "highlights": meta.get("highlights") or [],
+                                        "profile": profile.as_dict()})
+    elif len(volumes) > 1:
+        build_job = VolumeSetJob(volume_job(n, indexes) for n, indexes in enumerate(volumes, start=1))
+    else:
+        build_job = ServiceJob(build_service, request, memory, on_result=adopt_result)
+    build_job.file_name = file_name
+    build_job.blob_ids = blob_ids
     try:
-        with PdfMerger() as merger:
-            # Binder cover
-            binder_cover_path = generate_binder_cover(
-                date_str=date_str,
-                to_name=to_name,
-                to_company=to_company,
-                to_addr1=to_addr1,
-                to_addr2=to_addr2,
-                project=project,
-                submitter_name=submitter_name,
-            )
-            merger.append(binder_cover_path)
+        st.session_state.build_job = build_job if hit is not None else build_job.start()
+    except ServiceBusy as e:
+        st.error(f"The build server is busy: {e}")
+        st.stop()
+
+
+def show_highlight_summary(highlights):
+    """Matches highlighted automatically, then what is still left to highlight by hand."""
+    found = sum(h["matches"] for h in highlights)
+    if found:
+        st.caption(f"Highlighted {found} match(es) of {sum(1 for h in highlights if h['matches'])} item(s) "
+                   "on the product sheets.")
+    missing = [h for h in highlights if not h["matches"]]
+    if missing:
+        st.warning(
+            "Not found on the product sheets — please highlight these by hand:\n"
+            + "\n".join(f"- {h['section']}: {h['term']}" for h in missing)
+        )
+    if not highlights or any(not entry.get("highlights") for entry in st.session_state.spec_data):
+        st.warning(
+            "REMINDER: Please highlight specific items used on the product data sheet. "
+            "(e.g., 5/8\" Fire code, or Tile number, etc.) — or list them under the section to highlight "
+            "them automatically."
+        )
 
-            # Section covers + PDFs
-            for entry in st.session_state.spec_data:
-                sec_cover = generate_section_cover(entry["spec"], entry["product"])
-                try:
-                    sec_cover.seek(0)
-                except Exception:
-                    pass
-                merger.append(sec_cover)
-
-                for p in entry.get("pdfs", []):
-                    tmp_pdf = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-                    tmp_pdf.write(p["data"])
-                    tmp_pdf.flush()
-                    tmp_pdf.close()
-                    temp_paths.append(tmp_pdf.name)
-                    merger.append(tmp_pdf.name)
-
-            merger.write(output_buf)
-
-        # Download
-        output_buf.seek(0)
-        final_name = sanitize_filename(custom_filename_input, fallback=default_filename)
+
+def show_volumes_result(result, file_name):
+    volumes = result["volumes"]
+    st.download_button(
+        label=f"⬇️ Download all {len(volumes)} volumes (.zip)",
+        data=lambda: zip_volumes(volumes),  # zipped only when clicked, not on every rerun
+        file_name=os.path.splitext(file_name)[0] + ".zip",
+        mime="application/zip",
+        on_click="ignore",
+    )
+    for v in volumes:
+        first, last = v["sections"][0] + 1, v["sections"][-1] + 1
+        st.download_button(
+            label=f"⬇️ {v['file_name']} — sections {first}–{last}, {len(v['data']) / 1e6:.1f} MB",
+            data=v["data"],
+            file_name=v["file_name"],
+            mime="application/pdf",
+            key=f"volume_{v['file_name']}",
+        )
+    st.success(f"✅ Submittal Binder created in {len(volumes)} volumes.")
+    cap = max((len(v["data"]) for v in volumes), default=0)
+    if max_volume_mb and cap > max_volume_mb * 1024 * 1024:
+        st.caption("A volume is over the size cap — one section is larger than the cap on its own, "
+                   "or try Compact output.")
+    show_highlight_summary([h for v in volumes for h in v["highlights"]])
+
+
+def show_build_result(result, file_name):
+    if "volumes" in result:
+        show_volumes_result(result, file_name)
+        return
+    if result.get("recipients"):
+        copies = result["recipients"]
+        st.download_button(
+            label=f"⬇️ Download all {len(copies)} binders (.zip)",
+            data=lambda: zip_volumes(copies),  # zipped only when clicked, not on every rerun
+            file_name=os.path.splitext(file_name)[0] + ".zip",
+            mime="application/zip",
+            on_click="ignore",
+        )
+        for c in copies:
+            st.download_button(
+                label=f"⬇️ {c['file_name']} — to {c['to']}, {len(c['data']) / 1e6:.1f} MB",
+                data=c["data"],
+                file_name=c["file_name"],
+                mime="application/pdf",
+                key=f"recipient_{c['file_name']}",
+            )
+        st.success(f"✅ Submittal Binder created for {len(copies)} recipients.")
+    else:
         st.download_button(
             label="⬇️ Download Submittal Binder",
-            data=output_buf.getvalue(),
-            file_name=final_name,
+            data=result["download"],
+            file_name=file_name,
             mime="application/pdf",
+            on_click="ignore",
         )
-
         st.success("✅ Submittal Binder created.")
-        st.warning(
-            "REMINDER: Please highlight specific items used on the product data sheet. "
-            "(e.g., 5/8\" Fire code, or Tile number, etc.)"
-        )
-
-    finally:
-        # Cleanup temp files
-        for pth in temp_paths:
-            try:
-                os.remove(pth)
-            except Exception:
-                pass
-        if binder_cover_path:
-            try:
-                os.remove(binder_cover_path)
-            except Exception:
-                pass
+    stats = result["stats"]
+    if result.get("cached"):
+        st.caption("Nothing changed since an earlier build — served from the binder cache.")
+    if stats["reused"]:
+        st.caption(f"Rebuilt {stats['rendered']} changed section(s); reused {stats['reused']} from the last build.")
+    compact_report = result["compact"]
+    if compact_report:
+        rows = compact_report["sections"]
+        before = sum(r["before"] for r in rows)
+        after = sum(r["after"] for r in rows)
+        with st.expander(f"Compact output: {before / 1e6:.1f} MB → {after / 1e6:.1f} MB"):
+            st.table([
+                {"Section": r["label"], "Before (MB)": f"{r['before'] / 1e6:.2f}",
+                 "After (MB)": f"{r['after'] / 1e6:.2f}"}
+                for r in rows
+            ])
+            st.caption(f"{compact_report['deduped']} duplicate object(s) merged; "
+                       f"{compact_report['images']} image(s) downsampled.")
+    profile = result["profile"]
+    with st.expander(f"Build profile — {profile['total_ms'] / 1000:.1f}s"
+                     + (f", process peak {profile['process_peak_rss_mb']:.0f} MB"
+                        if profile.get("process_peak_rss_mb") else "")):
+        st.table([
+            {"Stage": s["stage"], "Time (ms)": f"{s['ms']:.0f}",
+             "Pages": "" if s["pages"] is None else str(s["pages"]),
+             "Read (MB)": f"{s['bytes_in'] / 1e6:.2f}" if s["bytes_in"] else "",
+             "Written (MB)": f"{s['bytes_out'] / 1e6:.2f}" if s["bytes_out"] else "",
+             "Memory change (MB)": f"{s['rss_delta_mb']:+.0f}" if s.get("rss_delta_mb") is not None else ""}
+            for s in profile["stages"]
+        ])
+        if profile["files"]:
+            st.caption("Attachments, slowest first")
+            st.dataframe(
+                [{"Section": f["section"], "File": f["file"], "Time (ms)": f["ms"],
+                  "Size (MB)": round(f["bytes"] / 1e6, 2) if f["bytes"] is not None else None,
+                  "Pages": f["pages"]}
+                 for f in sorted(profile["files"], key=lambda f: -f["ms"])],
+                hide_index=True,
+            )
+    show_highlight_summary(result["highlights"])
+
+
+def show_build_job():
+    """Progress (polled while the build runs), then the download that survives reruns."""
+    job = st.session_state.get("build_job")
+    if job is None:
+        return
+    if job.status == "queued":
+        ahead = job.position - 1
+        st.progress(0.0, text=(
+            f"Queued — position {job.position} of {build_service.queued} "
+            f"({ahead} build{'s' if ahead != 1 else ''} ahead, {build_service.active} running)"
+        ))
+        if st.button("✖ Cancel build"):
+            job.cancel()
+        return
+    if job.running:
+        p = job.progress
+        stage = {
+            "queued": "Starting…",
+            "covers": "Rendering covers…",
+            "sections": f"Section {min(p['done'] + 1, p['total'])} of {p['total']} · {p['pages']} pages",
+            "highlight": f"Highlighting {p['pages']} pages…",
+            "compact": f"Compacting {p['pages']} pages…",
+            "write": f"Writing {p['pages']} pages…",
+        }.get(p["stage"], "")
+        if "volumes" in p:
+            stage = f"{p['running']} of {p['volumes']} volumes building · {p['pages']} pages"
+        st.progress(job.fraction(), text=f"Building binder — {stage} ({job.elapsed:.0f}s)")
+        if st.button("✖ Cancel build"):
+            job.cancel()
+        return
+    if st.session_state.get("build_job_shown") is not job:
+        # First look at a finished job from the polling fragment: redraw the
+        # whole page so the Generate button is enabled again.
+        st.session_state.build_job_shown = job
+        if st.session_state.get("build_job_polling"):
+            st.session_state.build_job_polling = False
+            st.rerun()
+    if job.status == "done":
+        show_build_result(job.result, job.file_name)
+    elif job.status == "cancelled":
+        st.info("Build cancelled.")
+    elif job.status == "failed":
+        st.error(f"Build failed: {type(job.error).__name__}: {job.error}")
+
+
+if build_job is not None:
+    if build_job.running:
+        st.session_state.build_job_polling = True
+        st.fragment(run_every=1.0)(show_build_job)()
+    else:
+        show_build_job()